@@ -0,0 +1,28 @@
+"""Store forecasts as climate series
+
+Revision ID: c5e9a2d7f4b1
+Revises: b8d2f4a6c1e3
+Create Date: 2026-10-17 14:21:52.318406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e9a2d7f4b1'
+down_revision: Union[str, None] = 'b8d2f4a6c1e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # the stored forecasts are pickled lists of ClimateDataDTO, they are computed
+    # again as ClimateSeries when requested
+    op.execute('DELETE FROM climate_forecast')
+
+
+def downgrade() -> None:
+    op.execute('DELETE FROM climate_forecast')
@@ -0,0 +1,30 @@
+"""Add crop yield model hash
+
+Revision ID: e7c3a9f1d5b8
+Revises: c5e9a2d7f4b1
+Create Date: 2026-10-17 16:04:37.512983
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7c3a9f1d5b8'
+down_revision: Union[str, None] = 'c5e9a2d7f4b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('crop', sa.Column('crop_yield_model_hash', sa.String(), nullable=True))
+    op.execute(
+        'UPDATE crop SET crop_yield_model_hash = md5(crop_yield_model) '
+        'WHERE crop_yield_model IS NOT NULL'
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('crop', 'crop_yield_model_hash')
@@ -0,0 +1,38 @@
+"""One active job without location
+
+Revision ID: f1d8b3e6a9c2
+Revises: e7c3a9f1d5b8
+Create Date: 2026-10-17 16:41:09.274518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1d8b3e6a9c2'
+down_revision: Union[str, None] = 'e7c3a9f1d5b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # keep only the oldest active job of each type without location, the index
+    # treated their NULL location_id as distinct
+    op.execute(
+        "UPDATE job SET status = 'cancelled', finished_at = now() at time zone 'utc' "
+        "WHERE status = 'queued' AND location_id IS NULL AND EXISTS ("
+        "SELECT 1 FROM job AS other WHERE other.type = job.type "
+        "AND other.location_id IS NULL AND other.id <> job.id "
+        "AND other.status IN ('queued', 'running') "
+        "AND (other.status = 'running' OR other.created_at < job.created_at))"
+    )
+    op.drop_index('ix_job_active_type_location_id', table_name='job', postgresql_where=sa.text("status IN ('queued', 'running')"))
+    op.create_index('ix_job_active_type_location_id', 'job', ['type', 'location_id'], unique=True, postgresql_where=sa.text("status IN ('queued', 'running')"), postgresql_nulls_not_distinct=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_job_active_type_location_id', table_name='job', postgresql_where=sa.text("status IN ('queued', 'running')"), postgresql_nulls_not_distinct=True)
+    op.create_index('ix_job_active_type_location_id', 'job', ['type', 'location_id'], unique=True, postgresql_where=sa.text("status IN ('queued', 'running')"))
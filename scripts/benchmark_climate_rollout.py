@@ -0,0 +1,155 @@
+import argparse
+import logging
+import time
+from typing import cast
+
+import numpy as np
+import pandas as pd
+from keras.src.layers import Dense, Dropout, InputLayer, LSTM
+from keras.src.models import Sequential
+from sklearn.preprocessing import StandardScaler
+
+from zappai import logging_conf
+from zappai.zappai.repositories.climate_generative_model_repository import (
+    ClimateGenerativeModelRepository,
+    FEATURES,
+    FEATURES_WITH_SIN_COS,
+    MODEL_CMIP5_VARIABLES,
+    MODEL_CMIP5_VARIABLES_WITH_SIN_COS,
+    SEQ_LENGTH,
+    TARGET,
+    add_sin_cos_year,
+)
+
+
+def reference_generate_data_from_seed(
+    model: Sequential,
+    x_scaler: StandardScaler,
+    y_scaler: StandardScaler,
+    seed_data_df: pd.DataFrame,
+    future_climate_data_df: pd.DataFrame,
+) -> pd.DataFrame:
+    """The rollout loop of generate_data_from_seed before the ring buffer, kept to check
+    that the new one gives the same output."""
+    seed_data_df = add_sin_cos_year(seed_data_df)
+    seed_data_df = seed_data_df[FEATURES_WITH_SIN_COS]
+    future_climate_data_df = add_sin_cos_year(future_climate_data_df)
+    future_climate_data_df = future_climate_data_df[MODEL_CMIP5_VARIABLES_WITH_SIN_COS]
+    generated_data = []
+    current_step = seed_data_df.to_numpy()
+    year_col: list[int] = []
+    month_col: list[int] = []
+    for index, row in future_climate_data_df.iterrows():
+        year, month = cast(pd.MultiIndex, index)
+        year_col.append(year)
+        month_col.append(month)
+        scaled_current_step = cast(np.ndarray, x_scaler.transform(current_step))
+        scaled_prediction = cast(np.ndarray, model(np.array([scaled_current_step])))[0]
+        prediction = cast(
+            np.ndarray, y_scaler.inverse_transform(np.array([scaled_prediction]))
+        )[0]
+        enriched_prediction = np.concatenate([prediction, row.to_numpy()], axis=0)
+        generated_data.append(enriched_prediction)
+        current_step = np.concatenate(
+            [current_step[1:], np.array([enriched_prediction])]
+        )
+    result = pd.DataFrame(data=generated_data, columns=FEATURES_WITH_SIN_COS)
+    result["year"] = year_col
+    result["month"] = month_col
+    return result.set_index(keys=["year", "month"], drop=True)
+
+
+def create_inputs(
+    months: int, rng: np.random.Generator
+) -> tuple[Sequential, StandardScaler, StandardScaler, pd.DataFrame, pd.DataFrame]:
+    """Untrained model with the architecture of the real one, scalers fitted on random
+    data, seed and future data starting from 2000-01."""
+    model = Sequential(
+        layers=[
+            InputLayer(shape=(SEQ_LENGTH, len(FEATURES_WITH_SIN_COS))),
+            LSTM(units=50, return_sequences=True),
+            Dropout(rate=0.2),
+            LSTM(units=50, return_sequences=True),
+            Dropout(rate=0.2),
+            LSTM(units=50),
+            Dropout(rate=0.2),
+            Dense(units=len(TARGET)),
+        ]
+    )
+    x_scaler = StandardScaler().fit(
+        rng.normal(loc=5, scale=3, size=(100, len(FEATURES_WITH_SIN_COS)))
+    )
+    y_scaler = StandardScaler().fit(
+        rng.normal(loc=5, scale=3, size=(100, len(TARGET)))
+    )
+
+    def index(start: int, n: int) -> pd.MultiIndex:
+        """n months starting from start months after 2000-01."""
+        return pd.MultiIndex.from_tuples(
+            [(2000 + i // 12, i % 12 + 1) for i in range(start, start + n)],
+            names=["year", "month"],
+        )
+
+    seed_data_df = pd.DataFrame(
+        data=rng.normal(size=(SEQ_LENGTH, len(FEATURES))),
+        columns=FEATURES,
+        index=index(0, SEQ_LENGTH),
+    )
+    future_climate_data_df = pd.DataFrame(
+        data=rng.normal(size=(months, len(MODEL_CMIP5_VARIABLES))),
+        columns=MODEL_CMIP5_VARIABLES,
+        index=index(SEQ_LENGTH, months),
+    )
+    return model, x_scaler, y_scaler, seed_data_df, future_climate_data_df
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare the climate data rollout with the previous implementation"
+    )
+    parser.add_argument("--months", type=int, default=24)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    model, x_scaler, y_scaler, seed_data_df, future_climate_data_df = create_inputs(
+        months=args.months, rng=np.random.default_rng(42)
+    )
+
+    def run_reference() -> pd.DataFrame:
+        return reference_generate_data_from_seed(
+            model, x_scaler, y_scaler, seed_data_df, future_climate_data_df
+        )
+
+    def run_current() -> pd.DataFrame:
+        return ClimateGenerativeModelRepository.generate_data_from_seed(
+            model=model,
+            x_scaler=x_scaler,
+            y_scaler=y_scaler,
+            seed_data_df=seed_data_df,
+            future_climate_data_df=future_climate_data_df,
+        )
+
+    reference = run_reference()
+    current = run_current()
+    if not (
+        reference.index.equals(current.index)
+        and np.array_equal(reference.to_numpy(), current.to_numpy())
+    ):
+        raise AssertionError("The rollout output differs from the reference")
+    logging.info("Output is identical to the reference")
+
+    timings: dict[str, float] = {}
+    for name, run in [("reference", run_reference), ("current", run_current)]:
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - start)
+        timings[name] = best
+        logging.info(f"{name}: {best * 1000:.1f} ms for {args.months} months")
+    logging.info(f"Speedup: {timings['reference'] / timings['current']:.2f}x")
+
+
+if __name__ == "__main__":
+    logging_conf.create_logger(config=logging_conf.get_default_conf())
+    main()
@@ -0,0 +1,51 @@
+import argparse
+import asyncio
+
+from zappai import logging_conf
+from zappai.config import settings
+from zappai.jobs.worker import run_worker
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run the queued jobs, e.g. climate generative model training"
+    )
+    parser.add_argument("--concurrency", type=int, default=settings.worker_concurrency)
+    parser.add_argument(
+        "--threads-per-job", type=int, default=settings.worker_threads_per_job
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=settings.worker_poll_interval_seconds,
+        help="seconds between two checks of the queue when it's empty or full",
+    )
+    parser.add_argument(
+        "--lease",
+        type=float,
+        default=settings.worker_lease_seconds,
+        help="seconds after which a running job that isn't renewed is run again",
+    )
+    parser.add_argument(
+        "--retry-backoff",
+        type=float,
+        default=settings.worker_retry_backoff_seconds,
+        help="seconds before the first retry of a failed job, doubled at each attempt",
+    )
+    args = parser.parse_args()
+
+    asyncio.run(
+        run_worker(
+            concurrency=args.concurrency,
+            threads_per_job=args.threads_per_job,
+            poll_interval_seconds=args.poll_interval,
+            lease_seconds=args.lease,
+            retry_backoff_seconds=args.retry_backoff,
+            max_running_jobs_per_type=settings.worker_max_running_jobs_per_type,
+        )
+    )
+
+
+if __name__ == "__main__":
+    logging_conf.create_logger(config=logging_conf.get_default_conf())
+    main()
@@ -0,0 +1,31 @@
+import asyncio
+import logging
+
+from zappai import logging_conf
+from zappai.config import settings
+from zappai.database.di import get_session_maker
+from zappai.jobs.di import get_job_repository
+
+
+async def main():
+    """Queues the training of the global climate generative model, run by the worker.
+
+    The locations use it once climate_generative_model_kind is "global", retrain their
+    model to fine tune the new global one.
+    """
+    session_maker = get_session_maker()
+    job_repository = get_job_repository()
+
+    async with session_maker() as session:
+        job = await job_repository.enqueue_job(
+            session=session,
+            type="train_global_climate_generative_model",
+            max_attempts=settings.worker_job_max_attempts,
+        )
+        await session.commit()
+    logging.info(f"Queued job {job.id}")
+
+
+if __name__ == "__main__":
+    logging_conf.create_logger(config=logging_conf.get_default_conf())
+    asyncio.run(main())
@@ -0,0 +1,9 @@
+import os
+
+# the settings are read when zappai is imported, the tests don't connect to them
+os.environ.setdefault("ZAPPAI_DB_HOST", "localhost")
+os.environ.setdefault("ZAPPAI_DB_PORT", "5432")
+os.environ.setdefault("ZAPPAI_DB_NAME", "zappai")
+os.environ.setdefault("ZAPPAI_DB_USER", "zappai")
+os.environ.setdefault("ZAPPAI_DB_PASSWORD", "zappai")
+os.environ.setdefault("ZAPPAI_CDS_API_KEY", "00000000-0000-0000-0000-000000000000")
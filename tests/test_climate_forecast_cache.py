@@ -0,0 +1,166 @@
+import asyncio
+from types import SimpleNamespace
+import uuid
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.dialects.postgresql import Insert
+
+from zappai.zappai.models import ClimateForecast, ClimateGenerativeModel
+from zappai.zappai.repositories.climate_generative_model_repository import (
+    FEATURES_WITH_SIN_COS,
+    SEQ_LENGTH,
+    ClimateGenerativeModelRepository,
+)
+
+MONTHS = 24
+SEED_YEAR, SEED_MONTH = 2023, 12
+
+
+def _get_months_index(start: int, stop: int) -> pd.MultiIndex:
+    """Year and month of the months from start to stop, excluded, after the seed."""
+    months = [SEED_YEAR * 12 + SEED_MONTH - 1 + i for i in range(start, stop)]
+    return pd.MultiIndex.from_tuples(
+        [(month // 12, month % 12 + 1) for month in months], names=["year", "month"]
+    )
+
+
+class FakeDatabase:
+    """The climate_generative_model and climate_forecast rows the repository reads and writes."""
+
+    def __init__(self, model_id: uuid.UUID):
+        self.model_id = model_id
+        # (location_id, model id, seed year, seed month, months) -> (id, forecast)
+        self.forecasts: dict[tuple, tuple[uuid.UUID, bytes]] = {}
+        self.commits = 0
+
+
+class FakeSession:
+    def __init__(self, database: FakeDatabase):
+        self.database = database
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    async def commit(self):
+        self.database.commits += 1
+
+    async def rollback(self):
+        pass
+
+    async def scalar(self, stmt):
+        params = stmt.compile().params
+        if isinstance(stmt, Insert):
+            key = (
+                params["location_id"],
+                params["climate_generative_model_id"],
+                params["seed_year"],
+                params["seed_month"],
+                params["months"],
+            )
+            if key in self.database.forecasts:
+                return None
+            self.database.forecasts[key] = (params["id"], params["forecast"])
+            return params["id"]
+        column = stmt.selected_columns[0]
+        if column is ClimateGenerativeModel.id.expression:
+            return self.database.model_id
+        if column is ClimateForecast.id.expression:
+            stored = self.database.forecasts.get(
+                (
+                    params["location_id_1"],
+                    params["climate_generative_model_id_1"],
+                    params["seed_year_1"],
+                    params["seed_month_1"],
+                    params["months_1"],
+                )
+            )
+            return None if stored is None else stored[0]
+        if column is ClimateForecast.forecast.expression:
+            for forecast_id, forecast in self.database.forecasts.values():
+                if forecast_id == params["id_1"]:
+                    return forecast
+            return None
+        raise AssertionError(f"Unexpected statement {stmt}")
+
+
+def test_second_forecast_is_read_from_the_store(monkeypatch):
+    location_id = uuid.uuid4()
+    model_id = uuid.uuid4()
+    database = FakeDatabase(model_id=model_id)
+
+    class PastClimateDataRepository:
+        async def get_past_climate_data_of_previous_n_months(self, session, location_id, n):
+            return [SimpleNamespace(year=SEED_YEAR, month=SEED_MONTH)]
+
+    repository = ClimateGenerativeModelRepository(
+        location_repository=None,  # type: ignore
+        past_climate_data_repository=PastClimateDataRepository(),  # type: ignore
+        future_climate_data_repository=None,  # type: ignore
+        session_maker=lambda: FakeSession(database),  # type: ignore
+    )
+
+    seed_index = _get_months_index(-SEQ_LENGTH + 1, 1)
+    # the future climate data goes from the month after the seed to MONTHS months
+    # later, both included, like __get_forecast_inputs reads it
+    future_index = _get_months_index(1, MONTHS + 2)
+
+    async def get_forecast_inputs(session, location_id, months):
+        return (
+            SimpleNamespace(
+                id=model_id,
+                location_id=location_id,
+                model=None,
+                x_scaler=None,
+                y_scaler=None,
+                compiled_model=None,
+                location_features=None,
+            ),
+            pd.DataFrame(index=seed_index),
+            pd.DataFrame(index=future_index),
+        )
+
+    generated = []
+
+    def generate_data_from_seed(future_climate_data_df, **kwargs):
+        generated.append(len(future_climate_data_df))
+        return pd.DataFrame(
+            np.random.rand(len(future_climate_data_df), len(FEATURES_WITH_SIN_COS)),
+            columns=FEATURES_WITH_SIN_COS,
+            index=future_climate_data_df.index,
+        )
+
+    monkeypatch.setattr(
+        repository,
+        "_ClimateGenerativeModelRepository__get_forecast_inputs",
+        get_forecast_inputs,
+    )
+    monkeypatch.setattr(repository, "generate_data_from_seed", generate_data_from_seed)
+
+    async def get_forecasts():
+        session = FakeSession(database)
+        first = await repository.get_forecast(
+            session=session, location_id=location_id, months=MONTHS
+        )
+        commits = database.commits
+        # another process, with a forecast cache of its own, reads the stored forecast
+        repository.forecast_cache.clear()
+        second = await repository.get_forecast(
+            session=session, location_id=location_id, months=MONTHS
+        )
+        return first, second, commits
+
+    first, second, commits = asyncio.run(get_forecasts())
+
+    assert generated == [MONTHS + 1]
+    assert first.id is not None
+    assert second.id == first.id
+    assert list(database.forecasts) == [
+        (location_id, model_id, SEED_YEAR, SEED_MONTH, MONTHS)
+    ]
+    assert list(second.forecast) == list(first.forecast)
+    # only the session of the store commits
+    assert commits == 1 and database.commits == 1
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("tensorflow")
+
+from scripts.benchmark_climate_rollout import (
+    create_inputs,
+    reference_generate_data_from_seed,
+)
+from zappai.zappai.repositories.climate_generative_model_repository import (
+    ClimateGenerativeModelRepository,
+)
+
+
+@pytest.mark.parametrize("months", [1, 12, 30])
+def test_eager_rollout_matches_reference_loop(months: int):
+    model, x_scaler, y_scaler, seed_data_df, future_climate_data_df = create_inputs(
+        months=months, rng=np.random.default_rng(months)
+    )
+
+    expected = reference_generate_data_from_seed(
+        model, x_scaler, y_scaler, seed_data_df, future_climate_data_df
+    )
+    generated_data = ClimateGenerativeModelRepository.generate_data_from_seed(
+        model=model,
+        x_scaler=x_scaler,
+        y_scaler=y_scaler,
+        seed_data_df=seed_data_df,
+        future_climate_data_df=future_climate_data_df,
+    )
+
+    assert generated_data.index.equals(expected.index)
+    assert list(generated_data.columns) == list(expected.columns)
+    assert np.array_equal(generated_data.to_numpy(), expected.to_numpy())
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+from zappai.zappai.services.crop_optimizer_service import (
+    get_genetic_algorithm_candidates,
+)
+
+
+def _individual(sowing: int, harvest: int) -> np.ndarray:
+    """5 bits per index, the first bit is the least significant."""
+    return np.array([(sowing >> i) & 1 for i in range(5)] + [(harvest >> i) & 1 for i in range(5)])
+
+
+def test_candidates_are_distinct_and_valid():
+    forecast_df = pd.DataFrame(
+        index=pd.MultiIndex.from_tuples(
+            [(2030 + i // 12, i % 12 + 1) for i in range(24)], names=["year", "month"]
+        )
+    )
+    individuals = [
+        # an early generation, sowing past the end of the forecast
+        _individual(30, 31),
+        # harvest before sowing
+        _individual(10, 4),
+        # valid but unscored
+        _individual(1, 2),
+        # the elite, carried over every later generation
+        _individual(3, 9),
+        _individual(3, 9),
+        _individual(3, 9),
+    ]
+    fitnesses = [0.0, 0.0, 0.0, 5.0, 5.0, 5.0]
+
+    assert get_genetic_algorithm_candidates(
+        forecast_df=forecast_df, individuals=individuals, fitnesses=fitnesses
+    ) == [(3, 9, 5.0)]
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("tensorflow")
+
+from zappai.zappai.repositories.climate_generative_model_repository import (
+    FEATURES_WITH_SIN_COS,
+    SEQ_LENGTH,
+    build_model,
+)
+from zappai.zappai.utils.numpy_lstm import NumpyLSTMModel
+
+
+def _build_random_model(seed: int):
+    """The 3 LSTM + Dense climate generative model, with random biases too, that a new
+    model initializes to zero."""
+    model = build_model(input_features=len(FEATURES_WITH_SIN_COS), learning_rate=1e-3)
+    rng = np.random.default_rng(seed)
+    model.set_weights(
+        [
+            rng.normal(scale=0.3, size=weights.shape).astype(np.float32)
+            for weights in model.get_weights()
+        ]
+    )
+    return model
+
+
+def _random_windows(seed: int, batch: int) -> np.ndarray:
+    return (
+        np.random.default_rng(seed)
+        .normal(size=(batch, SEQ_LENGTH, len(FEATURES_WITH_SIN_COS)))
+        .astype(np.float32)
+    )
+
+
+@pytest.mark.parametrize("batch", [1, 7, 64])
+def test_numpy_model_matches_keras(batch: int):
+    model = _build_random_model(seed=batch)
+    numpy_model = NumpyLSTMModel.from_keras(model)
+    x = _random_windows(seed=batch, batch=batch)
+
+    expected = model.predict(x, verbose=0)
+
+    assert np.allclose(numpy_model(x), expected, atol=1e-5)
+    assert np.allclose(
+        NumpyLSTMModel.from_bytes(numpy_model.to_bytes())(x), expected, atol=1e-5
+    )
+
+
+def test_stacked_numpy_model_matches_each_keras_model():
+    models = [_build_random_model(seed=seed) for seed in range(3)]
+    stacked_model = NumpyLSTMModel.stack(
+        [NumpyLSTMModel.from_keras(model) for model in models]
+    )
+    # one window per location, location i is forecast by model i
+    x = _random_windows(seed=3, batch=len(models))
+
+    expected = np.concatenate(
+        [model.predict(x[i : i + 1], verbose=0) for i, model in enumerate(models)]
+    )
+
+    assert np.allclose(stacked_model(x), expected, atol=1e-5)
@@ -15,6 +15,66 @@ class Settings(BaseSettings):
     db_password: str
     cds_api_key: UUID
 
+    # deserialized climate generative models kept in memory by each process
+    climate_generative_model_cache_max_entries: int | None = 32
+    climate_generative_model_cache_max_bytes: int | None = None
+    # deserialized crop yield models kept in memory by each process
+    crop_yield_model_cache_max_entries: int | None = 32
+    # forecasts kept in memory by each process in front of the climate_forecast table
+    climate_forecast_cache_max_entries: int | None = 256
+    # best sowing and harvest months by location, forecast and crop yield model
+    crop_optimizer_result_cache_max_entries: int | None = 1024
+    # nearest grid point of the future climate data by coordinates
+    future_climate_grid_point_cache_max_entries: int | None = 4096
+    # backend each trained climate generative model is exported to and run with,
+    # "numpy" serves forecasts without importing TensorFlow, "tflite" uses a TFLite
+    # flatbuffer, both fall back to the eager Keras model when the export isn't available
+    climate_generative_model_inference_backend: Literal["eager", "tflite", "numpy"] = (
+        "eager"
+    )
+    # "global" forecasts every location with one model trained on all of them,
+    # fine tuned on each location for climate_generative_model_fine_tune_epochs epochs
+    climate_generative_model_kind: Literal["location", "global"] = "location"
+    climate_generative_model_fine_tune_epochs: int = 5
+    climate_generative_model_fine_tune_learning_rate: float = 1e-4
+    # training budget, see TrainingConfig. The training stops after
+    # climate_generative_model_early_stopping_patience epochs without a better
+    # validation loss, 0 runs every epoch
+    climate_generative_model_epochs: int = 50
+    climate_generative_model_batch_size: int = 32
+    climate_generative_model_early_stopping_patience: int = 5
+    climate_generative_model_learning_rate: float = 1e-3
+    # TensorFlow threads of a training, None for the ones of the worker, see
+    # worker_threads_per_job
+    climate_generative_model_training_threads: int | None = None
+    # new months of past climate data refresh the model of the location, training it
+    # climate_generative_model_refresh_epochs on the last
+    # climate_generative_model_refresh_window_months, 0 epochs retrains from scratch.
+    # It's retrained from scratch anyway every climate_generative_model_full_retrain_days
+    # or when its error on the new months grows by climate_generative_model_degradation_threshold
+    climate_generative_model_refresh_epochs: int = 5
+    climate_generative_model_refresh_window_months: int = 120
+    climate_generative_model_scaler_drift_threshold: float = 0.25
+    climate_generative_model_full_retrain_days: int = 365
+    climate_generative_model_degradation_threshold: float = 0.25
+
+    # jobs run at the same time by each worker, see scripts/run_worker.py
+    worker_concurrency: int = 1
+    # threads TensorFlow and BLAS can use in each job
+    worker_threads_per_job: int = 2
+    worker_poll_interval_seconds: float = 5.0
+    # a running job is renewed every third of this, a job not renewed for this long is
+    # considered abandoned and is run again by another worker
+    worker_lease_seconds: float = 60.0
+    worker_job_max_attempts: int = 3
+    # a failed job is retried after this, doubled at each attempt
+    worker_retry_backoff_seconds: float = 60.0
+    # running jobs of each type across all the workers, types not listed have no limit
+    worker_max_running_jobs_per_type: dict[str, int] = {
+        "download_past_climate_data": 2,
+        "train_climate_generative_model": 4,
+    }
+
     model_config = SettingsConfigDict(env_prefix="ZAPPAI_")
 
 
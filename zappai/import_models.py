@@ -2,3 +2,4 @@ from zappai.zappai import models
 from zappai.auth_tokens import models
 from zappai.users import models
 from zappai.auth_tokens import models
+from zappai.jobs import models
@@ -0,0 +1,5 @@
+from zappai.jobs.repositories import JobRepository
+
+
+def get_job_repository() -> JobRepository:
+    return JobRepository()
@@ -0,0 +1,50 @@
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import ForeignKey, Index, text
+from sqlalchemy.orm import Mapped, mapped_column
+from zappai.database import Base
+
+
+class Job(Base):
+    """Background work done by the worker processes, see zappai.jobs.worker."""
+
+    __tablename__ = "job"
+
+    id: Mapped[UUID] = mapped_column(primary_key=True)
+    type: Mapped[str]
+    # queued, running, succeeded, failed, cancelled
+    status: Mapped[str]
+    location_id: Mapped[UUID | None] = mapped_column(
+        ForeignKey(column="location.id", ondelete="CASCADE")
+    )
+    # from 0 to 1
+    progress: Mapped[float] = mapped_column(server_default="0")
+    message: Mapped[str | None]
+    error: Mapped[str | None]
+    is_cancel_requested: Mapped[bool] = mapped_column(server_default="false")
+    worker_id: Mapped[str | None]
+    # runs done so far, including the current one
+    attempts: Mapped[int] = mapped_column(server_default="0")
+    max_attempts: Mapped[int] = mapped_column(server_default="3")
+    # a queued job isn't claimed before this, used to back off retries
+    run_after: Mapped[datetime]
+    # a running job whose lease expired is considered abandoned by its worker
+    lease_expires_at: Mapped[datetime | None]
+    created_at: Mapped[datetime]
+    started_at: Mapped[datetime | None]
+    finished_at: Mapped[datetime | None]
+
+    __table_args__ = (
+        Index("ix_job_status_created_at", "status", "created_at"),
+        # at most one queued or running job of each type per location, and one
+        # without location, e.g. the training of the global model
+        Index(
+            "ix_job_active_type_location_id",
+            "type",
+            "location_id",
+            unique=True,
+            postgresql_where=text("status IN ('queued', 'running')"),
+            postgresql_nulls_not_distinct=True,
+        ),
+    )
@@ -0,0 +1 @@
+from .job_repository import JobRepository
@@ -0,0 +1,31 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Literal
+from uuid import UUID
+
+JobType = Literal[
+    "download_past_climate_data",
+    "train_climate_generative_model",
+    "train_global_climate_generative_model",
+]
+JobStatus = Literal["queued", "running", "succeeded", "failed", "cancelled"]
+
+
+@dataclass
+class JobDTO:
+    id: UUID
+    type: JobType
+    status: JobStatus
+    location_id: UUID | None
+    progress: float
+    message: str | None
+    error: str | None
+    is_cancel_requested: bool
+    worker_id: str | None
+    attempts: int
+    max_attempts: int
+    run_after: datetime
+    lease_expires_at: datetime | None
+    created_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
@@ -0,0 +1,10 @@
+class JobNotFoundError(Exception):
+    pass
+
+
+class JobCancelledError(Exception):
+    pass
+
+
+class JobLeaseLostError(Exception):
+    """The lease of the job expired and it may have been claimed by another worker."""
@@ -0,0 +1,353 @@
+from datetime import datetime, timedelta, timezone
+import uuid
+from uuid import UUID
+
+from sqlalchemy import and_, func, select, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from zappai.jobs.models import Job
+from zappai.jobs.repositories.dtos import JobDTO, JobStatus, JobType
+from zappai.jobs.repositories.exceptions import JobLeaseLostError, JobNotFoundError
+
+ACTIVE_STATUSES = ("queued", "running")
+# serializes the claims, so that the running jobs counted for the limits per type
+# can't change before the claimed job is marked as running
+CLAIM_LOCK_ID = 7_390_001
+
+
+def _now() -> datetime:
+    return datetime.now(tz=timezone.utc).replace(tzinfo=None)
+
+
+def _job_to_dto(job: Job) -> JobDTO:
+    return JobDTO(
+        id=job.id,
+        type=job.type,  # type: ignore
+        status=job.status,  # type: ignore
+        location_id=job.location_id,
+        progress=job.progress,
+        message=job.message,
+        error=job.error,
+        is_cancel_requested=job.is_cancel_requested,
+        worker_id=job.worker_id,
+        attempts=job.attempts,
+        max_attempts=job.max_attempts,
+        run_after=job.run_after,
+        lease_expires_at=job.lease_expires_at,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+    )
+
+
+class JobRepository:
+    """Job queue stored in Postgres. Workers claim jobs with FOR UPDATE SKIP LOCKED,
+    so many of them can poll the same table without taking the same job.
+
+    A running job holds a lease that its worker renews, when a worker dies the lease
+    expires and the job is queued again, until it runs out of attempts.
+    """
+
+    async def enqueue_job(
+        self,
+        session: AsyncSession,
+        type: JobType,
+        location_id: UUID | None = None,
+        max_attempts: int = 3,
+    ) -> JobDTO:
+        """Queues a job, unless a job of the same type for the same location is already
+        queued or running, in which case that one is returned."""
+        now = _now()
+        stmt = (
+            insert(Job)
+            .values(
+                id=uuid.uuid4(),
+                type=type,
+                status="queued",
+                location_id=location_id,
+                progress=0.0,
+                message=None,
+                error=None,
+                is_cancel_requested=False,
+                worker_id=None,
+                attempts=0,
+                max_attempts=max_attempts,
+                run_after=now,
+                lease_expires_at=None,
+                created_at=now,
+                started_at=None,
+                finished_at=None,
+            )
+            .on_conflict_do_nothing(
+                index_elements=[Job.type, Job.location_id],
+                # a literal predicate, so that Postgres can match the partial index
+                index_where=text("status IN ('queued', 'running')"),
+            )
+            .returning(Job)
+        )
+        job = (await session.scalars(stmt)).one_or_none()
+        if job is None:
+            job = (
+                await session.scalars(
+                    select(Job).where(
+                        Job.type == type,
+                        Job.location_id == location_id,
+                        Job.status.in_(ACTIVE_STATUSES),
+                    )
+                )
+            ).one()
+        return _job_to_dto(job)
+
+    async def get_job_by_id(self, session: AsyncSession, job_id: UUID) -> JobDTO | None:
+        job = await session.get(Job, job_id)
+        if job is None:
+            return None
+        return _job_to_dto(job)
+
+    async def get_jobs(
+        self,
+        session: AsyncSession,
+        location_id: UUID | None = None,
+        status: JobStatus | None = None,
+    ) -> list[JobDTO]:
+        """Jobs, newest first."""
+        stmt = select(Job).order_by(Job.created_at.desc())
+        if location_id is not None:
+            stmt = stmt.where(Job.location_id == location_id)
+        if status is not None:
+            stmt = stmt.where(Job.status == status)
+        return [_job_to_dto(job) for job in await session.scalars(stmt)]
+
+    async def get_active_location_ids(
+        self, session: AsyncSession, type: JobType
+    ) -> list[UUID]:
+        """Locations with a queued or running job of the type."""
+        stmt = select(Job.location_id).where(
+            Job.type == type,
+            Job.status.in_(ACTIVE_STATUSES),
+            Job.location_id.is_not(None),
+        )
+        return list(await session.scalars(stmt))  # type: ignore
+
+    async def claim_next_job(
+        self,
+        session: AsyncSession,
+        worker_id: str,
+        lease_seconds: float,
+        max_running_jobs_per_type: dict[str, int] | None = None,
+    ) -> JobDTO | None:
+        """Marks the oldest queued job that is due as running by worker_id, with a lease
+        of lease_seconds, and returns it. Running jobs with an expired lease are
+        queued again first, or failed if they ran out of attempts.
+
+        Args:
+            max_running_jobs_per_type (dict[str, int] | None): jobs of a type that has
+                this many running jobs aren't claimed
+
+        Returns:
+            JobDTO | None: None if there are no queued jobs that can be claimed
+        """
+        now = _now()
+        await session.execute(select(func.pg_advisory_xact_lock(CLAIM_LOCK_ID)))
+        await self.__recover_expired_jobs(session=session, now=now)
+
+        full_types = []
+        if max_running_jobs_per_type:
+            running_per_type = await session.execute(
+                select(Job.type, func.count())
+                .where(Job.status == "running")
+                .group_by(Job.type)
+            )
+            full_types = [
+                type
+                for type, running in running_per_type.tuples()
+                if running >= max_running_jobs_per_type.get(type, running + 1)
+            ]
+
+        next_job_id = (
+            select(Job.id)
+            .where(
+                Job.status == "queued",
+                Job.run_after <= now,
+                Job.type.not_in(full_types),
+            )
+            .order_by(Job.created_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        stmt = (
+            update(Job)
+            .where(Job.id == next_job_id)
+            .values(
+                status="running",
+                worker_id=worker_id,
+                attempts=Job.attempts + 1,
+                lease_expires_at=now + timedelta(seconds=lease_seconds),
+                started_at=now,
+            )
+            .returning(Job)
+        )
+        job = (await session.scalars(stmt)).one_or_none()
+        if job is None:
+            return None
+        return _job_to_dto(job)
+
+    async def __recover_expired_jobs(self, session: AsyncSession, now: datetime):
+        is_expired = and_(Job.status == "running", Job.lease_expires_at < now)
+        await session.execute(
+            update(Job)
+            .where(is_expired, Job.attempts >= Job.max_attempts)
+            .values(
+                status="failed",
+                error="The worker stopped renewing the lease of the job",
+                lease_expires_at=None,
+                finished_at=now,
+            )
+        )
+        await session.execute(
+            update(Job)
+            .where(is_expired)
+            .values(status="queued", worker_id=None, lease_expires_at=None, run_after=now)
+        )
+
+    async def renew_job_lease(
+        self, session: AsyncSession, job: JobDTO, lease_seconds: float
+    ) -> bool:
+        """Extends the lease of a running job held by its worker.
+
+        Returns:
+            bool: True if the job has to be cancelled
+
+        Raises:
+            JobLeaseLostError: if the job isn't running by its worker anymore
+        """
+        return await self.set_job_progress(
+            session=session, job=job, lease_seconds=lease_seconds
+        )
+
+    async def set_job_progress(
+        self,
+        session: AsyncSession,
+        job: JobDTO,
+        lease_seconds: float,
+        progress: float | None = None,
+        message: str | None = None,
+    ) -> bool:
+        """Sets the progress of a running job held by its worker and extends its lease.
+
+        Returns:
+            bool: True if the job has to be cancelled
+
+        Raises:
+            JobLeaseLostError: if the job isn't running by its worker anymore
+        """
+        values: dict = {
+            "lease_expires_at": _now() + timedelta(seconds=lease_seconds)
+        }
+        if progress is not None:
+            values["progress"] = progress
+            values["message"] = message
+        stmt = (
+            update(Job)
+            .where(
+                Job.id == job.id,
+                Job.status == "running",
+                Job.worker_id == job.worker_id,
+            )
+            .values(**values)
+            .returning(Job.is_cancel_requested)
+        )
+        is_cancel_requested = await session.scalar(stmt)
+        if is_cancel_requested is None:
+            raise JobLeaseLostError(str(job.id))
+        return is_cancel_requested
+
+    async def finish_job(
+        self,
+        session: AsyncSession,
+        job: JobDTO,
+        status: JobStatus,
+        error: str | None = None,
+    ):
+        """Finishes a running job held by its worker, does nothing if the lease was lost."""
+        values: dict = {
+            "status": status,
+            "error": error,
+            "lease_expires_at": None,
+            "finished_at": _now(),
+        }
+        if status == "succeeded":
+            values["progress"] = 1.0
+        await session.execute(
+            update(Job)
+            .where(
+                Job.id == job.id,
+                Job.status == "running",
+                Job.worker_id == job.worker_id,
+            )
+            .values(**values)
+        )
+
+    async def retry_or_fail_job(
+        self,
+        session: AsyncSession,
+        job: JobDTO,
+        error: str,
+        backoff_seconds: float,
+    ) -> JobStatus | None:
+        """Queues a failed run of a job again after backoff_seconds, doubled at each
+        attempt, or fails the job if it ran out of attempts.
+
+        Returns:
+            JobStatus | None: the new status, None if the job wasn't held by its worker
+        """
+        row = (
+            await session.execute(
+                select(Job.attempts, Job.max_attempts).where(
+                    Job.id == job.id,
+                    Job.status == "running",
+                    Job.worker_id == job.worker_id,
+                )
+            )
+        ).one_or_none()
+        if row is None:
+            return None
+        attempts, max_attempts = row
+        if attempts >= max_attempts:
+            await self.finish_job(session=session, job=job, status="failed", error=error)
+            return "failed"
+        run_after = _now() + timedelta(seconds=backoff_seconds * 2 ** (attempts - 1))
+        await session.execute(
+            update(Job)
+            .where(Job.id == job.id)
+            .values(
+                status="queued",
+                error=error,
+                worker_id=None,
+                lease_expires_at=None,
+                run_after=run_after,
+            )
+        )
+        return "queued"
+
+    async def request_job_cancellation(
+        self, session: AsyncSession, job_id: UUID
+    ) -> JobDTO:
+        """Cancels a queued job at once, a running one is cancelled by its worker
+        at the next progress report or lease renewal.
+
+        Raises:
+            JobNotFoundError:
+        """
+        job = await session.get(Job, job_id, with_for_update=True)
+        if job is None:
+            raise JobNotFoundError(str(job_id))
+        if job.status == "queued":
+            job.status = "cancelled"
+            job.finished_at = _now()
+        elif job.status == "running":
+            job.is_cancel_requested = True
+        await session.flush()
+        return _job_to_dto(job)
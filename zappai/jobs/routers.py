@@ -0,0 +1,63 @@
+from typing import Annotated
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from zappai.auth_tokens.di import get_current_user_with_error
+from zappai.database.di import get_session_maker
+from zappai.jobs.di import get_job_repository
+from zappai.jobs.repositories import JobRepository
+from zappai.jobs.repositories.dtos import JobStatus
+from zappai.jobs.repositories.exceptions import JobNotFoundError
+from zappai.jobs.schemas import JobDetailsResponse
+from zappai.users.models import User
+
+job_router = APIRouter(prefix="/jobs")
+
+
+@job_router.get("", response_model=list[JobDetailsResponse])
+async def get_jobs(
+    user: Annotated[User, Depends(get_current_user_with_error)],
+    session_maker: Annotated[async_sessionmaker[AsyncSession], Depends(get_session_maker)],
+    job_repository: Annotated[JobRepository, Depends(get_job_repository)],
+    location_id: UUID | None = None,
+    status: JobStatus | None = None,
+):
+    async with session_maker() as session:
+        jobs = await job_repository.get_jobs(
+            session=session, location_id=location_id, status=status
+        )
+    return [JobDetailsResponse.from_dto(job) for job in jobs]
+
+
+@job_router.get("/{job_id}", response_model=JobDetailsResponse)
+async def get_job(
+    user: Annotated[User, Depends(get_current_user_with_error)],
+    session_maker: Annotated[async_sessionmaker[AsyncSession], Depends(get_session_maker)],
+    job_repository: Annotated[JobRepository, Depends(get_job_repository)],
+    job_id: UUID,
+):
+    async with session_maker() as session:
+        job = await job_repository.get_job_by_id(session=session, job_id=job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="job_not_found")
+    return JobDetailsResponse.from_dto(job)
+
+
+@job_router.post("/{job_id}/cancel", response_model=JobDetailsResponse)
+async def cancel_job(
+    user: Annotated[User, Depends(get_current_user_with_error)],
+    session_maker: Annotated[async_sessionmaker[AsyncSession], Depends(get_session_maker)],
+    job_repository: Annotated[JobRepository, Depends(get_job_repository)],
+    job_id: UUID,
+):
+    try:
+        async with session_maker() as session:
+            job = await job_repository.request_job_cancellation(
+                session=session, job_id=job_id
+            )
+            await session.commit()
+    except JobNotFoundError:
+        raise HTTPException(status_code=404, detail="job_not_found")
+    return JobDetailsResponse.from_dto(job)
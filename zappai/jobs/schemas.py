@@ -0,0 +1,41 @@
+from datetime import datetime
+from uuid import UUID
+
+from zappai.jobs.repositories.dtos import JobDTO, JobStatus, JobType
+from zappai.schemas import CamelCaseBaseModel
+
+
+class JobDetailsResponse(CamelCaseBaseModel):
+    id: UUID
+    type: JobType
+    status: JobStatus
+    location_id: UUID | None
+    progress: float
+    message: str | None
+    error: str | None
+    is_cancel_requested: bool
+    attempts: int
+    max_attempts: int
+    run_after: datetime
+    created_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
+
+    @staticmethod
+    def from_dto(job: JobDTO) -> "JobDetailsResponse":
+        return JobDetailsResponse(
+            id=job.id,
+            type=job.type,
+            status=job.status,
+            location_id=job.location_id,
+            progress=job.progress,
+            message=job.message,
+            error=job.error,
+            is_cancel_requested=job.is_cancel_requested,
+            attempts=job.attempts,
+            max_attempts=job.max_attempts,
+            run_after=job.run_after,
+            created_at=job.created_at,
+            started_at=job.started_at,
+            finished_at=job.finished_at,
+        )
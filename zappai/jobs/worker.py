@@ -0,0 +1,375 @@
+"""Worker that runs the queued jobs in a pool of processes, outside of the API process.
+
+Start it with scripts/run_worker.py.
+"""
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import traceback
+from typing import Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from zappai import logging_conf
+from zappai.config import settings
+from zappai.database.di import engine, get_session_maker
+from zappai.jobs.di import get_job_repository
+from zappai.jobs.repositories import JobRepository
+from zappai.jobs.repositories.dtos import JobDTO
+from zappai.jobs.repositories.exceptions import JobCancelledError, JobLeaseLostError
+
+# reports the progress of the running job, raises JobCancelledError if it has to stop
+# and JobLeaseLostError if another worker may be running it
+ProgressCallback = Callable[[float, str | None], Awaitable[None]]
+# raises JobCancelledError if the running job has to stop and JobLeaseLostError if
+# another worker may be running it, without querying the database. It can be called
+# from any thread, e.g. from the callbacks of a training or a download running in one
+StopCheck = Callable[[], None]
+
+THREAD_LIMIT_VARIABLES = [
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "TF_NUM_INTRAOP_THREADS",
+    "TF_NUM_INTEROP_THREADS",
+]
+
+
+def _init_process(threads_per_job: int):
+    # set before TensorFlow and the BLAS libraries are imported by the job
+    for variable in THREAD_LIMIT_VARIABLES:
+        os.environ[variable] = str(threads_per_job)
+    logging_conf.create_logger(config=logging_conf.get_default_conf())
+
+
+async def download_past_climate_data(
+    session: AsyncSession,
+    job: JobDTO,
+    report_progress: ProgressCallback,
+    check_stop: StopCheck,
+):
+    """Downloads the past climate data of the location, then queues the training of
+    its climate generative model."""
+    from zappai.zappai.di import (
+        get_cds_api,
+        get_location_repository,
+        get_past_climate_data_repository,
+    )
+
+    if job.location_id is None:
+        raise ValueError("Downloading past climate data needs a location")
+
+    location_repository = get_location_repository()
+    past_climate_data_repository = get_past_climate_data_repository(
+        cds_api=get_cds_api(), location_repository=location_repository
+    )
+    job_repository = get_job_repository()
+
+    await location_repository.set_location_to_downloading(
+        session=session, location_id=job.location_id
+    )
+    await session.commit()
+    try:
+        await report_progress(0.0, "Downloading past climate data")
+        await past_climate_data_repository.download_new_past_climate_data(
+            session=session, location_id=job.location_id, on_chunk_saved=check_stop
+        )
+        await job_repository.enqueue_job(
+            session=session,
+            type="train_climate_generative_model",
+            location_id=job.location_id,
+            max_attempts=settings.worker_job_max_attempts,
+        )
+        await session.commit()
+    finally:
+        await session.rollback()
+        await location_repository.set_location_to_not_downloading(
+            session=session, location_id=job.location_id
+        )
+        await session.commit()
+
+
+async def train_climate_generative_model(
+    session: AsyncSession,
+    job: JobDTO,
+    report_progress: ProgressCallback,
+    check_stop: StopCheck,
+):
+    from zappai.zappai.di import (
+        get_cds_api,
+        get_climate_generative_model_repository,
+        get_future_climate_data_repository,
+        get_location_repository,
+        get_past_climate_data_repository,
+    )
+
+    if job.location_id is None:
+        raise ValueError("Training a climate generative model needs a location")
+
+    location_repository = get_location_repository()
+    cds_api = get_cds_api()
+    climate_generative_model_repository = get_climate_generative_model_repository(
+        location_repository=location_repository,
+        past_climate_data_repository=get_past_climate_data_repository(
+            cds_api=cds_api, location_repository=location_repository
+        ),
+        future_climate_data_repository=get_future_climate_data_repository(
+            cds_api=cds_api
+        ),
+    )
+    loop = asyncio.get_running_loop()
+
+    def on_epoch_end(epoch: int, epochs: int):
+        # called from the training thread, the report runs in the event loop.
+        # A stop raises here, ending the training
+        check_stop()
+        asyncio.run_coroutine_threadsafe(
+            report_progress(epoch / epochs, f"Epoch {epoch}/{epochs}"), loop
+        ).result()
+
+    # a model that exists is updated with the new months, see refresh_model_for_location
+    await climate_generative_model_repository.refresh_model_for_location(
+        session=session, location_id=job.location_id, on_epoch_end=on_epoch_end
+    )
+
+
+async def train_global_climate_generative_model(
+    session: AsyncSession,
+    job: JobDTO,
+    report_progress: ProgressCallback,
+    check_stop: StopCheck,
+):
+    from zappai.zappai.di import (
+        get_cds_api,
+        get_climate_generative_model_repository,
+        get_future_climate_data_repository,
+        get_location_repository,
+        get_past_climate_data_repository,
+    )
+
+    location_repository = get_location_repository()
+    cds_api = get_cds_api()
+    climate_generative_model_repository = get_climate_generative_model_repository(
+        location_repository=location_repository,
+        past_climate_data_repository=get_past_climate_data_repository(
+            cds_api=cds_api, location_repository=location_repository
+        ),
+        future_climate_data_repository=get_future_climate_data_repository(
+            cds_api=cds_api
+        ),
+    )
+    loop = asyncio.get_running_loop()
+
+    def on_epoch_end(epoch: int, epochs: int):
+        check_stop()
+        asyncio.run_coroutine_threadsafe(
+            report_progress(epoch / epochs, f"Epoch {epoch}/{epochs}"), loop
+        ).result()
+
+    await climate_generative_model_repository.create_global_model(
+        session=session, on_epoch_end=on_epoch_end
+    )
+
+
+JOB_HANDLERS: dict[
+    str,
+    Callable[[AsyncSession, JobDTO, ProgressCallback, StopCheck], Awaitable[None]],
+] = {
+    "download_past_climate_data": download_past_climate_data,
+    "train_climate_generative_model": train_climate_generative_model,
+    "train_global_climate_generative_model": train_global_climate_generative_model,
+}
+
+
+async def _run_job(job: JobDTO, lease_seconds: float, retry_backoff_seconds: float):
+    session_maker = get_session_maker()
+    job_repository = get_job_repository()
+    # set when the job has to stop, the handler stops at its next check_stop or
+    # report_progress. It isn't cancelled, a cancelled await of a thread that calls
+    # back into the event loop would never end
+    is_stopping = threading.Event()
+    stop_error: JobCancelledError | JobLeaseLostError | None = None
+
+    def stop(error: JobCancelledError | JobLeaseLostError):
+        nonlocal stop_error
+        if stop_error is None:
+            stop_error = error
+        is_stopping.set()
+
+    def check_stop():
+        if is_stopping.is_set():
+            assert stop_error is not None
+            raise stop_error
+
+    async def report_progress(progress: float, message: str | None):
+        check_stop()
+        try:
+            async with session_maker() as session:
+                is_cancel_requested = await job_repository.set_job_progress(
+                    session=session,
+                    job=job,
+                    lease_seconds=lease_seconds,
+                    progress=progress,
+                    message=message,
+                )
+                await session.commit()
+        except JobLeaseLostError as e:
+            stop(e)
+            raise
+        if is_cancel_requested:
+            stop(JobCancelledError(str(job.id)))
+            check_stop()
+
+    async def renew_lease():
+        # keeps the lease while the handler runs long steps without reporting progress
+        while True:
+            await asyncio.sleep(lease_seconds / 3)
+            try:
+                async with session_maker() as session:
+                    is_cancel_requested = await job_repository.renew_job_lease(
+                        session=session, job=job, lease_seconds=lease_seconds
+                    )
+                    await session.commit()
+            except JobLeaseLostError as e:
+                logging.error(f"Job {job.id} lost its lease, stopping it")
+                stop(e)
+                return
+            except Exception:
+                # a failed renewal is retried, the lease lasts a few of them
+                logging.error(traceback.format_exc())
+                continue
+            if is_cancel_requested:
+                stop(JobCancelledError(str(job.id)))
+                return
+
+    async def run_handler():
+        async with session_maker() as session:
+            await JOB_HANDLERS[job.type](session, job, report_progress, check_stop)
+            await session.commit()
+
+    status = None
+    error: str | None = None
+    renew_lease_task = asyncio.create_task(renew_lease())
+    try:
+        await run_handler()
+        status = "succeeded"
+    except Exception:
+        # once stopping, the handler may also fail on what the stop interrupted
+        if isinstance(stop_error, JobCancelledError):
+            status = "cancelled"
+        elif stop_error is None:
+            logging.error(traceback.format_exc())
+            error = traceback.format_exc()
+    finally:
+        renew_lease_task.cancel()
+
+    async with session_maker() as session:
+        if status is not None:
+            await job_repository.finish_job(session=session, job=job, status=status)
+        elif error is not None:
+            status = await job_repository.retry_or_fail_job(
+                session=session,
+                job=job,
+                error=error,
+                backoff_seconds=retry_backoff_seconds,
+            )
+        await session.commit()
+    if status is None:
+        logging.info(f"Job {job.id} ({job.type}) lost its lease")
+    else:
+        logging.info(f"Job {job.id} ({job.type}) {status}")
+    # the connections of the pool belong to this event loop, the next job has a new one
+    await engine.dispose()
+
+
+def run_job(job: JobDTO, lease_seconds: float, retry_backoff_seconds: float):
+    """Entry point of a job in a pool process."""
+    asyncio.run(_run_job(job, lease_seconds, retry_backoff_seconds))
+
+
+async def run_worker(
+    concurrency: int,
+    threads_per_job: int,
+    poll_interval_seconds: float,
+    lease_seconds: float,
+    retry_backoff_seconds: float,
+    max_running_jobs_per_type: dict[str, int],
+    job_repository: JobRepository | None = None,
+    session_maker: async_sessionmaker[AsyncSession] | None = None,
+):
+    """Claims queued jobs and runs at most concurrency of them at the same time, each in
+    its own process with at most threads_per_job threads for TensorFlow and BLAS.
+
+    Jobs of a type are claimed only while fewer than max_running_jobs_per_type[type]
+    of them run across all the workers. A job whose run fails is retried with
+    exponential backoff, a job left running by a worker that stopped is retried
+    once its lease of lease_seconds expires.
+
+    Runs until cancelled.
+    """
+    job_repository = job_repository or get_job_repository()
+    session_maker = session_maker or get_session_maker()
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    loop = asyncio.get_running_loop()
+    running: dict[asyncio.Future, JobDTO] = {}
+
+    logging.info(
+        f"Worker {worker_id} started, concurrency: {concurrency}, threads per job: {threads_per_job}"
+    )
+    with ProcessPoolExecutor(
+        max_workers=concurrency,
+        # spawn so that the processes don't inherit the connections of this one
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_process,
+        initargs=(threads_per_job,),
+    ) as pool:
+        while True:
+            while len(running) < concurrency:
+                async with session_maker() as session:
+                    job = await job_repository.claim_next_job(
+                        session=session,
+                        worker_id=worker_id,
+                        lease_seconds=lease_seconds,
+                        max_running_jobs_per_type=max_running_jobs_per_type,
+                    )
+                    await session.commit()
+                if job is None:
+                    break
+                logging.info(f"Job {job.id} ({job.type}) started")
+                running[
+                    loop.run_in_executor(
+                        pool, run_job, job, lease_seconds, retry_backoff_seconds
+                    )
+                ] = job
+
+            if len(running) == 0:
+                await asyncio.sleep(poll_interval_seconds)
+                continue
+            done, _ = await asyncio.wait(
+                running,
+                timeout=poll_interval_seconds,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            for future in done:
+                job = running.pop(future)
+                exception = future.exception()
+                if exception is None:
+                    continue
+                # the job process records the outcome itself, this covers a process that died
+                logging.error(f"Process of job {job.id} failed: {exception!r}")
+                async with session_maker() as session:
+                    await job_repository.retry_or_fail_job(
+                        session=session,
+                        job=job,
+                        error=repr(exception),
+                        backoff_seconds=retry_backoff_seconds,
+                    )
+                    await session.commit()
+                if isinstance(exception, BrokenProcessPool):
+                    raise exception
@@ -2,6 +2,7 @@ from contextlib import asynccontextmanager
 from starlette.middleware.cors import CORSMiddleware
 from zappai import logging_conf
 from zappai.database.di import get_session_maker
+from zappai.jobs.di import get_job_repository
 from zappai.zappai.di import get_location_repository
 
 logging_conf.create_logger(config=logging_conf.get_default_conf())
@@ -13,6 +14,7 @@ from starlette.responses import JSONResponse
 
 from zappai.users.routers import user_router
 from zappai.auth_tokens.routers import auth_token_router
+from zappai.jobs.routers import job_router
 from zappai.zappai.routers import zappai_router
 
 
@@ -22,8 +24,15 @@ async def lifespan(
 ):
     session_maker = get_session_maker()
     location_repository = get_location_repository()
+    job_repository = get_job_repository()
     async with session_maker() as session:
-        await location_repository.set_locations_to_not_downloading(session=session)
+        # the downloads of jobs that are still queued or running are resumed by the workers
+        await location_repository.set_locations_to_not_downloading(
+            session=session,
+            exclude_location_ids=await job_repository.get_active_location_ids(
+                session=session, type="download_past_climate_data"
+            ),
+        )
         await session.commit()
     logging.info("Done")
     yield
@@ -51,6 +60,7 @@ app.add_middleware(
 app.include_router(user_router, prefix="/api", tags=["User"])
 app.include_router(auth_token_router, prefix="/api", tags=["Auth"])
 app.include_router(zappai_router, prefix="/api", tags=["Zappai"])
+app.include_router(job_router, prefix="/api", tags=["Jobs"])
 
 
 @app.exception_handler(Exception)
@@ -2,13 +2,20 @@ from typing import Annotated
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from fastapi import Depends
+from sklearn.ensemble import RandomForestRegressor
 
+from zappai.zappai.dtos import ClimateGenerativeModelDTO, ClimateSeries
 from zappai.zappai.repositories.climate_generative_model_repository import (
     ClimateGenerativeModelRepository,
+    ForecastKey,
 )
 from zappai.zappai.repositories.crop_repository import CropRepository
 from zappai.zappai.repositories.crop_yield_data_repository import CropYieldDataRepository
-from zappai.zappai.services.crop_optimizer_service import CropOptimizerService
+from zappai.zappai.services.crop_optimizer_service import (
+    CropOptimizerService,
+    OptimizerResultKey,
+    SowingAndHarvestingDTO,
+)
 from zappai.zappai.services.crop_yield_model_service import (
     CropYieldModelService,
 )
@@ -21,14 +28,33 @@ from zappai.zappai.repositories.past_climate_data_repository import (
 )
 from zappai.zappai.repositories.copernicus_data_store_api import CopernicusDataStoreAPI
 from zappai.config import settings
+from zappai.zappai.utils.cache import LRUCache
+from zappai.zappai.utils.training import TrainingConfig
 
+# shared by every request of this process
+climate_generative_model_cache: LRUCache[tuple[UUID | None, UUID], ClimateGenerativeModelDTO] = LRUCache(
+    max_entries=settings.climate_generative_model_cache_max_entries,
+    max_bytes=settings.climate_generative_model_cache_max_bytes,
+)
+crop_yield_model_cache: LRUCache[tuple[str, str], RandomForestRegressor] = LRUCache(
+    max_entries=settings.crop_yield_model_cache_max_entries
+)
+climate_forecast_cache: LRUCache[ForecastKey, tuple[UUID, ClimateSeries]] = LRUCache(
+    max_entries=settings.climate_forecast_cache_max_entries
+)
+crop_optimizer_result_cache: LRUCache[
+    OptimizerResultKey, list[SowingAndHarvestingDTO]
+] = LRUCache(max_entries=settings.crop_optimizer_result_cache_max_entries)
+future_climate_grid_point_cache: LRUCache[
+    tuple[float, float], tuple[float, float]
+] = LRUCache(max_entries=settings.future_climate_grid_point_cache_max_entries)
 
 def get_location_repository() -> LocationRepository:
     return LocationRepository()
 
 
 def get_crop_repository() -> CropRepository:
-    return CropRepository()
+    return CropRepository(crop_yield_model_cache=crop_yield_model_cache)
 
 
 def get_cds_api() -> CopernicusDataStoreAPI:
@@ -68,7 +94,10 @@ def get_crop_yield_data_repository(
 def get_future_climate_data_repository(
     cds_api: Annotated[CopernicusDataStoreAPI, Depends(get_cds_api)],
 ) -> FutureClimateDataRepository:
-    return FutureClimateDataRepository(copernicus_data_store_api=cds_api)
+    return FutureClimateDataRepository(
+        copernicus_data_store_api=cds_api,
+        nearest_grid_point_cache=future_climate_grid_point_cache,
+    )
 
 
 def get_climate_generative_model_repository(
@@ -86,6 +115,24 @@ def get_climate_generative_model_repository(
         location_repository=location_repository,
         past_climate_data_repository=past_climate_data_repository,
         future_climate_data_repository=future_climate_data_repository,
+        model_cache=climate_generative_model_cache,
+        model_kind=settings.climate_generative_model_kind,
+        training_config=TrainingConfig(
+            epochs=settings.climate_generative_model_epochs,
+            batch_size=settings.climate_generative_model_batch_size,
+            early_stopping_patience=settings.climate_generative_model_early_stopping_patience,
+            learning_rate=settings.climate_generative_model_learning_rate,
+            fine_tune_epochs=settings.climate_generative_model_fine_tune_epochs,
+            fine_tune_learning_rate=settings.climate_generative_model_fine_tune_learning_rate,
+            threads=settings.climate_generative_model_training_threads,
+            refresh_epochs=settings.climate_generative_model_refresh_epochs,
+            refresh_window_months=settings.climate_generative_model_refresh_window_months,
+            scaler_drift_threshold=settings.climate_generative_model_scaler_drift_threshold,
+            full_retrain_days=settings.climate_generative_model_full_retrain_days,
+            degradation_threshold=settings.climate_generative_model_degradation_threshold,
+        ),
+        inference_backend=settings.climate_generative_model_inference_backend,
+        forecast_cache=climate_forecast_cache,
     )
 
 
@@ -131,4 +178,5 @@ def get_crop_optimizer_service(
         future_climate_data_repository=future_climate_data_repository,
         location_repository=location_repository,
         climate_generative_model_repository=climate_generative_model_repository,
+        optimizer_result_cache=crop_optimizer_result_cache,
     )
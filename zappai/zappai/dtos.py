@@ -1,18 +1,27 @@
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from datetime import datetime
 from uuid import UUID
 
-from keras.src.models import Sequential
+import numpy as np
 import pandas as pd
 
-from typing import Any, Sequence, cast
+from typing import TYPE_CHECKING, Any, Iterator, Literal, Sequence, cast
 
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import StandardScaler
 
 from zappai.schemas import CustomBaseModel
 
+if TYPE_CHECKING:
+    from keras.src.models import Sequential
+    from zappai.zappai.utils.inference import CompiledModel
+
+# "location" models are trained on the data of one location, the "global" model on the
+# data of every location and "fine_tuned" models are the global model trained a few
+# more epochs on one location
+ClimateGenerativeModelKind = Literal["location", "global", "fine_tuned"]
+
 
 @dataclass
 class SoilTypeDTO:
@@ -26,6 +35,20 @@ class LocationClimateYearsDTO:
     years: set[int]
 
 
+@dataclass
+class CropDetailsDTO:
+    """A crop without its crop yield model"""
+
+    name: str
+    created_at: datetime
+    min_farming_months: int
+    max_farming_months: int
+    mse: float | None
+    r2: float | None
+    # md5 of the serialized crop yield model, None if the crop has no model
+    crop_yield_model_hash: str | None
+
+
 @dataclass
 class CropDTO:
     name: str
@@ -35,6 +58,7 @@ class CropDTO:
     crop_yield_model: RandomForestRegressor | None
     mse: float | None
     r2: float | None
+    crop_yield_model_hash: str | None = None
 
 
 @dataclass
@@ -80,11 +104,23 @@ class LocationDTO:
         }
 
 
+@dataclass
+class LocationStatusDTO:
+    location: LocationDTO
+    # None if the location has no past climate data
+    last_past_climate_data_year: int | None
+    last_past_climate_data_month: int | None
+    # a model of its own, not the global model it may be forecast by
+    has_climate_generative_model: bool
+
+
 @dataclass
 class ClimateGenerativeModelDTO:
     id: UUID
-    location_id: UUID
-    model: Sequential
+    # None for the global model when it isn't used for a location
+    location_id: UUID | None
+    # None when only compiled_model was loaded
+    model: Sequential | None
     x_scaler: StandardScaler
     y_scaler: StandardScaler
     rmse: float
@@ -104,6 +140,19 @@ class ClimateGenerativeModelDTO:
     test_end_year: int
     test_end_month: int
 
+    # used instead of model for inference when available
+    compiled_model: CompiledModel | None = None
+
+    kind: ClimateGenerativeModelKind = "location"
+    # appended to each month of the window by global and fine tuned models,
+    # see get_location_features
+    location_features: np.ndarray | None = None
+    # number, seconds, loss and metrics of each epoch, see fit_model
+    training_history: list[dict[str, Any]] | None = None
+    # None until saved for a model trained from scratch
+    trained_at: datetime | None = None
+    refreshed_at: datetime | None = None
+
 
 @dataclass
 class FutureClimateDataDTO:
@@ -197,6 +246,95 @@ class ClimateDataDTO:
         return result
 
 
+# ClimateDataDTO fields of the climate variables, in their order
+CLIMATE_DATA_VARIABLES = [
+    field.name
+    for field in fields(ClimateDataDTO)
+    if field.name not in ("location_id", "year", "month")
+]
+
+# ClimateDataDTO fields that have another name in the climate dataframes
+CLIMATE_DATA_DF_COLUMNS = {
+    "temperature_2m": "2m_temperature",
+    "dewpoint_temperature_2m": "2m_dewpoint_temperature",
+}
+
+
+@dataclass
+class ClimateSeries:
+    """Climate data of consecutive months of a location, an array per ClimateDataDTO
+    variable instead of a ClimateDataDTO per month.
+
+    Indexing and iterating build the ClimateDataDTO of a month only when asked, e.g. to
+    serialize it.
+    """
+
+    location_id: UUID
+    # shape (months,)
+    years: np.ndarray
+    months: np.ndarray
+    # shape (months,) for each ClimateDataDTO field after month
+    values: dict[str, np.ndarray]
+
+    @staticmethod
+    def from_dataframe(location_id: UUID, df: pd.DataFrame) -> ClimateSeries:
+        """The arrays are views on the columns of df when pandas allows it, no data is copied.
+
+        Args:
+            df (pd.DataFrame): indexed by year and month with the columns of
+                ClimateDataDTO.from_list_to_dataframe, other columns are ignored
+        """
+        return ClimateSeries(
+            location_id=location_id,
+            years=df.index.get_level_values("year").to_numpy(),
+            months=df.index.get_level_values("month").to_numpy(),
+            values={
+                field: df[CLIMATE_DATA_DF_COLUMNS.get(field, field)].to_numpy()
+                for field in CLIMATE_DATA_VARIABLES
+            },
+        )
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Same dataframe as ClimateDataDTO.from_list_to_dataframe, on the arrays
+        without copying them."""
+        return pd.DataFrame(
+            {
+                "location_id": self.location_id,
+                **{
+                    CLIMATE_DATA_DF_COLUMNS.get(field, field): values
+                    for field, values in self.values.items()
+                },
+            },
+            index=pd.MultiIndex.from_arrays(
+                [self.years, self.months], names=["year", "month"]
+            ),
+            copy=False,
+        )
+
+    def __len__(self) -> int:
+        return len(self.years)
+
+    def __getitem__(self, i: int) -> ClimateDataDTO:
+        return ClimateDataDTO(
+            location_id=self.location_id,
+            year=int(self.years[i]),
+            month=int(self.months[i]),
+            **{field: float(values[i]) for field, values in self.values.items()},
+        )
+
+    def __iter__(self) -> Iterator[ClimateDataDTO]:
+        return (self[i] for i in range(len(self)))
+
+
+@dataclass
+class ClimateForecastDTO:
+    location_id: UUID
+    # id of the climate_forecast row, a new one whenever the forecast changes,
+    # None if the forecast couldn't be stored
+    id: UUID | None
+    forecast: ClimateSeries
+
+
 @dataclass
 class PastClimateDataDTO(ClimateDataDTO):
     u_component_of_wind_10m: float
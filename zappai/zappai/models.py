@@ -1,6 +1,7 @@
 from datetime import datetime
 from uuid import UUID
-from sqlalchemy import ForeignKey, UniqueConstraint
+from typing import Any
+from sqlalchemy import JSON, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from zappai.database.base import Base
 from geoalchemy2 import Geography
@@ -48,15 +49,81 @@ class ClimateGenerativeModel(Base):
     test_end_year: Mapped[int]
     test_end_month: Mapped[int]
 
-    location_id: Mapped[UUID] = mapped_column(
+    # compiled form of model used for inference, e.g. "tflite", None if only the eager model is available
+    inference_backend: Mapped[str | None]
+    inference_artifact: Mapped[bytes | None]
+
+    # "location", "global" or "fine_tuned", see ClimateGenerativeModelKind
+    kind: Mapped[str] = mapped_column(server_default="location")
+
+    # number, seconds, loss and metrics of each epoch, see fit_model
+    training_history: Mapped[list[dict[str, Any]] | None] = mapped_column(JSON)
+
+    # last training from scratch, and last refresh with new months since then
+    trained_at: Mapped[datetime | None]
+    refreshed_at: Mapped[datetime | None]
+
+    # None for the global model, shared by every location
+    location_id: Mapped[UUID | None] = mapped_column(
         ForeignKey(column="location.id", ondelete="CASCADE")
     )
 
-    location: Mapped[Location] = relationship()
+    location: Mapped[Location | None] = relationship()
 
     __table_args__ = (UniqueConstraint("location_id", name="_location_id_nc"),)
 
 
+class ClimateGenerativeModelCheckpoint(Base):
+    """Last epoch of a training of a climate generative model that didn't end yet."""
+
+    __tablename__ = "climate_generative_model_checkpoint"
+
+    id: Mapped[UUID] = mapped_column(primary_key=True)
+    kind: Mapped[str]
+    location_id: Mapped[UUID | None] = mapped_column(
+        ForeignKey(column="location.id", ondelete="CASCADE"), index=True
+    )
+    # the checkpoint is resumed only by a training on the same data
+    data_fingerprint: Mapped[str]
+    epoch: Mapped[int]
+    # pickled TrainingCheckpoint
+    checkpoint: Mapped[bytes]
+    updated_at: Mapped[datetime]
+
+
+class ClimateForecast(Base):
+    """Forecast of a location made by a climate generative model from the past climate
+    data up to seed_year, seed_month, it's the same until one of them changes."""
+
+    __tablename__ = "climate_forecast"
+
+    id: Mapped[UUID] = mapped_column(primary_key=True)
+    location_id: Mapped[UUID] = mapped_column(
+        ForeignKey(column="location.id", ondelete="CASCADE")
+    )
+    # the model of the location or the global one, replacing it deletes its forecasts
+    climate_generative_model_id: Mapped[UUID] = mapped_column(
+        ForeignKey(column="climate_generative_model.id", ondelete="CASCADE"), index=True
+    )
+    seed_year: Mapped[int]
+    seed_month: Mapped[int]
+    months: Mapped[int]
+    # pickled ClimateSeries
+    forecast: Mapped[bytes]
+    created_at: Mapped[datetime]
+
+    __table_args__ = (
+        UniqueConstraint(
+            "location_id",
+            "climate_generative_model_id",
+            "seed_year",
+            "seed_month",
+            "months",
+            name="_climate_forecast_key_uc",
+        ),
+    )
+
+
 class Crop(Base):
     __tablename__ = "crop"
 
@@ -65,6 +132,8 @@ class Crop(Base):
     min_farming_months: Mapped[int]
     max_farming_months: Mapped[int]
     crop_yield_model: Mapped[bytes | None]
+    # md5 of crop_yield_model, set with it, so the model can be versioned without reading it
+    crop_yield_model_hash: Mapped[str | None]
     mse: Mapped[float | None]
     r2: Mapped[float | None]
 
@@ -154,3 +223,27 @@ class FutureClimateData(Base):
             name="_longitude_latitude_year_month_uc",
         ),
     )
+
+
+class FutureClimateGridPoint(Base):
+    """A point of the grid of the future climate data, once per longitude and latitude."""
+
+    __tablename__ = "future_climate_grid_point"
+
+    id: Mapped[UUID] = mapped_column(primary_key=True)
+
+    longitude: Mapped[float]
+    latitude: Mapped[float]
+
+    # GiST index for the KNN (<->) search of the nearest point
+    coordinates: Mapped[Geography] = mapped_column(
+        Geography(geometry_type="POINT", srid=4326, spatial_index=True)
+    )
+
+    __table_args__ = (
+        UniqueConstraint(
+            "longitude",
+            "latitude",
+            name="_future_climate_grid_point_longitude_latitude_uc",
+        ),
+    )
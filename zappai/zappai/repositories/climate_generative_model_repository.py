@@ -1,25 +1,37 @@
+from __future__ import annotations
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
-from typing import cast
+import copy
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+import logging
+from typing import TYPE_CHECKING, Callable, Literal, TypeVar, cast
 from uuid import UUID
 import uuid
 import numpy as np
 import pandas as pd
-from keras.src.models import Sequential
-from keras.src.layers import Dropout, InputLayer, LSTM, Dense
 from sklearn.preprocessing import StandardScaler
-from sqlalchemy import delete, insert, select
+from sqlalchemy import delete, exists, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from zappai.database.di import get_session_maker
 from zappai.zappai.exceptions import (
     ClimateGenerativeModelNotFoundError,
     LocationNotFoundError,
+    PastClimateDataNotFoundError,
+)
+from zappai.zappai.models import (
+    ClimateForecast,
+    ClimateGenerativeModel,
+    ClimateGenerativeModelCheckpoint,
 )
-from zappai.zappai.models import ClimateGenerativeModel
 from zappai.zappai.dtos import (
     ClimateGenerativeModelDTO,
+    ClimateGenerativeModelKind,
     FutureClimateDataDTO,
-    ClimateDataDTO,
-    PastClimateDataDTO,
+    ClimateSeries,
+    ClimateForecastDTO,
 )
 from zappai.zappai.repositories.future_climate_data_repository import (
     FutureClimateDataRepository,
@@ -29,6 +41,27 @@ from zappai.zappai.repositories.past_climate_data_repository import (
     PastClimateDataRepository,
 )
 
+from zappai.zappai.utils.cache import LRUCache
+from zappai.zappai.utils.inference import (
+    CompiledModel,
+    InferenceBackend,
+    export_model,
+    get_backend,
+    load_compiled_model,
+)
+from zappai.zappai.utils.numpy_lstm import NumpyLSTMModel
+from zappai.zappai.utils.training import (
+    EpochEndCallback,
+    TrainingCheckpoint,
+    TrainingConfig,
+    fit_model,
+    get_data_fingerprint,
+    set_threads,
+)
+from zappai.zappai.utils.windowing import create_windows, gather_windows, stack_windows
+
+if TYPE_CHECKING:
+    from keras.src.models import Sequential
 from zappai.zappai.utils.common import bytes_to_object, get_next_n_months, object_to_bytes
 
 TARGET = [
@@ -56,6 +89,19 @@ FEATURES_WITH_SIN_COS = [*TARGET, *MODEL_CMIP5_VARIABLES_WITH_SIN_COS]
 
 SEQ_LENGTH = 12
 
+# what a training run by ClimateGenerativeModelRepository.__run_training returns
+TrainingResult = TypeVar(
+    "TrainingResult", ClimateGenerativeModelDTO, ClimateGenerativeModelDTO | None
+)
+
+# location_id, climate generative model id, year and month of the last seed month,
+# months, a forecast is the same until one of them changes
+ForecastKey = tuple[UUID, UUID, int, int, int]
+
+# inputs of global and fine tuned models that are the same for every month of the
+# window, they tell the model which location it is forecasting
+LOCATION_FEATURES = ["sin_latitude", "cos_latitude", "sin_longitude", "cos_longitude"]
+
 
 def add_sin_cos_year(df: pd.DataFrame):
     # Reset the index to access the multi-index columns
@@ -71,59 +117,287 @@ def add_sin_cos_year(df: pd.DataFrame):
     return df_reset
 
 
+def get_location_features(latitude: float, longitude: float) -> np.ndarray:
+    """LOCATION_FEATURES of a location, sin and cos keep close locations close,
+    e.g. the longitudes -180 and 180.
+
+    Returns:
+        np.ndarray: shape (len(LOCATION_FEATURES),)
+    """
+    latitude, longitude = np.radians(latitude), np.radians(longitude)
+    return np.array(
+        [np.sin(latitude), np.cos(latitude), np.sin(longitude), np.cos(longitude)]
+    )
+
+
+def add_location_features(
+    windows: np.ndarray, location_features: np.ndarray | None
+) -> np.ndarray:
+    """Appends the location features to every month of the windows.
+
+    Args:
+        windows (np.ndarray): shape (batch, SEQ_LENGTH, features)
+        location_features (np.ndarray | None): shape (len(LOCATION_FEATURES),) for every
+            window or (batch, len(LOCATION_FEATURES)), the windows are returned as they
+            are if None
+
+    Returns:
+        np.ndarray: shape (batch, SEQ_LENGTH, features + len(LOCATION_FEATURES))
+    """
+    if location_features is None:
+        return windows
+    location_features = np.asarray(location_features, dtype=windows.dtype).reshape(
+        -1, 1, len(LOCATION_FEATURES)
+    )
+    return np.concatenate(
+        [
+            windows,
+            np.broadcast_to(
+                location_features, (*windows.shape[:2], len(LOCATION_FEATURES))
+            ),
+        ],
+        axis=2,
+    )
+
+
+def split_train_validation_test(
+    df: pd.DataFrame,
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """Chronological 70% train, 15% validation and 15% test split."""
+    perc_70 = int(len(df) * 0.7)
+    perc_85 = int(len(df) * 0.85)
+    return df[:perc_70], df[perc_70:perc_85], df[perc_85:]
+
+
+def compile_model(model: Sequential, learning_rate: float):
+    from keras.src.optimizers import Adam
+
+    model.compile(loss="mean_squared_error", optimizer=Adam(learning_rate=learning_rate), metrics=["root_mean_squared_error"])  # type: ignore
+
+
+def build_model(input_features: int, learning_rate: float) -> Sequential:
+    """The LSTM shared by every kind of climate generative model, compiled.
+
+    Args:
+        input_features (int): features of each month of the window
+        learning_rate (float): of Adam
+    """
+    from keras.src.layers import Dense, Dropout, InputLayer, LSTM
+    from keras.src.models import Sequential
+
+    model = Sequential(
+        layers=[
+            InputLayer(
+                shape=(
+                    SEQ_LENGTH,
+                    input_features,
+                )
+            ),
+            LSTM(units=50, return_sequences=True),
+            Dropout(rate=0.2),
+            LSTM(units=50, return_sequences=True),
+            Dropout(rate=0.2),
+            LSTM(units=50),
+            Dropout(rate=0.2),
+            Dense(units=len(TARGET)),
+        ]
+    )
+
+    compile_model(model, learning_rate=learning_rate)
+    return model
+
+
+def get_scaler_mean_and_scale(
+    scaler: StandardScaler, dtype: type[np.floating]
+) -> tuple[np.ndarray, np.ndarray]:
+    """Mean and scale of the scaler as arrays of dtype, (X - mean) / scale gives the
+    same values of scaler.transform on an X of that dtype."""
+    n_features = cast(int, scaler.n_features_in_)
+    mean = scaler.mean_ if scaler.with_mean else None
+    scale = scaler.scale_ if scaler.with_std else None
+    if mean is None:
+        mean = np.zeros(n_features)
+    if scale is None:
+        scale = np.ones(n_features)
+    return np.asarray(mean).astype(dtype), np.asarray(scale).astype(dtype)
+
+
+def get_scaler_drift(scaler: StandardScaler, x: np.ndarray) -> float:
+    """How far the mean of x is from the one the scaler was fitted on, in standard
+    deviations of the scaler, the largest among the features."""
+    mean, scale = get_scaler_mean_and_scale(scaler, dtype=np.float64)
+    return float(np.max(np.abs(x.mean(axis=0) - mean) / scale))
+
+
+def get_model_signature(climate_generative_model: ClimateGenerativeModelDTO) -> tuple:
+    """Backend, layer types and weight shapes, models with the same signature can be stacked."""
+    compiled_model = climate_generative_model.compiled_model
+    if isinstance(compiled_model, NumpyLSTMModel):
+        return ("numpy", compiled_model.get_signature())
+    model = cast("Sequential", climate_generative_model.model)
+    return (
+        "eager",
+        tuple(
+            (
+                type(layer).__name__,
+                tuple(tuple(weight.shape) for weight in layer.get_weights()),
+            )
+            for layer in model.layers
+        ),
+    )
+
+
+def get_input_features(climate_generative_model: ClimateGenerativeModelDTO) -> int:
+    """Features of each month of the window the model takes."""
+    if climate_generative_model.location_features is None:
+        return len(FEATURES_WITH_SIN_COS)
+    return len(FEATURES_WITH_SIN_COS) + len(LOCATION_FEATURES)
+
+
+def get_predictor(
+    climate_generative_model: ClimateGenerativeModelDTO,
+) -> Callable[[np.ndarray], np.ndarray]:
+    """The model as a function of a batch of windows, every window runs with the same
+    weights, e.g. the global model on many locations."""
+    compiled_model = climate_generative_model.compiled_model
+    if isinstance(compiled_model, NumpyLSTMModel):
+        return compiled_model
+    model = cast("Sequential", climate_generative_model.model)
+    return lambda windows: np.asarray(model(windows, training=False))
+
+
+def stack_models(
+    climate_generative_models: list[ClimateGenerativeModelDTO],
+) -> Callable[[np.ndarray], np.ndarray]:
+    """Runs models with the same signature in one call.
+
+    NumPy models are stacked in a single forward pass. Keras models, whose
+    weights can't share a tensor, are wrapped in one model with an input and
+    an output per model.
+
+    Returns:
+        Callable[[np.ndarray], np.ndarray]: takes the window of each model, shape
+            (models, SEQ_LENGTH, get_input_features), and returns the float32
+            prediction of each model, shape (models, len(TARGET))
+    """
+    compiled_models = [m.compiled_model for m in climate_generative_models]
+    if all(isinstance(m, NumpyLSTMModel) for m in compiled_models):
+        return NumpyLSTMModel.stack(cast(list[NumpyLSTMModel], compiled_models))
+
+    from keras.src.layers import Input
+    from keras.src.models import Model
+
+    models = [cast("Sequential", m.model) for m in climate_generative_models]
+    input_features = get_input_features(climate_generative_models[0])
+    inputs = [Input(shape=(SEQ_LENGTH, input_features)) for _ in models]
+    outputs = [model(x) for model, x in zip(models, inputs)]
+    stacked_model = Model(inputs=inputs, outputs=outputs)
+
+    def predict(windows: np.ndarray) -> np.ndarray:
+        outputs = stacked_model(
+            [windows[i : i + 1] for i in range(len(windows))], training=False
+        )
+        return np.concatenate([np.asarray(output) for output in outputs])
+
+    return predict
+
+
 class ClimateGenerativeModelRepository:
     def __init__(
         self,
         location_repository: LocationRepository,
         past_climate_data_repository: PastClimateDataRepository,
         future_climate_data_repository: FutureClimateDataRepository,
+        model_cache: LRUCache[tuple[UUID | None, UUID], ClimateGenerativeModelDTO]
+        | None = None,
+        inference_backend: InferenceBackend = "eager",
+        model_kind: Literal["location", "global"] = "location",
+        training_config: TrainingConfig | None = None,
+        forecast_cache: LRUCache[ForecastKey, tuple[UUID, ClimateSeries]]
+        | None = None,
+        session_maker: async_sessionmaker[AsyncSession] | None = None,
     ) -> None:
+        """
+
+        Args:
+            location_repository (LocationRepository):
+            past_climate_data_repository (PastClimateDataRepository):
+            future_climate_data_repository (FutureClimateDataRepository):
+            model_cache (LRUCache[tuple[UUID | None, UUID], ClimateGenerativeModelDTO] | None, optional):
+                deserialized models by (location_id, model id), location_id is None for the
+                global model. Shared between repositories. Defaults to a cache used only by this repository.
+            inference_backend (InferenceBackend, optional): backend trained models are exported to,
+                the export is used for inference when it is available. Defaults to "eager".
+            model_kind (Literal["location", "global"], optional): with "global", create_model_for_location
+                fine tunes the global model and locations without a model of their own are
+                forecast by the global model. Defaults to "location".
+            training_config (TrainingConfig | None, optional): with fine_tune_epochs 0 the global model
+                is used as it is. Defaults to TrainingConfig().
+            forecast_cache (LRUCache[ForecastKey, tuple[UUID, ClimateSeries]] | None, optional):
+                id of the climate_forecast row and its forecast, in front of the climate_forecast table.
+                Shared between repositories. Defaults to a cache used only by this repository.
+            session_maker (async_sessionmaker[AsyncSession] | None, optional): sessions the
+                forecasts are stored with, apart from the session of the caller.
+                Defaults to get_session_maker().
+        """
         self.location_repository = location_repository
         self.past_climate_data_repository = past_climate_data_repository
         self.future_climate_data_repository = future_climate_data_repository
+        self.model_cache: LRUCache[
+            tuple[UUID | None, UUID], ClimateGenerativeModelDTO
+        ] = (model_cache if model_cache is not None else LRUCache(max_entries=8))
+        self.inference_backend = inference_backend
+        self.model_kind = model_kind
+        self.training_config = (
+            training_config if training_config is not None else TrainingConfig()
+        )
+        self.forecast_cache: LRUCache[
+            ForecastKey, tuple[UUID, ClimateSeries]
+        ] = (forecast_cache if forecast_cache is not None else LRUCache(max_entries=64))
+        self.session_maker = (
+            session_maker if session_maker is not None else get_session_maker()
+        )
 
     @staticmethod
     def format_data(x: np.ndarray, y: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
-        x_train_scaled_with_sequences = []
-        y_train_scaled_for_model = []
-        for i in range(len(x) - SEQ_LENGTH):
-            x_train_scaled_with_sequences.append(x[i : i + SEQ_LENGTH])
-            y_train_scaled_for_model.append(y[i + SEQ_LENGTH])
+        """Windows of SEQ_LENGTH months of x, each with the month of y that follows it.
 
-        x_train_scaled_with_sequences = np.array(x_train_scaled_with_sequences)
-        y_train_scaled_for_model = np.array(y_train_scaled_for_model)
-        return x_train_scaled_with_sequences, y_train_scaled_for_model
+        Returns:
+            tuple[np.ndarray, np.ndarray]: zero copy views of shape (len(x) - SEQ_LENGTH, SEQ_LENGTH, features)
+                and (len(x) - SEQ_LENGTH, targets), see gather_windows to get contiguous arrays
+        """
+        return create_windows(x, y, seq_length=SEQ_LENGTH)
 
     def __train_model(
-        self, location_id: UUID, past_climate_data_df: pd.DataFrame
+        self,
+        location_id: UUID,
+        past_climate_data_df: pd.DataFrame,
+        on_epoch_end: EpochEndCallback | None = None,
+        checkpoint: TrainingCheckpoint | None = None,
+        on_checkpoint: Callable[[TrainingCheckpoint], None] | None = None,
     ) -> ClimateGenerativeModelDTO:
         """_summary_
 
         Args:
             past_climate_data_df (pd.DataFrame): _description_
+            on_epoch_end (EpochEndCallback | None, optional):
+            checkpoint (TrainingCheckpoint | None, optional): resumed if provided
+            on_checkpoint (Callable[[TrainingCheckpoint], None] | None, optional): called after each epoch
 
         Returns:
             model, x_scaler, y_scaler, rmse, x_train_from
         """
+        # TensorFlow is imported only by the processes that train
+        from keras.src.models import Sequential
+
         past_climate_data_df = add_sin_cos_year(past_climate_data_df)
         past_climate_data_df = past_climate_data_df[FEATURES_WITH_SIN_COS]
 
         x_df = past_climate_data_df[FEATURES_WITH_SIN_COS]
         y_df = past_climate_data_df[TARGET]
 
-        perc_70 = int(len(x_df) * 0.7)
-        perc_85 = int(len(x_df) * 0.85)
-
-        x_df_train, x_df_val, x_df_test = (
-            x_df[:perc_70],
-            x_df[perc_70:perc_85],
-            x_df[perc_85:],
-        )
-        y_df_train, y_df_val, y_df_test = (
-            y_df[:perc_70],
-            y_df[perc_70:perc_85],
-            y_df[perc_85:],
-        )
+        x_df_train, x_df_val, x_df_test = split_train_validation_test(x_df)
+        y_df_train, y_df_val, y_df_test = split_train_validation_test(y_df)
 
         x_scaler = StandardScaler()
         y_scaler = StandardScaler()
@@ -191,38 +465,595 @@ class ClimateGenerativeModelRepository:
             )
         )
 
-        model = Sequential(
-            layers=[
-                InputLayer(
-                    shape=(
-                        SEQ_LENGTH,
-                        len(FEATURES_WITH_SIN_COS),
-                    )
-                ),
-                LSTM(units=50, return_sequences=True),
-                Dropout(rate=0.2),
-                LSTM(units=50, return_sequences=True),
-                Dropout(rate=0.2),
-                LSTM(units=50),
-                Dropout(rate=0.2),
-                Dense(units=len(TARGET)),
-            ]
+        set_threads(self.training_config.threads)
+        model = (
+            checkpoint.model
+            if checkpoint is not None
+            else build_model(
+                input_features=len(FEATURES_WITH_SIN_COS),
+                learning_rate=self.training_config.learning_rate,
+            )
         )
 
-        model.compile(loss="mean_squared_error", optimizer="adam", metrics=["root_mean_squared_error"])  # type: ignore
-
-        model.fit(
+        training_history = fit_model(
+            model,
             x=x_train_formatted,
             y=y_train_formatted,
             validation_data=(x_val_formatted, y_val_formatted),
-            epochs=50,
+            epochs=self.training_config.epochs,
+            config=self.training_config,
+            on_epoch_end=on_epoch_end,
+            checkpoint=checkpoint,
+            on_checkpoint=on_checkpoint,
+        )
+
+        rmse = model.evaluate(
+            x=x_test_formatted,
+            y=y_test_formatted,
+            batch_size=self.training_config.batch_size,
+        )[1]
+
+        compiled_model = self.__export_model(
+            model,
+            input_features=len(FEATURES_WITH_SIN_COS),
+            description=f"climate generative model of location {location_id}",
+        )
+
+        return ClimateGenerativeModelDTO(
+            id=uuid.uuid4(),
+            location_id=location_id,
+            model=model,
+            x_scaler=x_scaler,
+            y_scaler=y_scaler,
+            rmse=rmse,
+            train_start_year=train_start_year,
+            train_start_month=train_start_month,
+            train_end_year=train_end_year,
+            train_end_month=train_end_month,
+            validation_start_year=validation_start_year,
+            validation_start_month=validation_start_month,
+            validation_end_year=validation_end_year,
+            validation_end_month=validation_end_month,
+            test_start_year=test_start_year,
+            test_start_month=test_start_month,
+            test_end_year=test_end_year,
+            test_end_month=test_end_month,
+            compiled_model=compiled_model,
+            training_history=training_history,
         )
 
-        rmse = model.evaluate(x=x_test_formatted, y=y_test_formatted)[1]
+    def __export_model(
+        self, model: Sequential, input_features: int, description: str
+    ) -> CompiledModel | None:
+        try:
+            return export_model(
+                model,
+                backend=self.inference_backend,
+                input_shape=(SEQ_LENGTH, input_features),
+            )
+        except Exception:
+            logging.warning(
+                f"{self.inference_backend} export of the {description} failed, using the eager model",
+                exc_info=True,
+            )
+            return None
+
+    def __train_global_model(
+        self,
+        past_climate_data_dfs: list[tuple[pd.DataFrame, np.ndarray]],
+        on_epoch_end: EpochEndCallback | None = None,
+        checkpoint: TrainingCheckpoint | None = None,
+        on_checkpoint: Callable[[TrainingCheckpoint], None] | None = None,
+    ) -> ClimateGenerativeModelDTO:
+        """Trains one model on every location, conditioned on the location features.
+
+        Each location is split in train, validation and test like in __train_model,
+        the scalers are fitted on the train data of all of them and the windows
+        never cross two locations.
+
+        Args:
+            past_climate_data_dfs (list[tuple[pd.DataFrame, np.ndarray]]): past climate data
+                and location features of each location
+
+        Raises:
+            PastClimateDataNotFoundError: if no location has enough past climate data
+        """
+        splits: list[tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, np.ndarray]] = []
+        for past_climate_data_df, location_features in past_climate_data_dfs:
+            past_climate_data_df = add_sin_cos_year(past_climate_data_df)[
+                FEATURES_WITH_SIN_COS
+            ]
+            train_df, val_df, test_df = split_train_validation_test(
+                past_climate_data_df
+            )
+            # each part needs at least a window and the month after it
+            if min(len(train_df), len(val_df), len(test_df)) > SEQ_LENGTH:
+                splits.append((train_df, val_df, test_df, location_features))
+        if len(splits) == 0:
+            raise PastClimateDataNotFoundError(
+                "No location has enough past climate data to train the global climate generative model"
+            )
+
+        x_scaler = StandardScaler().fit(
+            np.concatenate([train_df.to_numpy() for train_df, *_ in splits])
+        )
+        y_scaler = StandardScaler().fit(
+            np.concatenate([train_df[TARGET].to_numpy() for train_df, *_ in splits])
+        )
+
+        def get_windows(part: int) -> tuple[np.ndarray, np.ndarray]:
+            xs: list[np.ndarray] = []
+            ys: list[np.ndarray] = []
+            for split in splits:
+                df, location_features = split[part], split[3]
+                x = cast(np.ndarray, x_scaler.transform(df.to_numpy()))
+                xs.append(
+                    np.concatenate(
+                        [x, np.broadcast_to(location_features, (len(x), len(LOCATION_FEATURES)))],
+                        axis=1,
+                    )
+                )
+                ys.append(cast(np.ndarray, y_scaler.transform(df[TARGET].to_numpy())))
+            windows, starts, y = stack_windows(xs, ys, seq_length=SEQ_LENGTH)
+            return gather_windows(windows, starts), y
+
+        x_train, y_train = get_windows(0)
+        x_val, y_val = get_windows(1)
+        x_test, y_test = get_windows(2)
+
+        set_threads(self.training_config.threads)
+        input_features = len(FEATURES_WITH_SIN_COS) + len(LOCATION_FEATURES)
+        model = (
+            checkpoint.model
+            if checkpoint is not None
+            else build_model(
+                input_features=input_features,
+                learning_rate=self.training_config.learning_rate,
+            )
+        )
+        training_history = fit_model(
+            model,
+            x=x_train,
+            y=y_train,
+            validation_data=(x_val, y_val),
+            epochs=self.training_config.epochs,
+            config=self.training_config,
+            on_epoch_end=on_epoch_end,
+            checkpoint=checkpoint,
+            on_checkpoint=on_checkpoint,
+        )
+        rmse = model.evaluate(
+            x=x_test, y=y_test, batch_size=self.training_config.batch_size
+        )[1]
+
+        compiled_model = self.__export_model(
+            model,
+            input_features=input_features,
+            description="global climate generative model",
+        )
+
+        # the widest range of each part among the locations
+        train_start_year, train_start_month = min(split[0].index[0] for split in splits)
+        train_end_year, train_end_month = max(split[0].index[-1] for split in splits)
+        validation_start_year, validation_start_month = min(
+            split[1].index[0] for split in splits
+        )
+        validation_end_year, validation_end_month = max(
+            split[1].index[-1] for split in splits
+        )
+        test_start_year, test_start_month = min(split[2].index[0] for split in splits)
+        test_end_year, test_end_month = max(split[2].index[-1] for split in splits)
 
         return ClimateGenerativeModelDTO(
             id=uuid.uuid4(),
+            location_id=None,
+            model=model,
+            x_scaler=x_scaler,
+            y_scaler=y_scaler,
+            rmse=rmse,
+            train_start_year=train_start_year,
+            train_start_month=train_start_month,
+            train_end_year=train_end_year,
+            train_end_month=train_end_month,
+            validation_start_year=validation_start_year,
+            validation_start_month=validation_start_month,
+            validation_end_year=validation_end_year,
+            validation_end_month=validation_end_month,
+            test_start_year=test_start_year,
+            test_start_month=test_start_month,
+            test_end_year=test_end_year,
+            test_end_month=test_end_month,
+            compiled_model=compiled_model,
+            kind="global",
+            training_history=training_history,
+        )
+
+    def __fine_tune_model(
+        self,
+        global_model: ClimateGenerativeModelDTO,
+        location_id: UUID,
+        location_features: np.ndarray,
+        past_climate_data_df: pd.DataFrame,
+        on_epoch_end: EpochEndCallback | None = None,
+        checkpoint: TrainingCheckpoint | None = None,
+        on_checkpoint: Callable[[TrainingCheckpoint], None] | None = None,
+    ) -> ClimateGenerativeModelDTO:
+        """Trains a copy of the global model for training_config.fine_tune_epochs on the location, with
+        the scalers of the global model."""
+        from keras.src.models import clone_model
+
+        set_threads(self.training_config.threads)
+        if checkpoint is not None:
+            model = checkpoint.model
+        else:
+            global_keras_model = cast("Sequential", global_model.model)
+            model = clone_model(global_keras_model)
+            model.set_weights(global_keras_model.get_weights())
+            compile_model(
+                model, learning_rate=self.training_config.fine_tune_learning_rate
+            )
+
+        past_climate_data_df = add_sin_cos_year(past_climate_data_df)[
+            FEATURES_WITH_SIN_COS
+        ]
+        parts = split_train_validation_test(past_climate_data_df)
+        windows: list[tuple[np.ndarray, np.ndarray]] = []
+        for df in parts:
+            x, y = ClimateGenerativeModelRepository.format_data(
+                x=cast(np.ndarray, global_model.x_scaler.transform(df.to_numpy())),
+                y=cast(np.ndarray, global_model.y_scaler.transform(df[TARGET].to_numpy())),
+            )
+            windows.append((add_location_features(x, location_features), y))
+        (x_train, y_train), (x_val, y_val), (x_test, y_test) = windows
+
+        training_history = fit_model(
+            model,
+            x=x_train,
+            y=y_train,
+            validation_data=(x_val, y_val),
+            epochs=self.training_config.fine_tune_epochs,
+            config=self.training_config,
+            on_epoch_end=on_epoch_end,
+            checkpoint=checkpoint,
+            on_checkpoint=on_checkpoint,
+        )
+        rmse = model.evaluate(
+            x=x_test, y=y_test, batch_size=self.training_config.batch_size
+        )[1]
+
+        compiled_model = self.__export_model(
+            model,
+            input_features=len(FEATURES_WITH_SIN_COS) + len(LOCATION_FEATURES),
+            description=f"fine tuned climate generative model of location {location_id}",
+        )
+
+        train_df, val_df, test_df = parts
+        train_start_year, train_start_month = train_df.index[0]
+        train_end_year, train_end_month = train_df.index[-1]
+        validation_start_year, validation_start_month = val_df.index[0]
+        validation_end_year, validation_end_month = val_df.index[-1]
+        test_start_year, test_start_month = test_df.index[0]
+        test_end_year, test_end_month = test_df.index[-1]
+
+        return ClimateGenerativeModelDTO(
+            id=uuid.uuid4(),
+            location_id=location_id,
+            model=model,
+            x_scaler=global_model.x_scaler,
+            y_scaler=global_model.y_scaler,
+            rmse=rmse,
+            train_start_year=train_start_year,
+            train_start_month=train_start_month,
+            train_end_year=train_end_year,
+            train_end_month=train_end_month,
+            validation_start_year=validation_start_year,
+            validation_start_month=validation_start_month,
+            validation_end_year=validation_end_year,
+            validation_end_month=validation_end_month,
+            test_start_year=test_start_year,
+            test_start_month=test_start_month,
+            test_end_year=test_end_year,
+            test_end_month=test_end_month,
+            compiled_model=compiled_model,
+            kind="fine_tuned",
+            location_features=location_features,
+            training_history=training_history,
+        )
+
+    async def __run_training(
+        self,
+        session: AsyncSession,
+        kind: ClimateGenerativeModelKind,
+        location_id: UUID | None,
+        data_fingerprint: str,
+        train: Callable[
+            [
+                TrainingCheckpoint | None,
+                Callable[[TrainingCheckpoint], None],
+            ],
+            TrainingResult,
+        ],
+    ) -> TrainingResult:
+        """Runs train in a thread, resuming the checkpoint of the last training of the
+        same kind, location and data and persisting a new one after each epoch.
+
+        Each checkpoint is committed, so that it survives the process. The training is
+        stopped by raising from its callbacks, cancelling the await doesn't stop the thread.
+        """
+        checkpoint = await self.__get_training_checkpoint(
+            session=session,
+            kind=kind,
             location_id=location_id,
+            data_fingerprint=data_fingerprint,
+        )
+        if checkpoint is not None:
+            logging.info(
+                f"Resuming the training of the {kind} climate generative model of location {location_id} after epoch {checkpoint.epoch}"
+            )
+
+        loop = asyncio.get_running_loop()
+
+        def on_checkpoint(checkpoint: TrainingCheckpoint):
+            # serialized in the training thread, saved in the event loop
+            data = object_to_bytes(checkpoint)
+            asyncio.run_coroutine_threadsafe(
+                self.__save_training_checkpoint(
+                    session=session,
+                    kind=kind,
+                    location_id=location_id,
+                    data_fingerprint=data_fingerprint,
+                    epoch=checkpoint.epoch,
+                    data=data,
+                ),
+                loop,
+            ).result()
+
+        # the default executor, leaving a with ThreadPoolExecutor block would wait on the
+        # event loop for the training thread, that waits on the event loop to save
+        # its checkpoints
+        return await loop.run_in_executor(
+            None, lambda: train(checkpoint, on_checkpoint)
+        )
+
+    async def __get_training_checkpoint(
+        self,
+        session: AsyncSession,
+        kind: ClimateGenerativeModelKind,
+        location_id: UUID | None,
+        data_fingerprint: str,
+    ) -> TrainingCheckpoint | None:
+        data = await session.scalar(
+            select(ClimateGenerativeModelCheckpoint.checkpoint).where(
+                ClimateGenerativeModelCheckpoint.kind == kind,
+                ClimateGenerativeModelCheckpoint.location_id == location_id,
+                ClimateGenerativeModelCheckpoint.data_fingerprint == data_fingerprint,
+            )
+        )
+        if data is None:
+            return None
+        try:
+            return bytes_to_object(data)
+        except Exception:
+            logging.warning(
+                f"Can't load the checkpoint of the {kind} climate generative model of location {location_id}, training from the start",
+                exc_info=True,
+            )
+            return None
+
+    async def __save_training_checkpoint(
+        self,
+        session: AsyncSession,
+        kind: ClimateGenerativeModelKind,
+        location_id: UUID | None,
+        data_fingerprint: str,
+        epoch: int,
+        data: bytes,
+    ):
+        await self.__delete_training_checkpoint(
+            session=session, kind=kind, location_id=location_id
+        )
+        await session.execute(
+            insert(ClimateGenerativeModelCheckpoint).values(
+                id=uuid.uuid4(),
+                kind=kind,
+                location_id=location_id,
+                data_fingerprint=data_fingerprint,
+                epoch=epoch,
+                checkpoint=data,
+                updated_at=datetime.now(tz=timezone.utc).replace(tzinfo=None),
+            )
+        )
+        await session.commit()
+
+    async def __delete_training_checkpoint(
+        self,
+        session: AsyncSession,
+        kind: ClimateGenerativeModelKind,
+        location_id: UUID | None,
+    ):
+        await session.execute(
+            delete(ClimateGenerativeModelCheckpoint).where(
+                ClimateGenerativeModelCheckpoint.kind == kind,
+                # IS NULL for the global model
+                ClimateGenerativeModelCheckpoint.location_id == location_id,
+            )
+        )
+
+    async def create_global_model(
+        self, session: AsyncSession, on_epoch_end: EpochEndCallback | None = None
+    ) -> ClimateGenerativeModelDTO:
+        """Trains the global model on every location with past climate data and
+        replaces the previous one. The models of the locations are kept, fine tune them
+        again with create_model_for_location to base them on the new one.
+
+        Args:
+            on_epoch_end (EpochEndCallback | None, optional): called from the training thread
+
+        Raises:
+            PastClimateDataNotFoundError: if no location has enough past climate data
+        """
+        past_climate_data_dfs: list[tuple[pd.DataFrame, np.ndarray]] = []
+        for location_climate_years in await self.past_climate_data_repository.get_unique_location_climate_years(
+            session=session
+        ):
+            location = await self.location_repository.get_location_by_id(
+                session=session, location_id=location_climate_years.location_id
+            )
+            if location is None:
+                continue
+            past_climate_data_dfs.append(
+                (
+                    await self.past_climate_data_repository.get_all_past_climate_data_df(
+                        session=session, location_id=location.id
+                    ),
+                    get_location_features(
+                        latitude=location.latitude, longitude=location.longitude
+                    ),
+                )
+            )
+
+        climate_generative_model = await self.__run_training(
+            session=session,
+            kind="global",
+            location_id=None,
+            data_fingerprint=get_data_fingerprint(
+                [df for df, _ in past_climate_data_dfs],
+                [features.tolist() for _, features in past_climate_data_dfs],
+            ),
+            train=lambda checkpoint, on_checkpoint: self.__train_global_model(
+                past_climate_data_dfs=past_climate_data_dfs,
+                on_epoch_end=on_epoch_end,
+                checkpoint=checkpoint,
+                on_checkpoint=on_checkpoint,
+            ),
+        )
+
+        await self.__save_climate_generative_model(
+            session=session, climate_generative_model=climate_generative_model
+        )
+
+        return climate_generative_model
+
+    def __refresh_model(
+        self,
+        climate_generative_model: ClimateGenerativeModelDTO,
+        past_climate_data_df: pd.DataFrame,
+        new_months: int,
+        on_epoch_end: EpochEndCallback | None = None,
+        checkpoint: TrainingCheckpoint | None = None,
+        on_checkpoint: Callable[[TrainingCheckpoint], None] | None = None,
+    ) -> ClimateGenerativeModelDTO | None:
+        """Trains a copy of the model for training_config.refresh_epochs on the last
+        training_config.refresh_window_months, that include the new months.
+
+        Args:
+            climate_generative_model (ClimateGenerativeModelDTO): with the Keras model
+            past_climate_data_df (pd.DataFrame): all the past climate data of the location
+            new_months (int): the last months of past_climate_data_df the model wasn't trained on
+
+        Returns:
+            ClimateGenerativeModelDTO | None: None if the model got worse on the new
+                months, so that it has to be trained from scratch
+        """
+        from keras.src.models import clone_model
+
+        config = self.training_config
+        df = add_sin_cos_year(past_climate_data_df)[FEATURES_WITH_SIN_COS]
+        location_features = climate_generative_model.location_features
+
+        if checkpoint is None:
+            # rmse on the windows that end in the new months, scaled like the test rmse
+            recent_df = df[-new_months - SEQ_LENGTH :]
+            x, y = ClimateGenerativeModelRepository.format_data(
+                x=cast(
+                    np.ndarray,
+                    climate_generative_model.x_scaler.transform(recent_df.to_numpy()),
+                ),
+                y=cast(
+                    np.ndarray,
+                    climate_generative_model.y_scaler.transform(
+                        recent_df[TARGET].to_numpy()
+                    ),
+                ),
+            )
+            if len(x) > 0:
+                predictions = get_predictor(climate_generative_model)(
+                    add_location_features(gather_windows(x), location_features)
+                )
+                rmse = float(np.sqrt(np.mean((predictions - y) ** 2)))
+                if rmse > climate_generative_model.rmse * (
+                    1 + config.degradation_threshold
+                ):
+                    logging.info(
+                        f"Climate generative model {climate_generative_model.id} has rmse {rmse} on the new months and {climate_generative_model.rmse} on its test data"
+                    )
+                    return None
+
+        window_df = df[-config.refresh_window_months :]
+        x_scaler = copy.deepcopy(climate_generative_model.x_scaler)
+        y_scaler = copy.deepcopy(climate_generative_model.y_scaler)
+        drift = max(
+            get_scaler_drift(x_scaler, window_df.to_numpy()),
+            get_scaler_drift(y_scaler, window_df[TARGET].to_numpy()),
+        )
+        if drift > config.scaler_drift_threshold:
+            # the running mean and variance of the scalers take in the new months
+            new_df = df[-new_months:]
+            x_scaler.partial_fit(new_df.to_numpy())
+            y_scaler.partial_fit(new_df[TARGET].to_numpy())
+            logging.info(
+                f"Updated the scalers of climate generative model {climate_generative_model.id}, drift: {drift}"
+            )
+
+        set_threads(config.threads)
+        if checkpoint is not None:
+            model = checkpoint.model
+        else:
+            keras_model = cast("Sequential", climate_generative_model.model)
+            model = clone_model(keras_model)
+            model.set_weights(keras_model.get_weights())
+            compile_model(model, learning_rate=config.fine_tune_learning_rate)
+
+        parts = split_train_validation_test(window_df)
+        windows: list[tuple[np.ndarray, np.ndarray]] = []
+        for part_df in parts:
+            x, y = ClimateGenerativeModelRepository.format_data(
+                x=cast(np.ndarray, x_scaler.transform(part_df.to_numpy())),
+                y=cast(np.ndarray, y_scaler.transform(part_df[TARGET].to_numpy())),
+            )
+            windows.append((add_location_features(x, location_features), y))
+        (x_train, y_train), (x_val, y_val), (x_test, y_test) = windows
+
+        training_history = fit_model(
+            model,
+            x=x_train,
+            y=y_train,
+            validation_data=(x_val, y_val),
+            epochs=config.refresh_epochs,
+            config=config,
+            on_epoch_end=on_epoch_end,
+            checkpoint=checkpoint,
+            on_checkpoint=on_checkpoint,
+        )
+        rmse = model.evaluate(x=x_test, y=y_test, batch_size=config.batch_size)[1]
+
+        compiled_model = self.__export_model(
+            model,
+            input_features=get_input_features(climate_generative_model),
+            description=f"refreshed climate generative model of location {climate_generative_model.location_id}",
+        )
+
+        train_df, val_df, test_df = parts
+        train_start_year, train_start_month = train_df.index[0]
+        train_end_year, train_end_month = train_df.index[-1]
+        validation_start_year, validation_start_month = val_df.index[0]
+        validation_end_year, validation_end_month = val_df.index[-1]
+        test_start_year, test_start_month = test_df.index[0]
+        test_end_year, test_end_month = test_df.index[-1]
+
+        return replace(
+            climate_generative_model,
+            id=uuid.uuid4(),
             model=model,
             x_scaler=x_scaler,
             y_scaler=y_scaler,
@@ -239,19 +1070,131 @@ class ClimateGenerativeModelRepository:
             test_start_month=test_start_month,
             test_end_year=test_end_year,
             test_end_month=test_end_month,
+            compiled_model=compiled_model,
+            training_history=training_history,
+            refreshed_at=datetime.now(tz=timezone.utc).replace(tzinfo=None),
         )
 
+    async def refresh_model_for_location(
+        self,
+        session: AsyncSession,
+        location_id: UUID,
+        on_epoch_end: EpochEndCallback | None = None,
+    ) -> ClimateGenerativeModelDTO:
+        """Updates the model of the location with the months of past climate data that
+        arrived after its training, starting from its weights.
+
+        Falls back to create_model_for_location when the location has no model of the
+        configured kind, when refreshes are disabled, when the model was trained from
+        scratch more than training_config.full_retrain_days ago or when its error on
+        the new months degraded.
+
+        Args:
+            on_epoch_end (EpochEndCallback | None, optional): called from the training thread
+
+        Raises:
+            LocationNotFoundError:
+        """
+        config = self.training_config
+        stored_model = await session.scalar(
+            select(ClimateGenerativeModel).where(
+                ClimateGenerativeModel.location_id == location_id
+            )
+        )
+        now = datetime.now(tz=timezone.utc).replace(tzinfo=None)
+        reason: str | None = None
+        if config.refresh_epochs == 0:
+            reason = "refreshes are disabled"
+        elif stored_model is None:
+            reason = "it has no model"
+        elif stored_model.kind != (
+            "fine_tuned" if self.model_kind == "global" else "location"
+        ):
+            reason = f"its model is {stored_model.kind}"
+        elif stored_model.trained_at is None or now - stored_model.trained_at > timedelta(
+            days=config.full_retrain_days
+        ):
+            reason = "its model is due for a training from scratch"
+        if stored_model is None or reason is not None:
+            logging.info(
+                f"Training the climate generative model of location {location_id} from scratch, {reason}"
+            )
+            return await self.create_model_for_location(
+                session=session, location_id=location_id, on_epoch_end=on_epoch_end
+            )
+
+        past_climate_data_df = (
+            await self.past_climate_data_repository.get_all_past_climate_data_df(
+                session=session, location_id=location_id
+            )
+        )
+        last_trained_month = (stored_model.test_end_year, stored_model.test_end_month)
+        new_months = sum(
+            1 for index in past_climate_data_df.index if index > last_trained_month
+        )
+        climate_generative_model = self.__load_climate_generative_model(
+            climate_generative_model=stored_model,
+            location_features=(
+                await self.__get_location_features(
+                    session=session, location_id=location_id
+                )
+                if stored_model.kind == "fine_tuned"
+                else None
+            ),
+            with_keras_model=True,
+        )
+        if new_months == 0:
+            logging.info(
+                f"The climate generative model of location {location_id} is up to date"
+            )
+            return climate_generative_model
+
+        refreshed_model = await self.__run_training(
+            session=session,
+            kind=climate_generative_model.kind,
+            location_id=location_id,
+            data_fingerprint=get_data_fingerprint(
+                [past_climate_data_df], "refresh", climate_generative_model.id
+            ),
+            train=lambda checkpoint, on_checkpoint: self.__refresh_model(
+                climate_generative_model=climate_generative_model,
+                past_climate_data_df=past_climate_data_df,
+                new_months=new_months,
+                on_epoch_end=on_epoch_end,
+                checkpoint=checkpoint,
+                on_checkpoint=on_checkpoint,
+            ),
+        )
+        if refreshed_model is None:
+            logging.info(
+                f"Training the climate generative model of location {location_id} from scratch, its error on the new months degraded"
+            )
+            return await self.create_model_for_location(
+                session=session, location_id=location_id, on_epoch_end=on_epoch_end
+            )
+
+        await self.__save_climate_generative_model(
+            session=session, climate_generative_model=refreshed_model
+        )
+        return refreshed_model
+
     async def create_model_for_location(
         self,
         session: AsyncSession,
         location_id: UUID,
+        on_epoch_end: EpochEndCallback | None = None,
     ) -> ClimateGenerativeModelDTO:
         """Creates as Sequential model
 
+        With the global model kind, fine tunes the global model on the location instead,
+        or with 0 training_config.fine_tune_epochs removes the model of the location so that the global
+        one is used. Without a global model, trains one for the location.
+
         Args:
             location_repository (LocationRepository):
             past_climate_data_repository (PastClimateDataRepository):
             location_id (UUID):
+            on_epoch_end (EpochEndCallback | None, optional): called from the training thread
 
         Raises:
             LocationNotFoundError:
@@ -262,20 +1205,64 @@ class ClimateGenerativeModelRepository:
         if location is None:
             raise LocationNotFoundError()
 
-        past_climate_data_df = PastClimateDataDTO.from_list_to_dataframe(
-            await self.past_climate_data_repository.get_all_past_climate_data(
+        global_model: ClimateGenerativeModelDTO | None = None
+        if self.model_kind == "global":
+            global_model = await self.__get_global_model(
+                session=session, with_keras_model=self.training_config.fine_tune_epochs > 0
+            )
+            if global_model is None:
+                logging.warning(
+                    f"There is no global climate generative model, training a model for location {location_id}"
+                )
+        location_features = get_location_features(
+            latitude=location.latitude, longitude=location.longitude
+        )
+        if global_model is not None and self.training_config.fine_tune_epochs == 0:
+            await self.delete_climate_generative_model(
+                session=session, location_id=location_id
+            )
+            return replace(
+                global_model,
+                location_id=location_id,
+                location_features=location_features,
+            )
+
+        past_climate_data_df = (
+            await self.past_climate_data_repository.get_all_past_climate_data_df(
                 session=session, location_id=location.id
             )
         )
 
-        # train in thread
-        loop = asyncio.get_running_loop()
-        with ThreadPoolExecutor() as pool:
-            climate_generative_model = await loop.run_in_executor(
-                executor=pool,
-                func=lambda: self.__train_model(
+        if global_model is not None:
+            climate_generative_model = await self.__run_training(
+                session=session,
+                kind="fine_tuned",
+                location_id=location_id,
+                data_fingerprint=get_data_fingerprint(
+                    [past_climate_data_df], global_model.id
+                ),
+                train=lambda checkpoint, on_checkpoint: self.__fine_tune_model(
+                    global_model=cast(ClimateGenerativeModelDTO, global_model),
                     location_id=location_id,
+                    location_features=location_features,
                     past_climate_data_df=past_climate_data_df,
+                    on_epoch_end=on_epoch_end,
+                    checkpoint=checkpoint,
+                    on_checkpoint=on_checkpoint,
+                ),
+            )
+        else:
+            climate_generative_model = await self.__run_training(
+                session=session,
+                kind="location",
+                location_id=location_id,
+                data_fingerprint=get_data_fingerprint([past_climate_data_df]),
+                train=lambda checkpoint, on_checkpoint: self.__train_model(
+                    location_id=location_id,
+                    past_climate_data_df=past_climate_data_df,
+                    on_epoch_end=on_epoch_end,
+                    checkpoint=checkpoint,
+                    on_checkpoint=on_checkpoint,
                 ),
             )
 
@@ -285,25 +1272,16 @@ class ClimateGenerativeModelRepository:
 
         return climate_generative_model
 
-    def generate_data_from_seed(
-        self,
-        model: Sequential,
-        x_scaler: StandardScaler,
-        y_scaler: StandardScaler,
-        seed_data_df: pd.DataFrame,
-        future_climate_data_df: pd.DataFrame,
-    ) -> pd.DataFrame:
-        """Generates climate data for year, month > seed_data.
-
-        Args:
-            model (Sequential):
-            x_scaler (StandardScaler):
-            y_scaler (StandardScaler):
-            seed_data (np.ndarray):
-            future_climate_data_df (pd.DataFrame): future data that has to start from the month after seed_data
+    @staticmethod
+    def check_seed_and_future_data(
+        seed_data_df: pd.DataFrame, future_climate_data_df: pd.DataFrame
+    ):
+        """Checks that the seed has SEQ_LENGTH months and that the future data starts
+        from the month after the seed.
 
-        Returns:
-            pd.DataFrame:
+        Raises:
+            ValueError: if the seed has the wrong length or the future data is empty
+            IndexError: if the future data doesn't start from the month after the seed
         """
         if len(seed_data_df) != SEQ_LENGTH:
             raise ValueError(f"Seed data must have length of {SEQ_LENGTH}")
@@ -337,58 +1315,251 @@ class ClimateGenerativeModelRepository:
                 f"Future climate data must start from the month after seed data. Seed data: {last_seed_year}-{last_seed_month}. Future data: {first_future_year}-{first_future_month}"
             )
 
+    @staticmethod
+    def generate_data_from_seed(
+        model: Sequential | None,
+        x_scaler: StandardScaler,
+        y_scaler: StandardScaler,
+        seed_data_df: pd.DataFrame,
+        future_climate_data_df: pd.DataFrame,
+        compiled_model: CompiledModel | None = None,
+        location_features: np.ndarray | None = None,
+    ) -> pd.DataFrame:
+        """Generates climate data for year, month > seed_data.
+
+        Args:
+            model (Sequential | None): can be None if compiled_model is provided
+            x_scaler (StandardScaler):
+            y_scaler (StandardScaler):
+            seed_data (np.ndarray):
+            future_climate_data_df (pd.DataFrame): future data that has to start from the month after seed_data
+            compiled_model (CompiledModel | None, optional): used instead of model when provided
+            location_features (np.ndarray | None, optional): for global and fine tuned models
+
+        Returns:
+            pd.DataFrame:
+        """
+        ClimateGenerativeModelRepository.check_seed_and_future_data(
+            seed_data_df=seed_data_df, future_climate_data_df=future_climate_data_df
+        )
+
         seed_data_df = add_sin_cos_year(seed_data_df)
-        seed_data_df = seed_data_df[FEATURES_WITH_SIN_COS]
+        seed = seed_data_df[FEATURES_WITH_SIN_COS].to_numpy(dtype=np.float64)
         future_climate_data_df = add_sin_cos_year(future_climate_data_df)
-        future_climate_data_df = future_climate_data_df[
-            MODEL_CMIP5_VARIABLES_WITH_SIN_COS
-        ]
-        generated_data = []
-        # shape (SEQ_LENGHT, len(FEATURES))
-        current_step = seed_data_df.to_numpy()
-        year_col: list[int] = []
-        month_col: list[int] = []
-        for index, row in future_climate_data_df.iterrows():
-            year, month = cast(pd.MultiIndex, index)
-            year_col.append(year)
-            month_col.append(month)
-            if len(TARGET) == 0:
-                generated_data.append(row.to_numpy())
-                continue
-            # shape (SEQ_LENGHT, len(FEATURES))
-            scaled_current_step = cast(
-                np.ndarray,
-                x_scaler.transform(current_step),
-            )
+        future = future_climate_data_df[MODEL_CMIP5_VARIABLES_WITH_SIN_COS].to_numpy(
+            dtype=np.float64
+        )
 
-            # shape (len(TARGET),)
-            scaled_prediction = cast(
-                np.ndarray, model(np.array([scaled_current_step]))
-            )[0]
+        # the output is allocated once, each month writes its prediction
+        # and its future data in its row
+        # shape (len(future), len(FEATURES_WITH_SIN_COS))
+        generated_data = np.empty((len(future), len(FEATURES_WITH_SIN_COS)))
+        generated_data[:, len(TARGET) :] = future
+        predict = compiled_model if compiled_model is not None else model
+        if predict is None:
+            raise ValueError("Either model or compiled_model must be provided")
+        if len(TARGET) > 0:
+            x_mean, x_scale = get_scaler_mean_and_scale(x_scaler, dtype=np.float64)
+            # float32 like the model output, as y_scaler.inverse_transform casts them
+            # to the dtype of its input
+            y_mean, y_scale = get_scaler_mean_and_scale(y_scaler, dtype=np.float32)
+
+            # ring buffer of the scaled window, each row is written twice, at slot
+            # and slot + SEQ_LENGTH, so that the last SEQ_LENGTH months are always
+            # the contiguous slice [slot, slot + SEQ_LENGTH)
+            # shape (2 * SEQ_LENGTH, len(FEATURES_WITH_SIN_COS))
+            window = np.empty((2 * SEQ_LENGTH, len(FEATURES_WITH_SIN_COS)))
+            np.subtract(seed, x_mean, out=window[:SEQ_LENGTH])
+            window[:SEQ_LENGTH] /= x_scale
+            window[SEQ_LENGTH:] = window[:SEQ_LENGTH]
+            # slot of the oldest month, overwritten by the next one
+            slot = 0
+            for i in range(len(future)):
+                # shape (1, SEQ_LENGTH, len(FEATURES_WITH_SIN_COS))
+                scaled_current_step = window[None, slot : slot + SEQ_LENGTH]
+
+                # shape (len(TARGET),), copied as the output of an eager model is
+                # read only and it is inverse transformed in place
+                prediction = np.array(
+                    np.asarray(
+                        predict(
+                            add_location_features(
+                                scaled_current_step, location_features
+                            )
+                        )
+                    )[0],
+                    dtype=np.float32,
+                )
+                prediction *= y_scale
+                prediction += y_mean
+                generated_data[i, : len(TARGET)] = prediction
+
+                np.subtract(generated_data[i], x_mean, out=window[slot])
+                window[slot] /= x_scale
+                window[slot + SEQ_LENGTH] = window[slot]
+                slot = (slot + 1) % SEQ_LENGTH
+
+        return pd.DataFrame(
+            data=generated_data,
+            columns=FEATURES_WITH_SIN_COS,
+            index=future_climate_data_df.index,
+        )
 
-            # shape (len(TARGET),)
-            prediction = cast(
-                np.ndarray, y_scaler.inverse_transform(np.array([scaled_prediction]))
-            )[0]
+    @staticmethod
+    def generate_data_from_seeds(
+        climate_generative_models: list[ClimateGenerativeModelDTO],
+        seed_data_dfs: list[pd.DataFrame],
+        future_climate_data_dfs: list[pd.DataFrame],
+    ) -> list[pd.DataFrame]:
+        """Batched generate_data_from_seed, the windows of all the locations advance together.
+
+        Models with the same architecture are wrapped in one multi input model, so each
+        month costs one forward pass per architecture instead of one per location.
+        The locations forecast by the global model run as one batch of it.
+        A location whose future data is shorter than the others stops early.
 
-            # shape (len(FEATURES),)
-            enriched_prediction = np.concatenate([prediction, row.to_numpy()], axis=0)
-            generated_data.append(enriched_prediction)
+        Args:
+            climate_generative_models (list[ClimateGenerativeModelDTO]): model of each location
+            seed_data_dfs (list[pd.DataFrame]): seed of each location
+            future_climate_data_dfs (list[pd.DataFrame]): future data of each location
 
-            current_step = np.concatenate(
-                [current_step[1:], np.array([enriched_prediction])]
+        Returns:
+            list[pd.DataFrame]: generated data of each location, same as generate_data_from_seed
+        """
+        if not (
+            len(climate_generative_models)
+            == len(seed_data_dfs)
+            == len(future_climate_data_dfs)
+        ):
+            raise ValueError("One model, seed and future data is needed per location")
+        for seed_data_df, future_climate_data_df in zip(
+            seed_data_dfs, future_climate_data_dfs
+        ):
+            ClimateGenerativeModelRepository.check_seed_and_future_data(
+                seed_data_df=seed_data_df, future_climate_data_df=future_climate_data_df
             )
-        result = pd.DataFrame(data=generated_data, columns=FEATURES_WITH_SIN_COS)
-        result["year"] = year_col
-        result["month"] = month_col
+        if len(climate_generative_models) == 0:
+            return []
+
+        # shape (locations, SEQ_LENGTH, len(FEATURES_WITH_SIN_COS))
+        windows = np.stack(
+            [
+                add_sin_cos_year(seed_data_df)[FEATURES_WITH_SIN_COS].to_numpy(
+                    dtype=np.float64
+                )
+                for seed_data_df in seed_data_dfs
+            ]
+        )
+        futures = [
+            add_sin_cos_year(future_climate_data_df)[
+                MODEL_CMIP5_VARIABLES_WITH_SIN_COS
+            ].to_numpy(dtype=np.float64)
+            for future_climate_data_df in future_climate_data_dfs
+        ]
+        lengths = np.array([len(future) for future in futures])
+        # shape (locations, max(lengths), len(MODEL_CMIP5_VARIABLES_WITH_SIN_COS))
+        padded_futures = np.zeros(
+            (len(futures), int(lengths.max()), len(MODEL_CMIP5_VARIABLES_WITH_SIN_COS))
+        )
+        for i, future in enumerate(futures):
+            padded_futures[i, : len(future)] = future
+
+        # shape (locations, len(FEATURES_WITH_SIN_COS)) and (locations, len(TARGET)),
+        # y stats are float32 like the model output, as y_scaler.inverse_transform
+        # casts them to the dtype of its input
+        x_means, x_scales = (
+            np.stack(stats)
+            for stats in zip(
+                *(
+                    get_scaler_mean_and_scale(m.x_scaler, dtype=np.float64)
+                    for m in climate_generative_models
+                )
+            )
+        )
+        y_means, y_scales = (
+            np.stack(stats)
+            for stats in zip(
+                *(
+                    get_scaler_mean_and_scale(m.y_scaler, dtype=np.float32)
+                    for m in climate_generative_models
+                )
+            )
+        )
 
-        result = result.set_index(keys=["year", "month"], drop=True)
+        groups: dict[tuple, list[int]] = {}
+        for i, climate_generative_model in enumerate(climate_generative_models):
+            key = (
+                ("global", climate_generative_model.id)
+                if climate_generative_model.kind == "global"
+                else get_model_signature(climate_generative_model)
+            )
+            groups.setdefault(key, []).append(i)
+        # indexes of the locations, their model and their location features
+        stacked_models: list[
+            tuple[np.ndarray, Callable[[np.ndarray], np.ndarray], np.ndarray | None]
+        ] = []
+        for key, indexes in groups.items():
+            group = [climate_generative_models[i] for i in indexes]
+            stacked_models.append(
+                (
+                    np.array(indexes),
+                    (
+                        get_predictor(group[0])
+                        if key[0] == "global"
+                        else stack_models(group)
+                    ),
+                    (
+                        np.stack(
+                            [cast(np.ndarray, m.location_features) for m in group]
+                        )
+                        if group[0].location_features is not None
+                        else None
+                    ),
+                )
+            )
 
-        return result
+        generated_data = np.zeros(
+            (len(futures), int(lengths.max()), len(FEATURES_WITH_SIN_COS))
+        )
+        for step in range(int(lengths.max())):
+            scaled_windows = (windows - x_means[:, None, :]) / x_scales[:, None, :]
+            scaled_predictions = np.zeros((len(futures), len(TARGET)), dtype=np.float32)
+            for indexes, stacked_model, location_features in stacked_models:
+                scaled_predictions[indexes] = stacked_model(
+                    add_location_features(scaled_windows[indexes], location_features)
+                )
+            # inverse transform in place, the same operations of y_scaler.inverse_transform
+            predictions = scaled_predictions
+            predictions *= y_scales
+            predictions += y_means
+
+            # shape (locations, len(FEATURES_WITH_SIN_COS))
+            enriched_predictions = np.concatenate(
+                [predictions, padded_futures[:, step]], axis=1
+            )
+            generated_data[:, step] = enriched_predictions
+            windows = np.concatenate(
+                [windows[:, 1:], enriched_predictions[:, None, :]], axis=1
+            )
 
-    async def generate_climate_data_from_last_past_climate_data(
+        results: list[pd.DataFrame] = []
+        for i, future_climate_data_df in enumerate(future_climate_data_dfs):
+            result = pd.DataFrame(
+                data=generated_data[i, : lengths[i]],
+                columns=FEATURES_WITH_SIN_COS,
+                index=future_climate_data_df.index,
+            )
+            results.append(result)
+        return results
+
+    async def __get_forecast_inputs(
         self, session: AsyncSession, location_id: UUID, months: int
-    ) -> list[ClimateDataDTO]:
+    ) -> tuple[ClimateGenerativeModelDTO, pd.DataFrame, pd.DataFrame]:
+        """Loads what is needed to forecast the months after the last past climate data.
+
+        Returns:
+            tuple[ClimateGenerativeModelDTO, pd.DataFrame, pd.DataFrame]: model, seed data, future climate data
+        """
         location = await self.location_repository.get_location_by_id(
             session=session, location_id=location_id
         )
@@ -403,8 +1574,8 @@ class ClimateGenerativeModelRepository:
         if climate_generative_model is None:
             raise ClimateGenerativeModelNotFoundError()
 
-        last_n_months_seed_data = PastClimateDataDTO.from_list_to_dataframe(
-            await self.past_climate_data_repository.get_past_climate_data_of_previous_n_months(
+        last_n_months_seed_data = (
+            await self.past_climate_data_repository.get_past_climate_data_of_previous_n_months_df(
                 session=session,
                 location_id=location_id,
                 n=SEQ_LENGTH,
@@ -435,6 +1606,195 @@ class ClimateGenerativeModelRepository:
                 month_to=month_to,
             )
         )
+        return climate_generative_model, last_n_months_seed_data, future_climate_data_df
+
+    @staticmethod
+    def __to_climate_data(
+        location_id: UUID, data: pd.DataFrame, future_climate_data_df: pd.DataFrame
+    ) -> ClimateSeries:
+        return ClimateSeries.from_dataframe(
+            location_id=location_id,
+            df=data.set_axis(future_climate_data_df.index, axis=0),
+        )
+
+    async def __get_forecast_key(
+        self, session: AsyncSession, location_id: UUID, months: int
+    ) -> ForecastKey | None:
+        """Key of the forecast the location would get now, without loading the model.
+
+        Returns:
+            ForecastKey | None: None if the location has no model or no past climate data
+        """
+        model_id = await session.scalar(
+            select(ClimateGenerativeModel.id).where(
+                ClimateGenerativeModel.location_id == location_id
+            )
+        )
+        if model_id is None and self.model_kind == "global":
+            model_id = await session.scalar(
+                select(ClimateGenerativeModel.id).where(
+                    ClimateGenerativeModel.kind == "global"
+                )
+            )
+        if model_id is None:
+            return None
+        try:
+            last_past_climate_data = (
+                await self.past_climate_data_repository.get_past_climate_data_of_previous_n_months(
+                    session=session, location_id=location_id, n=1
+                )
+            )[0]
+        except PastClimateDataNotFoundError:
+            return None
+        return (
+            location_id,
+            model_id,
+            last_past_climate_data.year,
+            last_past_climate_data.month,
+            months,
+        )
+
+    async def __get_cached_forecast(
+        self, session: AsyncSession, key: ForecastKey
+    ) -> ClimateForecastDTO | None:
+        """The forecast of the key from the forecast cache or the climate_forecast table.
+
+        The table is checked anyway, an entry of the forecast cache is used only while
+        its row exists, so that the invalidations of other processes apply to this one.
+        """
+        location_id, model_id, seed_year, seed_month, months = key
+        forecast_id = await session.scalar(
+            select(ClimateForecast.id).where(
+                ClimateForecast.location_id == location_id,
+                ClimateForecast.climate_generative_model_id == model_id,
+                ClimateForecast.seed_year == seed_year,
+                ClimateForecast.seed_month == seed_month,
+                ClimateForecast.months == months,
+            )
+        )
+        if forecast_id is None:
+            return None
+        cached = self.forecast_cache.get(key)
+        if cached is not None and cached[0] == forecast_id:
+            return ClimateForecastDTO(
+                location_id=location_id, id=forecast_id, forecast=cached[1]
+            )
+        data = await session.scalar(
+            select(ClimateForecast.forecast).where(ClimateForecast.id == forecast_id)
+        )
+        if data is None:
+            return None
+        forecast: ClimateSeries = bytes_to_object(data)
+        self.forecast_cache.put(key, (forecast_id, forecast))
+        return ClimateForecastDTO(location_id=location_id, id=forecast_id, forecast=forecast)
+
+    async def __save_forecast(
+        self,
+        climate_generative_model: ClimateGenerativeModelDTO,
+        seed_data_df: pd.DataFrame,
+        months: int,
+        forecast: ClimateSeries,
+    ) -> ClimateForecastDTO:
+        """Stores the forecast of months months in the climate_forecast table and in the
+        forecast cache, under the key __get_forecast_key gives for the same months.
+
+        The row is committed in a session of its own, so that the forecast is stored
+        even when the caller only reads, without committing the session of the caller.
+        """
+        location_id = cast(UUID, climate_generative_model.location_id)
+        seed_year, seed_month = seed_data_df.index[-1]
+        key: ForecastKey = (
+            location_id,
+            climate_generative_model.id,
+            int(seed_year),
+            int(seed_month),
+            months,
+        )
+        async with self.session_maker() as session:
+            try:
+                forecast_id = await session.scalar(
+                    pg_insert(ClimateForecast)
+                    .values(
+                        id=uuid.uuid4(),
+                        location_id=location_id,
+                        climate_generative_model_id=climate_generative_model.id,
+                        seed_year=key[2],
+                        seed_month=key[3],
+                        months=key[4],
+                        forecast=object_to_bytes(forecast),
+                        created_at=datetime.now(tz=timezone.utc).replace(tzinfo=None),
+                    )
+                    .on_conflict_do_nothing(constraint="_climate_forecast_key_uc")
+                    .returning(ClimateForecast.id)
+                )
+                await session.commit()
+            except IntegrityError:
+                # the model was replaced meanwhile
+                logging.info(
+                    f"Climate generative model {climate_generative_model.id} doesn't exist anymore, not caching its forecast of location {location_id}"
+                )
+                return ClimateForecastDTO(location_id=location_id, id=None, forecast=forecast)
+            if forecast_id is None:
+                # another request stored the same forecast first
+                stored = await self.__get_cached_forecast(session=session, key=key)
+                if stored is not None:
+                    return stored
+                return ClimateForecastDTO(location_id=location_id, id=None, forecast=forecast)
+        self.forecast_cache.put(key, (forecast_id, forecast))
+        return ClimateForecastDTO(location_id=location_id, id=forecast_id, forecast=forecast)
+
+    async def __invalidate_forecasts(
+        self, session: AsyncSession, location_id: UUID | None
+    ):
+        """Deletes the forecasts of the location, or of every location if None."""
+        stmt = delete(ClimateForecast)
+        if location_id is not None:
+            stmt = stmt.where(ClimateForecast.location_id == location_id)
+        await session.execute(stmt)
+        self.forecast_cache.invalidate(
+            lambda key: location_id is None or key[0] == location_id
+        )
+
+    async def generate_climate_data_from_last_past_climate_data(
+        self, session: AsyncSession, location_id: UUID, months: int
+    ) -> ClimateSeries:
+        """Forecasts the months after the last past climate data of the location, see get_forecast.
+
+        Raises:
+            LocationNotFoundError:
+            ClimateGenerativeModelNotFoundError:
+        """
+        return (
+            await self.get_forecast(
+                session=session, location_id=location_id, months=months
+            )
+        ).forecast
+
+    async def get_forecast(
+        self, session: AsyncSession, location_id: UUID, months: int
+    ) -> ClimateForecastDTO:
+        """Forecasts the months after the last past climate data of the location.
+
+        The forecast is cached by ForecastKey, see __get_cached_forecast. Its id
+        identifies this version of the forecast, e.g. to cache what is computed from it.
+
+        Raises:
+            LocationNotFoundError:
+            ClimateGenerativeModelNotFoundError:
+        """
+        key = await self.__get_forecast_key(
+            session=session, location_id=location_id, months=months
+        )
+        if key is not None:
+            cached = await self.__get_cached_forecast(session=session, key=key)
+            if cached is not None:
+                return cached
+
+        climate_generative_model, last_n_months_seed_data, future_climate_data_df = (
+            await self.__get_forecast_inputs(
+                session=session, location_id=location_id, months=months
+            )
+        )
 
         data = self.generate_data_from_seed(
             model=climate_generative_model.model,
@@ -442,27 +1802,260 @@ class ClimateGenerativeModelRepository:
             y_scaler=climate_generative_model.y_scaler,
             seed_data_df=last_n_months_seed_data,
             future_climate_data_df=future_climate_data_df,
+            compiled_model=climate_generative_model.compiled_model,
+            location_features=climate_generative_model.location_features,
         )
 
-        result = pd.DataFrame(data=data, columns=[*FEATURES, *TARGET])
-        result.index = future_climate_data_df.index
-        result["location_id"] = location_id
-        return ClimateDataDTO.from_dataframe_to_list(result)
+        forecast = self.__to_climate_data(
+            location_id=location_id,
+            data=data,
+            future_climate_data_df=future_climate_data_df,
+        )
+        return await self.__save_forecast(
+            climate_generative_model=climate_generative_model,
+            seed_data_df=last_n_months_seed_data,
+            months=months,
+            forecast=forecast,
+        )
+
+    async def generate_climate_data_for_locations(
+        self, session: AsyncSession, location_ids: list[UUID], months: int
+    ) -> dict[UUID, ClimateSeries]:
+        """Batched generate_climate_data_from_last_past_climate_data, see generate_data_from_seeds.
+        Only the locations whose forecast isn't cached are forecast.
+
+        Raises:
+            LocationNotFoundError:
+            ClimateGenerativeModelNotFoundError:
+        """
+        requested_location_ids = list(dict.fromkeys(location_ids))
+        result: dict[UUID, ClimateSeries] = {}
+        for location_id in requested_location_ids:
+            key = await self.__get_forecast_key(
+                session=session, location_id=location_id, months=months
+            )
+            cached = (
+                await self.__get_cached_forecast(session=session, key=key)
+                if key is not None
+                else None
+            )
+            if cached is not None:
+                result[location_id] = cached.forecast
+        location_ids = [
+            location_id
+            for location_id in requested_location_ids
+            if location_id not in result
+        ]
+        if len(location_ids) == 0:
+            return result
+
+        climate_generative_models: list[ClimateGenerativeModelDTO] = []
+        seed_data_dfs: list[pd.DataFrame] = []
+        future_climate_data_dfs: list[pd.DataFrame] = []
+        for location_id in location_ids:
+            climate_generative_model, seed_data_df, future_climate_data_df = (
+                await self.__get_forecast_inputs(
+                    session=session, location_id=location_id, months=months
+                )
+            )
+            climate_generative_models.append(climate_generative_model)
+            seed_data_dfs.append(seed_data_df)
+            future_climate_data_dfs.append(future_climate_data_df)
+
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor() as pool:
+            data = await loop.run_in_executor(
+                pool,
+                self.generate_data_from_seeds,
+                climate_generative_models,
+                seed_data_dfs,
+                future_climate_data_dfs,
+            )
+
+        for (
+            location_id,
+            location_data,
+            climate_generative_model,
+            seed_data_df,
+            future_climate_data_df,
+        ) in zip(
+            location_ids,
+            data,
+            climate_generative_models,
+            seed_data_dfs,
+            future_climate_data_dfs,
+        ):
+            result[location_id] = self.__to_climate_data(
+                location_id=location_id,
+                data=location_data,
+                future_climate_data_df=future_climate_data_df,
+            )
+            await self.__save_forecast(
+                climate_generative_model=climate_generative_model,
+                seed_data_df=seed_data_df,
+                months=months,
+                forecast=result[location_id],
+            )
+        return {location_id: result[location_id] for location_id in requested_location_ids}
+
+    async def is_global_model_used_for_locations(self, session: AsyncSession) -> bool:
+        """Whether locations without a model of their own are forecast by the global
+        model, see get_climate_generative_model_by_location_id. Checked with EXISTS,
+        without loading the global model."""
+        if self.model_kind != "global":
+            return False
+        return bool(
+            await session.scalar(
+                select(exists().where(ClimateGenerativeModel.kind == "global"))
+            )
+        )
+
+    async def is_climate_generative_model_ready(
+        self, session: AsyncSession, location_id: UUID
+    ) -> bool:
+        """Whether get_climate_generative_model_by_location_id would return a model,
+        checked with EXISTS, without loading it."""
+        has_model = await session.scalar(
+            select(exists().where(ClimateGenerativeModel.location_id == location_id))
+        )
+        return bool(has_model) or await self.is_global_model_used_for_locations(
+            session=session
+        )
 
     async def get_climate_generative_model_by_location_id(
         self, session: AsyncSession, location_id: UUID
     ) -> ClimateGenerativeModelDTO | None:
+        """Returns the model of the location, deserializing it only if it's not in the model cache.
+
+        With the global model kind, a location without a model of its own gets the
+        global model.
+        """
+        model_id = await session.scalar(
+            select(ClimateGenerativeModel.id).where(
+                ClimateGenerativeModel.location_id == location_id
+            )
+        )
+        if model_id is None:
+            if self.model_kind != "global":
+                return None
+            global_model = await self.__get_global_model(session=session)
+            if global_model is None:
+                return None
+            return replace(
+                global_model,
+                location_id=location_id,
+                location_features=await self.__get_location_features(
+                    session=session, location_id=location_id
+                ),
+            )
+
+        cached = self.model_cache.get((location_id, model_id))
+        if cached is not None:
+            return cached
+
         stmt = select(ClimateGenerativeModel).where(
-            ClimateGenerativeModel.location_id == location_id
+            ClimateGenerativeModel.id == model_id
         )
         climate_generative_model = await session.scalar(stmt)
         if climate_generative_model is None:
             return None
 
-        return ClimateGenerativeModelDTO(
+        return self.__load_climate_generative_model(
+            climate_generative_model=climate_generative_model,
+            location_features=(
+                await self.__get_location_features(
+                    session=session, location_id=location_id
+                )
+                if climate_generative_model.kind == "fine_tuned"
+                else None
+            ),
+        )
+
+    async def __get_global_model(
+        self, session: AsyncSession, with_keras_model: bool = False
+    ) -> ClimateGenerativeModelDTO | None:
+        """
+        Args:
+            with_keras_model (bool, optional): loads the Keras model even when the
+                compiled one doesn't need it, e.g. to fine tune it. Defaults to False.
+        """
+        model_id = await session.scalar(
+            select(ClimateGenerativeModel.id).where(
+                ClimateGenerativeModel.kind == "global"
+            )
+        )
+        if model_id is None:
+            return None
+
+        cached = self.model_cache.get((None, model_id))
+        if cached is not None and (cached.model is not None or not with_keras_model):
+            return cached
+
+        stmt = select(ClimateGenerativeModel).where(
+            ClimateGenerativeModel.id == model_id
+        )
+        climate_generative_model = await session.scalar(stmt)
+        if climate_generative_model is None:
+            return None
+        return self.__load_climate_generative_model(
+            climate_generative_model=climate_generative_model,
+            location_features=None,
+            with_keras_model=with_keras_model,
+        )
+
+    async def __get_location_features(
+        self, session: AsyncSession, location_id: UUID
+    ) -> np.ndarray:
+        """
+        Raises:
+            LocationNotFoundError:
+        """
+        location = await self.location_repository.get_location_by_id(
+            session=session, location_id=location_id
+        )
+        if location is None:
+            raise LocationNotFoundError()
+        return get_location_features(
+            latitude=location.latitude, longitude=location.longitude
+        )
+
+    def __load_climate_generative_model(
+        self,
+        climate_generative_model: ClimateGenerativeModel,
+        location_features: np.ndarray | None,
+        with_keras_model: bool = False,
+    ) -> ClimateGenerativeModelDTO:
+        """Deserializes the model and puts it in the model cache."""
+        model_id = climate_generative_model.id
+        location_id = climate_generative_model.location_id
+        compiled_model: CompiledModel | None = None
+        if (
+            climate_generative_model.inference_backend is not None
+            and climate_generative_model.inference_backend == self.inference_backend
+            and climate_generative_model.inference_artifact is not None
+        ):
+            try:
+                compiled_model = load_compiled_model(
+                    backend=self.inference_backend,
+                    artifact=climate_generative_model.inference_artifact,
+                )
+            except Exception:
+                logging.warning(
+                    f"Can't load the {self.inference_backend} export of climate generative model {model_id}, using the eager model",
+                    exc_info=True,
+                )
+
+        # the NumPy model doesn't need the Keras one, so TensorFlow isn't imported
+        model: Sequential | None = (
+            None
+            if isinstance(compiled_model, NumpyLSTMModel) and not with_keras_model
+            else bytes_to_object(climate_generative_model.model)
+        )
+
+        result = ClimateGenerativeModelDTO(
             id=climate_generative_model.id,
             location_id=location_id,
-            model=bytes_to_object(climate_generative_model.model),
+            model=model,
             x_scaler=bytes_to_object(climate_generative_model.x_scaler),
             y_scaler=bytes_to_object(climate_generative_model.y_scaler),
             rmse=climate_generative_model.rmse,
@@ -478,7 +2071,29 @@ class ClimateGenerativeModelRepository:
             validation_end_month=climate_generative_model.validation_end_month,
             test_end_year=climate_generative_model.test_end_year,
             test_end_month=climate_generative_model.test_end_month,
+            compiled_model=compiled_model,
+            kind=cast(ClimateGenerativeModelKind, climate_generative_model.kind),
+            location_features=location_features,
+            training_history=climate_generative_model.training_history,
+            trained_at=climate_generative_model.trained_at,
+            refreshed_at=climate_generative_model.refreshed_at,
         )
+        self.model_cache.put(
+            (location_id, model_id),
+            result,
+            size_bytes=(len(climate_generative_model.model) if model is not None else 0)
+            + len(climate_generative_model.x_scaler)
+            + len(climate_generative_model.y_scaler)
+            + (
+                len(climate_generative_model.inference_artifact or b"")
+                if compiled_model is not None
+                else 0
+            ),
+        )
+        logging.info(
+            f"Loaded {climate_generative_model.kind} climate generative model {model_id} of location {location_id}, cache: {self.model_cache.stats()}"
+        )
+        return result
 
     async def delete_climate_generative_model(
         self, session: AsyncSession, location_id: UUID
@@ -487,20 +2102,32 @@ class ClimateGenerativeModelRepository:
             ClimateGenerativeModel.location_id == location_id
         )
         await session.execute(stmt)
+        self.model_cache.invalidate(lambda key: key[0] == location_id)
+        await self.__invalidate_forecasts(session=session, location_id=location_id)
 
     async def __save_climate_generative_model(
         self, session: AsyncSession, climate_generative_model: ClimateGenerativeModelDTO
     ) -> UUID:
-        model_id = uuid.uuid4()
         await session.execute(
             delete(ClimateGenerativeModel).where(
-                ClimateGenerativeModel.location_id
+                ClimateGenerativeModel.kind == "global"
+                if climate_generative_model.kind == "global"
+                else ClimateGenerativeModel.location_id
                 == climate_generative_model.location_id
             )
         )
         stmt = insert(ClimateGenerativeModel).values(
             id=climate_generative_model.id,
+            kind=climate_generative_model.kind,
             location_id=climate_generative_model.location_id,
+            training_history=climate_generative_model.training_history,
+            # models without trained_at were just trained from scratch
+            trained_at=(
+                climate_generative_model.trained_at
+                if climate_generative_model.trained_at is not None
+                else datetime.now(tz=timezone.utc).replace(tzinfo=None)
+            ),
+            refreshed_at=climate_generative_model.refreshed_at,
             model=object_to_bytes(climate_generative_model.model),
             x_scaler=object_to_bytes(climate_generative_model.x_scaler),
             y_scaler=object_to_bytes(climate_generative_model.y_scaler),
@@ -517,6 +2144,29 @@ class ClimateGenerativeModelRepository:
             validation_end_month=climate_generative_model.validation_end_month,
             test_end_year=climate_generative_model.test_end_year,
             test_end_month=climate_generative_model.test_end_month,
+            inference_backend=(
+                get_backend(climate_generative_model.compiled_model)
+                if climate_generative_model.compiled_model is not None
+                else None
+            ),
+            inference_artifact=(
+                climate_generative_model.compiled_model.to_bytes()
+                if climate_generative_model.compiled_model is not None
+                else None
+            ),
         )
         await session.execute(stmt)
-        return model_id
+        # the training ended, the next one starts from scratch
+        await self.__delete_training_checkpoint(
+            session=session,
+            kind=climate_generative_model.kind,
+            location_id=climate_generative_model.location_id,
+        )
+        self.model_cache.invalidate(
+            lambda key: key[0] == climate_generative_model.location_id
+        )
+        # the forecasts of the replaced model, with the global model those of every location
+        await self.__invalidate_forecasts(
+            session=session, location_id=climate_generative_model.location_id
+        )
+        return climate_generative_model.id
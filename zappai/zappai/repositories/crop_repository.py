@@ -1,9 +1,12 @@
 from datetime import datetime, timezone
+import hashlib
+import logging
 import uuid
 from sklearn.ensemble import RandomForestRegressor
-from sqlalchemy import delete, insert, select, update
+from sqlalchemy import Row, delete, insert, select, update
+from zappai.zappai.utils.cache import LRUCache
 from zappai.zappai.utils.common import bytes_to_object, object_to_bytes
-from zappai.zappai.dtos import CropDTO
+from zappai.zappai.dtos import CropDTO, CropDetailsDTO
 from zappai.zappai.models import Crop
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
@@ -11,11 +14,27 @@ from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 class CropRepository:
     def __init__(
         self,
+        crop_yield_model_cache: LRUCache[tuple[str, str], RandomForestRegressor]
+        | None = None,
     ) -> None:
-        pass
+        """
+
+        Args:
+            crop_yield_model_cache (LRUCache[tuple[str, str], RandomForestRegressor] | None, optional):
+                deserialized crop yield models by (crop name, md5 of the serialized model), shared
+                between repositories. Defaults to a cache used only by this repository.
+        """
+        self.crop_yield_model_cache: LRUCache[
+            tuple[str, str], RandomForestRegressor
+        ] = (
+            crop_yield_model_cache
+            if crop_yield_model_cache is not None
+            else LRUCache(max_entries=None)
+        )
 
     async def delete_crop_by_name(self, session: AsyncSession, name: str):
         await session.execute(delete(Crop).where(Crop.name == name))
+        self.crop_yield_model_cache.invalidate(lambda key: key[0] == name)
 
     async def create_crop(
         self, session: AsyncSession, name: str, min_farming_months: int, max_farming_months: int
@@ -44,18 +63,34 @@ class CropRepository:
         )
 
     async def get_crop_by_name(self, session: AsyncSession, name: str) -> CropDTO | None:
-        stmt = select(Crop).where(Crop.name == name)
-        crop = await session.scalar(stmt)
-        if crop is None:
+        crop_details = await self.get_crop_details(session=session, crop_name=name)
+        if crop_details is None:
             return None
-        return self.__crop_model_to_dto(crop)
+        return await self.__crop_details_to_crop_dto(
+            session=session, crop_details=crop_details
+        )
 
     async def get_crop_by_id(self, session: AsyncSession, crop_name: str) -> CropDTO | None:
-        stmt = select(Crop).where(Crop.name == crop_name)
-        crop = await session.scalar(stmt)
-        if crop is None:
+        return await self.get_crop_by_name(session=session, name=crop_name)
+
+    async def get_crop_details(
+        self, session: AsyncSession, crop_name: str
+    ) -> CropDetailsDTO | None:
+        """Like get_crop_by_name, but never loads the crop yield model."""
+        stmt = self.__select_crop_details().where(Crop.name == crop_name)
+        row = (await session.execute(stmt)).first()
+        if row is None:
             return None
-        return self.__crop_model_to_dto(crop)
+        return self.__row_to_crop_details_dto(row)
+
+    async def get_all_crops_details(
+        self, session: AsyncSession
+    ) -> list[CropDetailsDTO]:
+        """Like get_all_crops, but never loads the crop yield models."""
+        stmt = self.__select_crop_details().order_by(Crop.name)
+        return [
+            self.__row_to_crop_details_dto(row) for row in await session.execute(stmt)
+        ]
 
     async def save_crop_yield_model(
         self,
@@ -65,31 +100,102 @@ class CropRepository:
         mse: float,
         r2: float,
     ):
+        crop_yield_model_bytes = object_to_bytes(crop_yield_model)
         stmt = (
             update(Crop)
             .where(Crop.name == crop_name)
             .values(
-                crop_yield_model=object_to_bytes(crop_yield_model), mse=mse, r2=r2
+                crop_yield_model=crop_yield_model_bytes,
+                crop_yield_model_hash=hashlib.md5(crop_yield_model_bytes).hexdigest(),
+                mse=mse,
+                r2=r2,
             )
         )
         await session.execute(stmt)
+        self.crop_yield_model_cache.invalidate(lambda key: key[0] == crop_name)
 
     async def get_all_crops(self, session: AsyncSession) -> list[CropDTO]:
-        stmt = select(Crop)
-        results = list(await session.scalars(stmt))
-        return [self.__crop_model_to_dto(crop) for crop in results]
+        return [
+            await self.__crop_details_to_crop_dto(
+                session=session, crop_details=crop_details
+            )
+            for crop_details in await self.get_all_crops_details(session=session)
+        ]
+
+    async def __get_crop_yield_model(
+        self, session: AsyncSession, crop_name: str, crop_yield_model_hash: str
+    ) -> RandomForestRegressor | None:
+        """Deserializes the crop yield model once per process and version."""
+        crop_yield_model = self.crop_yield_model_cache.get(
+            (crop_name, crop_yield_model_hash)
+        )
+        if crop_yield_model is not None:
+            return crop_yield_model
+
+        row = (
+            await session.execute(
+                select(Crop.crop_yield_model, Crop.crop_yield_model_hash).where(
+                    Crop.name == crop_name
+                )
+            )
+        ).first()
+        if row is None or row.crop_yield_model is None:
+            return None
+        crop_yield_model_bytes: bytes = row.crop_yield_model
+        # the model may have changed since the hash was read
+        crop_yield_model_hash = row.crop_yield_model_hash
+        crop_yield_model = bytes_to_object(crop_yield_model_bytes)
+        self.crop_yield_model_cache.put(
+            (crop_name, crop_yield_model_hash),
+            crop_yield_model,
+            size_bytes=len(crop_yield_model_bytes),
+        )
+        logging.info(
+            f"Loaded crop yield model of {crop_name}, cache: {self.crop_yield_model_cache.stats()}"
+        )
+        return crop_yield_model
 
-    def __crop_model_to_dto(self, crop: Crop) -> CropDTO:
+    async def __crop_details_to_crop_dto(
+        self, session: AsyncSession, crop_details: CropDetailsDTO
+    ) -> CropDTO:
+        crop_yield_model = (
+            await self.__get_crop_yield_model(
+                session=session,
+                crop_name=crop_details.name,
+                crop_yield_model_hash=crop_details.crop_yield_model_hash,
+            )
+            if crop_details.crop_yield_model_hash is not None
+            else None
+        )
         return CropDTO(
-            name=crop.name,
-            created_at=crop.created_at,
-            min_farming_months=crop.min_farming_months,
-            max_farming_months=crop.max_farming_months,
-            crop_yield_model=(
-                bytes_to_object(crop.crop_yield_model)
-                if crop.crop_yield_model is not None
-                else None
-            ),
-            mse=crop.mse,
-            r2=crop.r2,
+            name=crop_details.name,
+            created_at=crop_details.created_at,
+            min_farming_months=crop_details.min_farming_months,
+            max_farming_months=crop_details.max_farming_months,
+            crop_yield_model=crop_yield_model,
+            mse=crop_details.mse,
+            r2=crop_details.r2,
+            crop_yield_model_hash=crop_details.crop_yield_model_hash,
+        )
+
+    def __select_crop_details(self):
+        return select(
+            Crop.name,
+            Crop.created_at,
+            Crop.min_farming_months,
+            Crop.max_farming_months,
+            Crop.mse,
+            Crop.r2,
+            Crop.crop_yield_model_hash,
+        )
+
+    def __row_to_crop_details_dto(self, row: Row) -> CropDetailsDTO:
+        return CropDetailsDTO(
+            name=row.name,
+            created_at=row.created_at,
+            min_farming_months=row.min_farming_months,
+            max_farming_months=row.max_farming_months,
+            mse=row.mse,
+            r2=row.r2,
+            crop_yield_model_hash=row.crop_yield_model_hash,
         )
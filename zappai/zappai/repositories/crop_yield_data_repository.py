@@ -344,7 +344,7 @@ class CropYieldDataRepository:
     async def get_crop_yield_data(
         self, session: AsyncSession, crop_name: str
     ) -> list[CropYieldDataDTO]:
-        crop = await self.crop_repository.get_crop_by_id(
+        crop = await self.crop_repository.get_crop_details(
             session=session, crop_name=crop_name
         )
         if crop is None:
@@ -1,24 +1,48 @@
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
 import logging
 import os
 import uuid
 from geoalchemy2 import Geography
 import pandas as pd
 from sqlalchemy import BooleanClauseList, asc, delete, func, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from zappai.zappai.dtos import FutureClimateDataDTO
-from zappai.zappai.models import FutureClimateData
+from zappai.zappai.models import (
+    ClimateForecast,
+    FutureClimateData,
+    FutureClimateGridPoint,
+)
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
-from geoalchemy2.functions import ST_Distance
 from typing import Any, cast
 import sqlalchemy
+from zappai.zappai.utils.cache import LRUCache
 from zappai.zappai.utils.common import coordinates_to_well_known_text
 from zappai.zappai.repositories.copernicus_data_store_api import CopernicusDataStoreAPI
 
 
 class FutureClimateDataRepository:
-    def __init__(self, copernicus_data_store_api: CopernicusDataStoreAPI) -> None:
+    def __init__(
+        self,
+        copernicus_data_store_api: CopernicusDataStoreAPI,
+        nearest_grid_point_cache: LRUCache[tuple[float, float], tuple[float, float]]
+        | None = None,
+    ) -> None:
+        """
+
+        Args:
+            copernicus_data_store_api (CopernicusDataStoreAPI):
+            nearest_grid_point_cache (LRUCache[tuple[float, float], tuple[float, float]] | None, optional):
+                longitude and latitude of the nearest grid point by longitude and latitude,
+                shared between repositories. Defaults to a cache used only by this repository.
+        """
         self.copernicus_data_store_api = copernicus_data_store_api
+        self.nearest_grid_point_cache: LRUCache[
+            tuple[float, float], tuple[float, float]
+        ] = (
+            nearest_grid_point_cache
+            if nearest_grid_point_cache is not None
+            else LRUCache(max_entries=1024)
+        )
 
     async def download_future_climate_data(self, session: AsyncSession):
         loop = asyncio.get_running_loop()
@@ -34,8 +58,9 @@ class FutureClimateDataRepository:
                 on_save_chunk=on_save_chunk,
             )
 
-        with ThreadPoolExecutor() as pool:
-            await loop.run_in_executor(executor=pool, func=download_func)
+        # the default executor, a with ThreadPoolExecutor block would join the download
+        # thread from the event loop that the thread needs to save its chunks
+        await loop.run_in_executor(None, download_func)
 
         logging.info(f"Done")
 
@@ -62,6 +87,8 @@ class FutureClimateDataRepository:
             )
         )
         await session.execute(stmt)
+        # every forecast may use the future climate data of this period
+        await session.execute(delete(ClimateForecast))
         processed = 0
         STEP = 1000
         logging.info(f"Saving future climate data...")
@@ -95,6 +122,31 @@ class FutureClimateDataRepository:
                 )
             await session.execute(insert(FutureClimateData).values(values_dicts))
             processed += len(rows)
+
+        grid_points = future_climate_data_df[["longitude", "latitude"]].drop_duplicates()
+        for start in range(0, len(grid_points), STEP):
+            await session.execute(
+                pg_insert(FutureClimateGridPoint)
+                .values(
+                    [
+                        {
+                            "id": uuid.uuid4(),
+                            "longitude": longitude,
+                            "latitude": latitude,
+                            "coordinates": coordinates_to_well_known_text(
+                                longitude=longitude, latitude=latitude
+                            ),
+                        }
+                        for longitude, latitude in grid_points[
+                            start : start + STEP
+                        ].itertuples(index=False)
+                    ]
+                )
+                .on_conflict_do_nothing(
+                    constraint="_future_climate_grid_point_longitude_latitude_uc"
+                )
+            )
+        self.nearest_grid_point_cache.clear()
         logging.info(f"Done.")
 
     async def get_future_climate_data_for_nearest_coordinates(
@@ -123,30 +175,89 @@ class FutureClimateDataRepository:
         Returns:
             list[FutureClimateDataDTO]:
         """
-        coordinates_stmt = (
-            select(FutureClimateData.longitude, FutureClimateData.latitude).order_by(
-                asc(
-                    ST_Distance(
-                        FutureClimateData.coordinates,
-                        sqlalchemy.cast(
-                            coordinates_to_well_known_text(
-                                longitude=longitude, latitude=latitude
-                            ),
-                            Geography,
+        nearest_longitude, nearest_latitude = await self.__get_nearest_grid_point(
+            session=session, longitude=longitude, latitude=latitude
+        )
+        results = await self.__get_future_climate_data_of_grid_point(
+            session=session,
+            longitude=nearest_longitude,
+            latitude=nearest_latitude,
+            year_from=year_from,
+            month_from=month_from,
+            year_to=year_to,
+            month_to=month_to,
+        )
+        if len(results) == 0:
+            # the cached grid point may not exist anymore, e.g. replaced by another process
+            self.nearest_grid_point_cache.pop((longitude, latitude))
+            nearest_longitude, nearest_latitude = await self.__get_nearest_grid_point(
+                session=session, longitude=longitude, latitude=latitude
+            )
+            results = await self.__get_future_climate_data_of_grid_point(
+                session=session,
+                longitude=nearest_longitude,
+                latitude=nearest_latitude,
+                year_from=year_from,
+                month_from=month_from,
+                year_to=year_to,
+                month_to=month_to,
+            )
+        if len(results) == 0:
+            raise ValueError(
+                f"No future climate data to download, nearest coordinates don't exist anymore?"
+            )
+        return [self.__future_climate_data_model_to_dto(result) for result in results]
+
+    async def __get_nearest_grid_point(
+        self, session: AsyncSession, longitude: float, latitude: float
+    ) -> tuple[float, float]:
+        """Longitude and latitude of the grid point of the future climate data nearest
+        to the coordinates. The nearest point of coordinates never changes while the
+        grid stays the same, so it's cached.
+
+        Raises:
+            ValueError: if there is no future climate data
+        """
+        cached = self.nearest_grid_point_cache.get((longitude, latitude))
+        if cached is not None:
+            return cached
+        # KNN search on the GiST index of the grid points
+        stmt = (
+            select(FutureClimateGridPoint.longitude, FutureClimateGridPoint.latitude)
+            .order_by(
+                FutureClimateGridPoint.coordinates.op("<->")(
+                    sqlalchemy.cast(
+                        coordinates_to_well_known_text(
+                            longitude=longitude, latitude=latitude
                         ),
+                        Geography,
                     )
                 )
             )
-        ).limit(1)
-        results = list(await session.execute(coordinates_stmt))
-        if len(results) == 0:
+            .limit(1)
+        )
+        row = (await session.execute(stmt)).one_or_none()
+        if row is None:
             raise ValueError(f"No future climate data downloaded")
-        nearest_longitude, nearest_latitude = results[0].tuple()
+        nearest_grid_point = cast(tuple[float, float], row.tuple())
+        self.nearest_grid_point_cache.put((longitude, latitude), nearest_grid_point)
+        return nearest_grid_point
+
+    async def __get_future_climate_data_of_grid_point(
+        self,
+        session: AsyncSession,
+        longitude: float,
+        latitude: float,
+        year_from: int,
+        month_from: int,
+        year_to: int,
+        month_to: int,
+    ) -> list[FutureClimateData]:
         stmt = (
             select(FutureClimateData)
             .where(
-                (FutureClimateData.longitude == nearest_longitude)
-                & (FutureClimateData.latitude == nearest_latitude)
+                (FutureClimateData.longitude == longitude)
+                & (FutureClimateData.latitude == latitude)
                 & (
                     (FutureClimateData.year > year_from)
                     | (
@@ -164,12 +275,7 @@ class FutureClimateDataRepository:
             )
             .order_by(asc(FutureClimateData.year), asc(FutureClimateData.month))
         )
-        results = list(await session.scalars(stmt))
-        if len(results) == 0:
-            raise ValueError(
-                f"No future climate data to download, nearest coordinates don't exist anymore?"
-            )
-        return [self.__future_climate_data_model_to_dto(result) for result in results]
+        return list(await session.scalars(stmt))
 
     def __future_climate_data_model_to_dto(
         self, future_climate_data: FutureClimateData
@@ -1,13 +1,14 @@
 from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Any, cast
+from typing import Any
 from uuid import UUID
 import uuid
-from sqlalchemy import delete, insert, select, update
+from sqlalchemy import delete, desc, exists, insert, select, true, tuple_, update
 from sqlalchemy.exc import IntegrityError
 from zappai.zappai.exceptions import LocationNotFoundError, SoilTypeNotFoundError
-from zappai.zappai.dtos import LocationDTO, SoilTypeDTO
-from zappai.zappai.models import Location
+from zappai.zappai.dtos import LocationDTO, LocationStatusDTO, SoilTypeDTO
+from zappai.zappai.models import ClimateGenerativeModel, Location, PastClimateData
+from zappai.zappai.utils.csv_import import import_csv_in_chunks
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 import pandas as pd
 import asyncio
@@ -57,8 +58,12 @@ class LocationRepository:
             is_visible=is_visible,
         )
 
-    async def set_locations_to_not_downloading(self, session: AsyncSession):
+    async def set_locations_to_not_downloading(
+        self, session: AsyncSession, exclude_location_ids: list[UUID] | None = None
+    ):
         stmt = update(Location).values(is_downloading_past_climate_data=False)
+        if exclude_location_ids:
+            stmt = stmt.where(Location.id.not_in(exclude_location_ids))
         await session.execute(stmt)
 
     async def set_location_to_downloading(
@@ -92,6 +97,52 @@ class LocationRepository:
         locations = await session.scalars(stmt)
         return [self.__location_model_to_dto(location) for location in locations]
 
+    async def get_location_statuses(
+        self,
+        session: AsyncSession,
+        is_visible: bool | None = None,
+        location_id: UUID | None = None,
+    ) -> list[LocationStatusDTO]:
+        """Locations with their last month of past climate data and whether they have a
+        climate generative model, in a single query ordered by creation.
+
+        The last month is read from the (location_id, year, month) index and the model
+        is checked with EXISTS, without reading the past climate data or the model.
+        """
+        last_past_climate_data = (
+            select(PastClimateData.year, PastClimateData.month)
+            .where(PastClimateData.location_id == Location.id)
+            .order_by(desc(PastClimateData.year), desc(PastClimateData.month))
+            .limit(1)
+            .lateral()
+        )
+        has_climate_generative_model = exists().where(
+            ClimateGenerativeModel.location_id == Location.id
+        )
+        stmt = (
+            select(
+                Location,
+                last_past_climate_data.c.year,
+                last_past_climate_data.c.month,
+                has_climate_generative_model,
+            )
+            .outerjoin(last_past_climate_data, true())
+            .order_by(Location.created_at)
+        )
+        if is_visible is not None:
+            stmt = stmt.where(Location.is_visible == is_visible)
+        if location_id is not None:
+            stmt = stmt.where(Location.id == location_id)
+        return [
+            LocationStatusDTO(
+                location=self.__location_model_to_dto(location),
+                last_past_climate_data_year=year,
+                last_past_climate_data_month=month,
+                has_climate_generative_model=has_model,
+            )
+            for location, year, month, has_model in (await session.execute(stmt)).tuples()
+        ]
+
     async def get_location_by_country_and_name(
         self, session: AsyncSession, country: str, name: str
     ) -> LocationDTO | None:
@@ -160,31 +211,46 @@ class LocationRepository:
 
                 await loop.run_in_executor(executor=pool, func=write_to_csv)
 
-    async def import_from_csv(self, session: AsyncSession, csv_path: str):
-        def read_csv() -> pd.DataFrame:
-            return pd.read_csv(csv_path, parse_dates=["created_at"])
-
-        loop = asyncio.get_running_loop()
-        with ThreadPoolExecutor() as pool:
-            data = await loop.run_in_executor(executor=pool, func=read_csv)
+    async def import_from_csv(
+        self, session: AsyncSession, csv_path: str, chunksize: int = 50_000
+    ):
+        """Replaces the locations of a CSV written by export_to_csv with new hidden ones,
+        reading it chunksize rows at a time, see import_csv_in_chunks."""
 
-        dicts = cast(list[dict[str, Any]], data.to_dict(orient="records"))
-        for dct in dicts:
+        async def write_chunk(chunk: pd.DataFrame):
+            # the last row of a location wins, like when they were created one by one
+            chunk = chunk.drop_duplicates(subset=["country", "name"], keep="last")
             await session.execute(
                 delete(Location).where(
-                    (Location.name == dct["name"])
-                    & (Location.country == dct["country"])
+                    tuple_(Location.country, Location.name).in_(
+                        list(chunk[["country", "name"]].itertuples(index=False, name=None))
+                    )
                 )
             )
-            await self.create_location(
-                session=session,
-                country=dct["country"],
-                name=dct["name"],
-                longitude=dct["longitude"],
-                latitude=dct["latitude"],
-                is_visible=False,
+            now = datetime.now(tz=timezone.utc).replace(tzinfo=None)
+            await session.execute(
+                insert(Location),
+                [
+                    {
+                        "id": uuid.uuid4(),
+                        "country": country,
+                        "name": name,
+                        "longitude": longitude,
+                        "latitude": latitude,
+                        "created_at": now,
+                        "is_downloading_past_climate_data": False,
+                        "is_visible": False,
+                    }
+                    for country, name, longitude, latitude in chunk[
+                        ["country", "name", "longitude", "latitude"]
+                    ].itertuples(index=False, name=None)
+                ],
             )
 
+        await import_csv_in_chunks(
+            csv_path=csv_path, write_chunk=write_chunk, chunksize=chunksize
+        )
+
     def __location_model_to_dto(self, location: Location) -> LocationDTO:
         return LocationDTO(
             id=location.id,
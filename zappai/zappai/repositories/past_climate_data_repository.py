@@ -1,4 +1,5 @@
 import asyncio
+from dataclasses import fields
 from concurrent.futures import ThreadPoolExecutor
 from csv import DictWriter
 from datetime import datetime, timezone
@@ -7,7 +8,7 @@ import os
 from uuid import UUID
 import uuid
 import pandas as pd
-from sqlalchemy import asc, delete, desc, insert, select
+from sqlalchemy import asc, delete, desc, insert, select, text
 import sqlalchemy
 from sqlalchemy.exc import IntegrityError
 from zappai.zappai.exceptions import LocationNotFoundError, PastClimateDataNotFoundError
@@ -15,15 +16,47 @@ from zappai.zappai.dtos import (
     CropYieldDataDTO,
     LocationClimateYearsDTO,
     ClimateDataDTO,
-    LocationDTO,
     PastClimateDataDTO,
 )
-from zappai.zappai.models import PastClimateData
+from zappai.zappai.models import ClimateForecast, Location, PastClimateData
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
-from typing import Any, cast
+from typing import TYPE_CHECKING, Any, Callable, cast
 from zappai.zappai.repositories.location_repository import LocationRepository
 from zappai.zappai.repositories.copernicus_data_store_api import CopernicusDataStoreAPI
 from zappai.zappai.utils.common import get_next_n_months
+from zappai.zappai.utils.csv_import import import_csv_in_chunks
+
+if TYPE_CHECKING:
+    import asyncpg
+
+# columns of the past climate data dataframes and the past_climate_data columns
+# they are stored in
+PAST_CLIMATE_DATA_COLUMNS = {
+    "10m_u_component_of_wind": "u_component_of_wind_10m",
+    "10m_v_component_of_wind": "v_component_of_wind_10m",
+    "2m_temperature": "temperature_2m",
+    "evaporation": "evaporation",
+    "total_precipitation": "total_precipitation",
+    "surface_pressure": "surface_pressure",
+    "surface_solar_radiation_downwards": "surface_solar_radiation_downwards",
+    "surface_thermal_radiation_downwards": "surface_thermal_radiation_downwards",
+    "surface_net_solar_radiation": "surface_net_solar_radiation",
+    "surface_net_thermal_radiation": "surface_net_thermal_radiation",
+    "snowfall": "snowfall",
+    "total_cloud_cover": "total_cloud_cover",
+    "2m_dewpoint_temperature": "dewpoint_temperature_2m",
+    "soil_temperature_level_3": "soil_temperature_level_3",
+    "volumetric_soil_water_layer_3": "volumetric_soil_water_layer_3",
+}
+
+# PAST_CLIMATE_DATA_COLUMNS keys in the order of the PastClimateDataDTO fields, the
+# order of the columns of PastClimateDataDTO.from_list_to_dataframe
+PAST_CLIMATE_DATA_DF_COLUMNS = sorted(
+    PAST_CLIMATE_DATA_COLUMNS,
+    key=lambda df_column: [field.name for field in fields(PastClimateDataDTO)].index(
+        PAST_CLIMATE_DATA_COLUMNS[df_column]
+    ),
+)
 
 
 class PastClimateDataRepository:
@@ -65,12 +98,20 @@ class PastClimateDataRepository:
                 on_save_chunk=on_save_chunk,
             )
 
-        with ThreadPoolExecutor() as pool:
-            await loop.run_in_executor(executor=pool, func=download_func)
+        await loop.run_in_executor(None, download_func)
 
     async def download_new_past_climate_data(
-        self, session: AsyncSession, location_id: UUID
+        self,
+        session: AsyncSession,
+        location_id: UUID,
+        on_chunk_saved: Callable[[], None] | None = None,
     ):
+        """Downloads and stores the months after the last past climate data of the location.
+
+        Args:
+            on_chunk_saved (Callable[[], None] | None, optional): called from the download
+                thread after each chunk is stored, raising from it stops the download
+        """
         year_from = 1940
         month_from = 1
 
@@ -105,28 +146,32 @@ class PastClimateDataRepository:
             raise ValueError(f"Location {location_id} does not exist in db")
 
         loop = asyncio.get_running_loop()
-        with ThreadPoolExecutor() as pool:
-
-            def on_save_chunk(chunk: pd.DataFrame):
-                asyncio.run_coroutine_threadsafe(
-                    coro=self.__save_past_climate_data(
-                        session=session,
-                        location_id=location_id,
-                        past_climate_data_df=chunk,
-                    ),
-                    loop=loop,
-                ).result()
 
-            await loop.run_in_executor(
-                executor=pool,
-                func=lambda: self.copernicus_data_store_api.get_past_climate_data(
-                    year_from=year_from,
-                    month_from=month_from,
-                    longitude=location.longitude,
-                    latitude=location.latitude,
-                    on_save_chunk=on_save_chunk,
+        def on_save_chunk(chunk: pd.DataFrame):
+            asyncio.run_coroutine_threadsafe(
+                coro=self.__save_past_climate_data(
+                    session=session,
+                    location_id=location_id,
+                    past_climate_data_df=chunk,
                 ),
-            )
+                loop=loop,
+            ).result()
+            if on_chunk_saved is not None:
+                on_chunk_saved()
+
+        # not in a with ThreadPoolExecutor block, that would wait on the event loop for
+        # the download thread when cancelled, while the thread waits on the event loop
+        await loop.run_in_executor(
+            None,
+            lambda: self.copernicus_data_store_api.get_past_climate_data(
+                year_from=year_from,
+                month_from=month_from,
+                longitude=location.longitude,
+                latitude=location.latitude,
+                on_save_chunk=on_save_chunk,
+            ),
+        )
+
 
     async def __save_past_climate_data(
         self,
@@ -144,55 +189,59 @@ class PastClimateDataRepository:
         if len(past_climate_data_df) == 0:
             logging.info(f"No past climate data, returning")
             return
-        # delete the data of the same period as this dataframe
-        years = cast(
-            list[int],
-            past_climate_data_df.index.get_level_values("year").unique().tolist(),
-        )
-        stmt = delete(PastClimateData).where(
-            (PastClimateData.location_id == location_id)
-            & (PastClimateData.year.in_(years))
+        df = past_climate_data_df.reset_index()
+        df["location_id"] = location_id
+        await self.__upsert_past_climate_data(session=session, past_climate_data_df=df)
+        # the forecasts start from the last past climate data
+        await session.execute(
+            delete(ClimateForecast).where(ClimateForecast.location_id == location_id)
         )
-        await session.execute(stmt)
-        values_dicts: list[dict[str, Any]] = []
-        for index, row in past_climate_data_df.iterrows():
-            index = cast(pd.MultiIndex, index)
-            year, month = index
-            values_dicts.append(
-                {
-                    "id": uuid.uuid4(),
-                    "location_id": location_id,
-                    "year": year,
-                    "month": month,
-                    "u_component_of_wind_10m": row["10m_u_component_of_wind"],
-                    "v_component_of_wind_10m": row["10m_v_component_of_wind"],
-                    "temperature_2m": row["2m_temperature"],
-                    "evaporation": row["evaporation"],
-                    "total_precipitation": row["total_precipitation"],
-                    "surface_pressure": row["surface_pressure"],
-                    "surface_solar_radiation_downwards": row[
-                        "surface_solar_radiation_downwards"
-                    ],
-                    "surface_thermal_radiation_downwards": row[
-                        "surface_thermal_radiation_downwards"
-                    ],
-                    "surface_net_solar_radiation": row["surface_net_solar_radiation"],
-                    "surface_net_thermal_radiation": row[
-                        "surface_net_thermal_radiation"
-                    ],
-                    "snowfall": row["snowfall"],
-                    "total_cloud_cover": row["total_cloud_cover"],
-                    "dewpoint_temperature_2m": row["2m_dewpoint_temperature"],
-                    "soil_temperature_level_3": row["soil_temperature_level_3"],
-                    "volumetric_soil_water_layer_3": row[
-                        "volumetric_soil_water_layer_3"
-                    ],
-                }
-            )
-        await session.execute(insert(PastClimateData), values_dicts)
         await session.commit()
         logging.info(f"Inserted {len(past_climate_data_df)} past climate data.")
 
+    async def __upsert_past_climate_data(
+        self, session: AsyncSession, past_climate_data_df: pd.DataFrame
+    ):
+        """Stores the rows of past_climate_data_df, that has location_id, year, month and
+        PAST_CLIMATE_DATA_COLUMNS columns, replacing the stored ones of the same location
+        and month.
+
+        The rows are sent with a binary COPY to a temporary table, then upserted from it
+        with a single statement.
+        """
+        columns = ["location_id", "year", "month", *PAST_CLIMATE_DATA_COLUMNS.values()]
+        df = past_climate_data_df.rename(columns=PAST_CLIMATE_DATA_COLUMNS)
+        # a row can be upserted once per statement
+        df = df.drop_duplicates(subset=["location_id", "year", "month"], keep="last")
+        # Python values, asyncpg doesn't encode the NumPy ones
+        records = list(zip(*(df[column].tolist() for column in columns)))
+
+        await session.execute(text("DROP TABLE IF EXISTS past_climate_data_staging"))
+        await session.execute(
+            text(
+                f"CREATE TEMPORARY TABLE past_climate_data_staging ON COMMIT DROP AS "
+                f"SELECT {', '.join(columns)} FROM past_climate_data WITH NO DATA"
+            )
+        )
+        # the connection of the session, the COPY is part of its transaction
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+        driver_connection = cast("asyncpg.Connection", raw_connection.driver_connection)
+        await driver_connection.copy_records_to_table(
+            "past_climate_data_staging", records=records, columns=columns
+        )
+        await session.execute(
+            text(
+                f"INSERT INTO past_climate_data (id, {', '.join(columns)}) "
+                f"SELECT gen_random_uuid(), {', '.join(columns)} FROM past_climate_data_staging "
+                f"ON CONFLICT (location_id, year, month) DO UPDATE SET "
+                + ", ".join(
+                    f"{column} = EXCLUDED.{column}"
+                    for column in PAST_CLIMATE_DATA_COLUMNS.values()
+                )
+            )
+        )
+
     async def get_all_past_climate_data(
         self, session: AsyncSession, location_id: UUID
     ) -> list[PastClimateDataDTO]:
@@ -206,6 +255,26 @@ class PastClimateDataRepository:
             raise PastClimateDataNotFoundError(f"Can't find past climate data for location {location_id}")
         return [self.__past_climate_data_model_to_dto(result) for result in results]
 
+    async def get_all_past_climate_data_df(
+        self, session: AsyncSession, location_id: UUID
+    ) -> pd.DataFrame:
+        """Same dataframe as PastClimateDataDTO.from_list_to_dataframe of
+        get_all_past_climate_data, built from the selected columns without ORM objects
+        or DTOs.
+
+        Raises:
+            PastClimateDataNotFoundError:
+        """
+        stmt = self.__select_past_climate_data_df().where(
+            PastClimateData.location_id == location_id
+        )
+        df = await self.__read_past_climate_data_df(
+            session=session, location_id=location_id, stmt=stmt
+        )
+        if len(df) == 0:
+            raise PastClimateDataNotFoundError(f"Can't find past climate data for location {location_id}")
+        return df
+
     async def get_past_climate_data(
         self,
         session: AsyncSession,
@@ -273,6 +342,53 @@ class PastClimateDataRepository:
         )
         return [self.__past_climate_data_model_to_dto(result) for result in results]
 
+    async def get_past_climate_data_of_previous_n_months_df(
+        self, session: AsyncSession, location_id: UUID, n: int
+    ) -> pd.DataFrame:
+        """Same dataframe as PastClimateDataDTO.from_list_to_dataframe of
+        get_past_climate_data_of_previous_n_months, see get_all_past_climate_data_df.
+
+        Raises:
+            PastClimateDataNotFoundError:
+        """
+        stmt = (
+            self.__select_past_climate_data_df()
+            .where(PastClimateData.location_id == location_id)
+            .order_by(desc(PastClimateData.year), desc(PastClimateData.month))
+            .limit(n)
+        )
+        df = await self.__read_past_climate_data_df(
+            session=session, location_id=location_id, stmt=stmt
+        )
+        if len(df) == 0:
+            raise PastClimateDataNotFoundError(
+                f"Can't find past climate data of previous {n} months for location {location_id}"
+            )
+        return df
+
+    def __select_past_climate_data_df(self):
+        return select(
+            PastClimateData.year,
+            PastClimateData.month,
+            *(
+                getattr(PastClimateData, PAST_CLIMATE_DATA_COLUMNS[df_column])
+                for df_column in PAST_CLIMATE_DATA_DF_COLUMNS
+            ),
+        )
+
+    async def __read_past_climate_data_df(
+        self, session: AsyncSession, location_id: UUID, stmt
+    ) -> pd.DataFrame:
+        """Dataframe of the rows of a __select_past_climate_data_df statement, indexed
+        by year and month in ascending order."""
+        rows = (await session.execute(stmt)).tuples().all()
+        df = pd.DataFrame.from_records(
+            rows, columns=["year", "month", *PAST_CLIMATE_DATA_DF_COLUMNS]
+        )
+        df.insert(0, "location_id", location_id)
+        df = df.set_index(keys=["year", "month"], drop=True)
+        return df.sort_index(ascending=[True, True])
+
     async def get_unique_location_climate_years(
         self,
         session: AsyncSession,
@@ -303,61 +419,129 @@ class PastClimateDataRepository:
         self,
         session: AsyncSession,
         csv_path: str,
-        location_ids: set[UUID],
+        location_ids: set[UUID] | None = None,
+        batch_size: int = 10_000,
     ):
-        loop = asyncio.get_running_loop()
-        with ThreadPoolExecutor() as pool:
-            total_past_climate_datas: list[list[PastClimateDataDTO]] = []
-            for location_id in location_ids:
-                past_climate_data = await self.get_all_past_climate_data(
-                    session=session, location_id=location_id
-                )
-                total_past_climate_datas.append(past_climate_data)
-            total_past_climate_data_dfs = [
-                PastClimateDataDTO.from_list_to_dataframe(past_climate_data)
-                for past_climate_data in total_past_climate_datas
-            ]
-            total_past_climate_data_df = pd.concat(
-                [df.reset_index() for df in total_past_climate_data_dfs],
-                ignore_index=True,
+        """Writes the past climate data of the locations, with the country, name and
+        coordinates of their location, in the format read by import_from_csv.
+
+        See __export for how the rows are read and written.
+
+        Args:
+            location_ids (set[UUID] | None, optional): None for every location
+        """
+
+        def write_batch(batch: pd.DataFrame, is_first: bool):
+            batch.to_csv(csv_path, mode="w" if is_first else "a", header=is_first, index=False)
+
+        await self.__export(
+            session=session,
+            location_ids=location_ids,
+            batch_size=batch_size,
+            write_batch=write_batch,
+        )
+
+    async def export_to_parquet(
+        self,
+        session: AsyncSession,
+        parquet_path: str,
+        location_ids: set[UUID] | None = None,
+        batch_size: int = 10_000,
+    ):
+        """Like export_to_csv, but writes a Parquet file with a row group per batch,
+        smaller and faster to read than the CSV. Needs pyarrow.
+
+        Args:
+            location_ids (set[UUID] | None, optional): None for every location
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer: pq.ParquetWriter | None = None
+
+        def write_batch(batch: pd.DataFrame, is_first: bool):
+            nonlocal writer
+            table = pa.Table.from_pandas(batch, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(parquet_path, schema=table.schema)
+            writer.write_table(table)
+
+        try:
+            await self.__export(
+                session=session,
+                location_ids=location_ids,
+                batch_size=batch_size,
+                write_batch=write_batch,
             )
-            locations_dict: dict[UUID, LocationDTO] = {}
-
-            async def get_location_callback(location_id: UUID) -> tuple[str, str, float, float]:
-                location = locations_dict.get(location_id)
-                if location is not None:
-                    return location.country, location.name, location.latitude, location.longitude
-                location = await self.location_repository.get_location_by_id(
-                    session=session, location_id=location_id
-                )
-                if location is None:
-                    raise LocationNotFoundError(str(location_id))
-                return location.country, location.name, location.latitude, location.longitude
-
-            def write_to_csv():
-                nonlocal total_past_climate_data_df
-                total_past_climate_data_df[
-                    [
-                        "location_country",
-                        "location_name",
-                        "location_latitude",
-                        "location_longitude"
-                    ]
-                ] = total_past_climate_data_df["location_id"].apply(
-                    lambda loc_id: pd.Series(
-                        asyncio.run_coroutine_threadsafe(
-                            coro=get_location_callback(loc_id), loop=loop
-                        ).result()
-                    )
-                )
-                total_past_climate_data_df = total_past_climate_data_df.drop(
-                    columns=["location_id"]
-                )
-                total_past_climate_data_df.to_csv(csv_path, index=False)
+        finally:
+            if writer is not None:
+                writer.close()
 
-            await loop.run_in_executor(executor=pool, func=write_to_csv)
+    async def __export(
+        self,
+        session: AsyncSession,
+        location_ids: set[UUID] | None,
+        batch_size: int,
+        write_batch: Callable[[pd.DataFrame, bool], None],
+    ):
+        """Streams the past climate data joined with their location from a server side
+        cursor, batch_size rows at a time, and calls write_batch in a thread with each
+        batch as a dataframe and whether it's the first one. A batch is written while
+        the next one is fetched, so at most two are in memory.
+        """
+        columns = [
+            "year",
+            "month",
+            *PAST_CLIMATE_DATA_COLUMNS.keys(),
+            "location_country",
+            "location_name",
+            "location_latitude",
+            "location_longitude",
+        ]
+        stmt = (
+            select(
+                PastClimateData.year,
+                PastClimateData.month,
+                *(
+                    getattr(PastClimateData, column).label(df_column)
+                    for df_column, column in PAST_CLIMATE_DATA_COLUMNS.items()
+                ),
+                Location.country.label("location_country"),
+                Location.name.label("location_name"),
+                Location.latitude.label("location_latitude"),
+                Location.longitude.label("location_longitude"),
+            )
+            .join(Location, Location.id == PastClimateData.location_id)
+            .order_by(
+                asc(PastClimateData.location_id),
+                asc(PastClimateData.year),
+                asc(PastClimateData.month),
+            )
+            .execution_options(yield_per=batch_size)
+        )
+        if location_ids is not None:
+            stmt = stmt.where(PastClimateData.location_id.in_(list(location_ids)))
 
-        logging.info(f"TOTAL: {len(total_past_climate_data_df)}")
+        loop = asyncio.get_running_loop()
+        rows = 0
+        # one thread, so that the batches are written in order
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            writing: asyncio.Future | None = None
+            try:
+                result = await session.stream(stmt)
+                async for partition in result.partitions():
+                    batch = pd.DataFrame.from_records(partition, columns=columns)
+                    if writing is not None:
+                        await writing
+                    writing = loop.run_in_executor(pool, write_batch, batch, rows == 0)
+                    rows += len(batch)
+                if writing is not None:
+                    await writing
+            finally:
+                if writing is not None:
+                    await asyncio.gather(writing, return_exceptions=True)
+
+        logging.info(f"Exported {rows} past climate data")
 
     async def delete_locations_without_past_climate_data(self, session: AsyncSession):
         locations = await self.location_repository.get_locations(session=session, is_visible=False)
@@ -369,52 +553,58 @@ class PastClimateDataRepository:
                 logging.info(f"Deleted location without past climate data {location.id}")
 
 
-    async def import_from_csv(self, session: AsyncSession, csv_path: str):
-        def read_csv() -> pd.DataFrame:
-            return pd.read_csv(csv_path)
+    async def import_from_csv(
+        self, session: AsyncSession, csv_path: str, chunksize: int = 50_000
+    ):
+        """Upserts the past climate data of a CSV written by export_to_csv, reading it
+        chunksize rows at a time, see import_csv_in_chunks.
 
-        loop = asyncio.get_running_loop()
-        with ThreadPoolExecutor() as pool:
-            data = await loop.run_in_executor(executor=pool, func=read_csv)
+        Raises:
+            LocationNotFoundError: if a location of the CSV doesn't exist
+        """
+        location_columns = [
+            "location_country",
+            "location_name",
+            "location_latitude",
+            "location_longitude",
+        ]
+        # each location is looked up once
+        location_ids: dict[tuple, UUID] = {}
+
+        async def write_chunk(chunk: pd.DataFrame):
+            for country, name, latitude, longitude in (
+                chunk[location_columns].drop_duplicates().itertuples(index=False, name=None)
+            ):
+                if (country, name, latitude, longitude) in location_ids:
+                    continue
+                location = await self.location_repository.get_location_by_country_name_coordinates(
+                    session=session,
+                    country=country,
+                    name=name,
+                    latitude=latitude,
+                    longitude=longitude,
+                )
+                if location is None:
+                    raise LocationNotFoundError()
+                location_ids[(country, name, latitude, longitude)] = location.id
 
-        deleted_locations: set[UUID] = set()
+            chunk["location_id"] = [
+                location_ids[key]
+                for key in chunk[location_columns].itertuples(index=False, name=None)
+            ]
+            await self.__upsert_past_climate_data(
+                session=session, past_climate_data_df=chunk
+            )
 
-        dicts = cast(list[dict[str, Any]], data.to_dict(orient="records"))
-        for dct in dicts:
-            location = await self.location_repository.get_location_by_country_name_coordinates(
-                session=session,
-                country=dct["location_country"],
-                name=dct["location_name"],
-                latitude=dct["location_latitude"],
-                longitude=dct["location_longitude"]
+        rows = await import_csv_in_chunks(
+            csv_path=csv_path, write_chunk=write_chunk, chunksize=chunksize
+        )
+        await session.execute(
+            delete(ClimateForecast).where(
+                ClimateForecast.location_id.in_(list(location_ids.values()))
             )
-            dct.pop("location_country")
-            dct.pop("location_name")
-            dct.pop("location_latitude")
-            dct.pop("location_longitude")
-            if location is None:
-                raise LocationNotFoundError()
-            if location.id not in deleted_locations:
-                result = await session.execute(
-                    delete(PastClimateData)
-                    .where((PastClimateData.location_id == location.id))
-                    .returning(PastClimateData.id)
-                )
-                ids = list(result)
-                deleted_locations.add(location.id)
-            columns_mappings = {
-                "10m_u_component_of_wind": "u_component_of_wind_10m",
-                "10m_v_component_of_wind": "v_component_of_wind_10m",
-                "2m_temperature": "temperature_2m",
-                "2m_dewpoint_temperature": "dewpoint_temperature_2m",
-            }
-            for key, value in columns_mappings.items():
-                dct[value] = dct[key]
-                dct.pop(key)
-            dct["location_id"] = location.id
-            dct.update({"id": uuid.uuid4()})
-            stmt = insert(PastClimateData).values(**dct)
-            await session.execute(stmt)
+        )
+        logging.info(f"Imported {rows} past climate data")
 
     def __past_climate_data_model_to_dto(
         self, past_climate_data: PastClimateData
@@ -19,5 +19,5 @@ async def get_crops(
     crop_repository: Annotated[CropRepository, Depends(get_crop_repository)],
 ) -> list[CropDetailsResponse]:
     async with session_maker() as session:
-        crops = await crop_repository.get_all_crops(session=session)
+        crops = await crop_repository.get_all_crops_details(session=session)
     return [CropDetailsResponse(name=crop.name) for crop in crops]
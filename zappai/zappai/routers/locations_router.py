@@ -1,27 +1,25 @@
 from typing import Annotated
-from fastapi import APIRouter, BackgroundTasks, Depends, Response, status
+from fastapi import APIRouter, Depends, Response, status
 from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import async_sessionmaker
 
 from zappai.auth_tokens.di import get_current_user, get_current_user_with_error
+from zappai.config import settings
 from zappai.database.di import get_session_maker
+from zappai.jobs.di import get_job_repository
+from zappai.jobs.repositories import JobRepository
 from uuid import UUID
 
 from zappai.users.models import User
 from zappai.zappai.di import (
     get_climate_generative_model_repository,
     get_location_repository,
-    get_past_climate_data_repository,
 )
-from zappai.zappai.dtos import LocationDTO
-from zappai.zappai.exceptions import PastClimateDataNotFoundError
+from zappai.zappai.dtos import LocationStatusDTO
 from zappai.zappai.repositories.climate_generative_model_repository import (
     ClimateGenerativeModelRepository,
 )
 from zappai.zappai.repositories.location_repository import LocationRepository
-from zappai.zappai.repositories.past_climate_data_repository import (
-    PastClimateDataRepository,
-)
 from zappai.zappai.schemas import CreateLocationBody, LocationDetailsResponse
 
 
@@ -61,6 +59,27 @@ async def create_location(
     )
 
 
+def _to_location_details_response(
+    location_status: LocationStatusDTO, is_global_model_used: bool
+) -> LocationDetailsResponse:
+    location = location_status.location
+    has_past_climate_data = location_status.last_past_climate_data_year is not None
+    return LocationDetailsResponse(
+        id=location.id,
+        country=location.country,
+        name=location.name,
+        longitude=location.longitude,
+        latitude=location.latitude,
+        created_at=location.created_at,
+        # a model can't forecast a location without past climate data to start from
+        is_model_ready=has_past_climate_data
+        and (location_status.has_climate_generative_model or is_global_model_used),
+        is_downloading_past_climate_data=location.is_downloading_past_climate_data,
+        last_past_climate_data_year=location_status.last_past_climate_data_year,
+        last_past_climate_data_month=location_status.last_past_climate_data_month,
+    )
+
+
 @locations_router.get(path="", response_model=list[LocationDetailsResponse])
 async def get_locations(
     user: Annotated[User, Depends(get_current_user_with_error)],
@@ -68,45 +87,26 @@ async def get_locations(
     location_repository: Annotated[
         LocationRepository, Depends(get_location_repository)
     ],
-    past_climate_data_repository: Annotated[
-        PastClimateDataRepository, Depends(get_past_climate_data_repository)
-    ],
     climate_generative_model_repository: Annotated[
         ClimateGenerativeModelRepository,
         Depends(get_climate_generative_model_repository),
     ],
 ) -> list[LocationDetailsResponse]:
     async with session_maker() as session:
-        result = await location_repository.get_locations(session=session, is_visible=True)
-        response: list[LocationDetailsResponse] = []
-        for location in result:
-            try:
-                data = await past_climate_data_repository.get_past_climate_data_of_previous_n_months(
-                    session=session, location_id=location.id, n=1
-                )
-                model = await climate_generative_model_repository.get_climate_generative_model_by_location_id(
-                    session=session, location_id=location.id
-                )
-            except PastClimateDataNotFoundError:
-                data = None
-                model = None
-            year = None if data is None else data[0].year
-            month = None if data is None else data[0].month
-            response.append(
-                LocationDetailsResponse(
-                    id=location.id,
-                    country=location.country,
-                    name=location.name,
-                    longitude=location.longitude,
-                    latitude=location.latitude,
-                    created_at=location.created_at,
-                    is_model_ready=model is not None,
-                    is_downloading_past_climate_data=location.is_downloading_past_climate_data,
-                    last_past_climate_data_year=year,
-                    last_past_climate_data_month=month,
-                )
+        location_statuses = await location_repository.get_location_statuses(
+            session=session, is_visible=True
+        )
+        is_global_model_used = (
+            await climate_generative_model_repository.is_global_model_used_for_locations(
+                session=session
             )
-    return response
+        )
+    return [
+        _to_location_details_response(
+            location_status=location_status, is_global_model_used=is_global_model_used
+        )
+        for location_status in location_statuses
+    ]
 
 
 @locations_router.get(path="/{location_id}", response_model=LocationDetailsResponse)
@@ -116,46 +116,25 @@ async def get_location(
     location_repository: Annotated[
         LocationRepository, Depends(get_location_repository)
     ],
-    past_climate_data_repository: Annotated[
-        PastClimateDataRepository, Depends(get_past_climate_data_repository)
-    ],
     climate_generative_model_repository: Annotated[
         ClimateGenerativeModelRepository,
         Depends(get_climate_generative_model_repository),
     ],
     location_id: UUID,
 ):
-    location: LocationDTO | None = None
     async with session_maker() as session:
-        location = await location_repository.get_location_by_id(
+        location_statuses = await location_repository.get_location_statuses(
             session=session, location_id=location_id
         )
-        if location is not None:
-            try:
-                data = await past_climate_data_repository.get_past_climate_data_of_previous_n_months(
-                    session=session, location_id=location.id, n=1
-                )
-                model = await climate_generative_model_repository.get_climate_generative_model_by_location_id(
-                    session=session, location_id=location.id
-                )
-            except PastClimateDataNotFoundError:
-                data = None
-                model = None
-    if location is None:
-        return JSONResponse(status_code=404, content={"error": "Location not found"})
-    year = None if data is None else data[0].year
-    month = None if data is None else data[0].month
-    return LocationDetailsResponse(
-        id=location.id,
-        country=location.country,
-        name=location.name,
-        longitude=location.longitude,
-        latitude=location.latitude,
-        created_at=location.created_at,
-        is_model_ready=model is not None,
-        is_downloading_past_climate_data=location.is_downloading_past_climate_data,
-        last_past_climate_data_year=year,
-        last_past_climate_data_month=month,
+        if len(location_statuses) == 0:
+            return JSONResponse(status_code=404, content={"error": "Location not found"})
+        is_global_model_used = (
+            await climate_generative_model_repository.is_global_model_used_for_locations(
+                session=session
+            )
+        )
+    return _to_location_details_response(
+        location_status=location_statuses[0], is_global_model_used=is_global_model_used
     )
 
 
@@ -187,10 +166,10 @@ async def get_is_climate_generative_model_ready(
     response: Response,
 ):
     async with session_maker() as session:
-        model = await climate_generative_model_repository.get_climate_generative_model_by_location_id(
+        is_ready = await climate_generative_model_repository.is_climate_generative_model_ready(
             session=session, location_id=location_id
         )
-    if model is None:
+    if not is_ready:
         return JSONResponse({"message": "Not found"}, status_code=404)
     return {"message": "Found"}
 
@@ -199,43 +178,24 @@ async def get_is_climate_generative_model_ready(
 async def download_past_climate_data_for_location(
     user: Annotated[User, Depends(get_current_user_with_error)],
     session_maker: Annotated[async_sessionmaker, Depends(get_session_maker)],
-    past_climate_data_repository: Annotated[
-        PastClimateDataRepository, Depends(get_past_climate_data_repository)
-    ],
-    climate_generative_model_repository: Annotated[
-        ClimateGenerativeModelRepository,
-        Depends(get_climate_generative_model_repository),
-    ],
     location_repository: Annotated[
         LocationRepository, Depends(get_location_repository)
     ],
+    job_repository: Annotated[JobRepository, Depends(get_job_repository)],
     location_id: UUID,
-    background_tasks: BackgroundTasks,
 ):
-    async def func():
-        error: Exception | None = None
-        async with session_maker() as session:
-            await location_repository.set_location_to_downloading(
-                session=session, location_id=location_id
-            )
-            await session.commit()
-            try:
-                await past_climate_data_repository.download_new_past_climate_data(
-                    session=session, location_id=location_id
-                )
-                await climate_generative_model_repository.create_model_for_location(
-                    session=session, location_id=location_id
-                )
-                await session.commit()
-            except Exception as e:
-                error = e
-            finally:
-                await location_repository.set_location_to_not_downloading(
-                    session=session, location_id=location_id
-                )
-                await session.commit()          
-        if error is not None:
-            raise error
-
-    background_tasks.add_task(func=func)
-    return {"message": "Download started"}
+    # downloaded by a worker process, which then queues the training of the model,
+    # see zappai.jobs.worker. Requests for a location that is already being
+    # downloaded get the job of the first one
+    async with session_maker() as session:
+        job = await job_repository.enqueue_job(
+            session=session,
+            type="download_past_climate_data",
+            location_id=location_id,
+            max_attempts=settings.worker_job_max_attempts,
+        )
+        await location_repository.set_location_to_downloading(
+            session=session, location_id=location_id
+        )
+        await session.commit()
+    return {"message": "Download started", "jobId": job.id}
@@ -1,6 +1,6 @@
 from typing import Annotated
 from uuid import UUID
-from fastapi import APIRouter, Depends, Response
+from fastapi import APIRouter, Depends, Query, Response
 from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import async_sessionmaker
 
@@ -8,20 +8,59 @@ from zappai.auth_tokens.di import get_current_user, get_current_user_with_error
 from zappai.database.di import get_session_maker
 from zappai.users.models import User
 from zappai.zappai.di import get_crop_optimizer_service
+from zappai.zappai.dtos import ClimateDataDTO
 from zappai.zappai.exceptions import (
     ClimateGenerativeModelNotFoundError,
+    CropNotFoundError,
     CropYieldModelNotFoundError,
+    LocationNotFoundError,
 )
 from zappai.zappai.schemas import (
     ClimateDataDetails,
+    CropPredictionsDetails,
+    CropsPredictionsResponse,
     PredictionsResponse,
     SowingAndHarvestingDetails,
 )
-from zappai.zappai.services.crop_optimizer_service import CropOptimizerService
+from zappai.zappai.services.crop_optimizer_service import (
+    CropOptimizerService,
+    SowingAndHarvestingDTO,
+)
 
 predictions_router = APIRouter(prefix="/predictions")
 
 
+def _to_sowing_and_harvesting_details(
+    item: SowingAndHarvestingDTO,
+) -> SowingAndHarvestingDetails:
+    return SowingAndHarvestingDetails(
+        sowing_year=item.sowing_year,
+        sowing_month=item.sowing_month,
+        harvest_year=item.harvest_year,
+        harvest_month=item.harvest_month,
+        estimated_yield_per_hectar=item.estimated_yield_per_hectar,
+        duration=item.duration,
+    )
+
+
+def _to_climate_data_details(item: ClimateDataDTO) -> ClimateDataDetails:
+    return ClimateDataDetails(
+        location_id=item.location_id,
+        year=item.year,
+        month=item.month,
+        temperature_2m=item.temperature_2m,
+        total_precipitation=item.total_precipitation,
+        surface_solar_radiation_downwards=item.surface_solar_radiation_downwards,
+        surface_thermal_radiation_downwards=item.surface_thermal_radiation_downwards,
+        surface_net_solar_radiation=item.surface_net_solar_radiation,
+        surface_net_thermal_radiation=item.surface_net_thermal_radiation,
+        total_cloud_cover=item.total_cloud_cover,
+        dewpoint_temperature_2m=item.dewpoint_temperature_2m,
+        soil_temperature_level_3=item.soil_temperature_level_3,
+        volumetric_soil_water_layer_3=item.volumetric_soil_water_layer_3,
+    )
+
+
 @predictions_router.get(path="", response_model=PredictionsResponse)
 async def get_best_crop_sowing_and_harvesting_prediction(
     user: Annotated[User, Depends(get_current_user_with_error)],
@@ -39,35 +78,55 @@ async def get_best_crop_sowing_and_harvesting_prediction(
             )
         return PredictionsResponse(
             best_combinations=[
-                SowingAndHarvestingDetails(
-                    sowing_year=item.sowing_year,
-                    sowing_month=item.sowing_month,
-                    harvest_year=item.harvest_year,
-                    harvest_month=item.harvest_month,
-                    estimated_yield_per_hectar=item.estimated_yield_per_hectar,
-                    duration=item.duration,
-                )
+                _to_sowing_and_harvesting_details(item)
                 for item in result.best_combinations
             ],
-            forecast=[
-                ClimateDataDetails(
-                    location_id=item.location_id,
-                    year=item.year,
-                    month=item.month,
-                    temperature_2m=item.temperature_2m,
-                    total_precipitation=item.total_precipitation,
-                    surface_solar_radiation_downwards=item.surface_solar_radiation_downwards,
-                    surface_thermal_radiation_downwards=item.surface_thermal_radiation_downwards,
-                    surface_net_solar_radiation=item.surface_net_solar_radiation,
-                    surface_net_thermal_radiation=item.surface_net_thermal_radiation,
-                    total_cloud_cover=item.total_cloud_cover,
-                    dewpoint_temperature_2m=item.dewpoint_temperature_2m,
-                    soil_temperature_level_3=item.soil_temperature_level_3,
-                    volumetric_soil_water_layer_3=item.volumetric_soil_water_layer_3,
+            forecast=[_to_climate_data_details(item) for item in result.forecast],
+        )
+    except CropYieldModelNotFoundError:
+        return JSONResponse(
+            status_code=404, content={"error": "Crop yield model not found"}
+        )
+    except ClimateGenerativeModelNotFoundError:
+        return JSONResponse(
+            status_code=404, content={"error": "Climate generative model not found"}
+        )
+
+
+@predictions_router.get(path="/crops", response_model=CropsPredictionsResponse)
+async def get_best_sowing_and_harvesting_predictions_for_crops(
+    user: Annotated[User, Depends(get_current_user_with_error)],
+    session_maker: Annotated[async_sessionmaker, Depends(get_session_maker)],
+    crop_optimizer_service: Annotated[
+        CropOptimizerService, Depends(get_crop_optimizer_service)
+    ],
+    location_id: UUID,
+    crop_names: Annotated[list[str] | None, Query()] = None,
+):
+    """Best sowing and harvest months of many crops on one forecast of the location,
+    every crop with a crop yield model if crop_names isn't given."""
+    try:
+        async with session_maker() as session:
+            result = await crop_optimizer_service.get_best_sowing_and_harvesting_for_crops(
+                session=session, location_id=location_id, crop_names=crop_names
+            )
+        return CropsPredictionsResponse(
+            crops=[
+                CropPredictionsDetails(
+                    crop_name=crop_name,
+                    best_combinations=[
+                        _to_sowing_and_harvesting_details(item)
+                        for item in best_combinations
+                    ],
                 )
-                for item in result.forecast
+                for crop_name, best_combinations in result.best_combinations.items()
             ],
+            forecast=[_to_climate_data_details(item) for item in result.forecast],
         )
+    except LocationNotFoundError:
+        return JSONResponse(status_code=404, content={"error": "Location not found"})
+    except CropNotFoundError:
+        return JSONResponse(status_code=404, content={"error": "Crop not found"})
     except CropYieldModelNotFoundError:
         return JSONResponse(
             status_code=404, content={"error": "Crop yield model not found"}
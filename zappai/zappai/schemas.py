@@ -77,5 +77,15 @@ class PredictionsResponse(CamelCaseBaseModel):
     forecast: list[ClimateDataDetails]
 
 
+class CropPredictionsDetails(CamelCaseBaseModel):
+    crop_name: str
+    best_combinations: list[SowingAndHarvestingDetails]
+
+
+class CropsPredictionsResponse(CamelCaseBaseModel):
+    crops: list[CropPredictionsDetails]
+    forecast: list[ClimateDataDetails]
+
+
 class CropDetailsResponse(CamelCaseBaseModel):
     name: str
@@ -1,12 +1,12 @@
 from __future__ import annotations
 import asyncio
-from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass
-import multiprocessing
-from threading import Thread
-from typing import Callable, cast
+import logging
+from typing import Callable, Literal, cast
 from uuid import UUID
 
+import numpy as np
 import pandas as pd
 from sqlalchemy.ext.asyncio import AsyncSession
 from zappai.schemas import CustomBaseModel
@@ -17,10 +17,16 @@ from zappai.zappai.exceptions import (
     LocationNotFoundError,
 )
 from zappai.zappai.repositories.climate_generative_model_repository import (
+    FEATURES as CLIMATE_GENERATIVE_MODEL_FEATURES,
     ClimateGenerativeModelRepository,
 )
 from zappai.zappai.repositories.crop_repository import CropRepository
-from zappai.zappai.dtos import ClimateDataDTO, CropDTO, FutureClimateDataDTO
+from zappai.zappai.dtos import (
+    ClimateSeries,
+    CropDTO,
+    CropDetailsDTO,
+    FutureClimateDataDTO,
+)
 from zappai.zappai.repositories.future_climate_data_repository import (
     FutureClimateDataRepository,
 )
@@ -28,28 +34,169 @@ from zappai.zappai.repositories.location_repository import LocationRepository
 from zappai.zappai.repositories.past_climate_data_repository import (
     PastClimateDataRepository,
 )
+from zappai.zappai.utils.cache import LRUCache
 from zappai.zappai.utils.common import (
     calc_months_delta,
-    create_stats_dataframe,
     get_next_n_months,
 )
+from zappai.zappai.utils.genetic import (
+    GeneticAlgorithm,
+    Individual,
+    Population,
+    SelectionStrategy,
+    individual_to_int,
+    individuals_to_ints,
+)
+from zappai.zappai.utils.window_stats import WindowStats
 from sklearn.ensemble import RandomForestRegressor
 from zappai.zappai.services.crop_yield_model_service import (
     FEATURES as CROP_YIELD_MODEL_FEATURES,
     TARGET as CROP_YIELD_MODEL_TARGET,
+    create_features as create_crop_yield_model_features,
 )
-import random
 
-Individual = list[bool]
-Population = list[Individual]
-FitnessCallback = Callable[[Individual], float]
+OptimizerMode = Literal["exhaustive", "genetic"]
+
+# location_id, id of the forecast, crop name, md5 of the crop yield model and top k,
+# the exhaustive search gives the same result until one of them changes
+OptimizerResultKey = tuple[UUID, UUID, str, str, int]
+
+# months of forecast the sowing and harvest months are chosen from
+FORECAST_MONTHS = 24
+
+
+def get_valid_sowing_and_harvesting_indexes(
+    forecast_df: pd.DataFrame, crop: CropDTO
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Enumerates every (sowing, harvest) pair of the forecast whose duration is
+    within the farming months of the crop.
+
+    Args:
+        forecast_df (pd.DataFrame): forecast indexed by (year, month)
+        crop (CropDTO):
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: sowing indexes, harvest indexes, durations
+    """
+    years = forecast_df.index.get_level_values("year").to_numpy()
+    months = forecast_df.index.get_level_values("month").to_numpy()
+    sowing, harvest = np.triu_indices(len(forecast_df), k=1)
+    durations = (years[harvest] - years[sowing]) * 12 + (
+        months[harvest] - months[sowing]
+    )
+    mask = (
+        (durations > 0)
+        & (durations >= cast(int, crop.min_farming_months))
+        & (durations <= cast(int, crop.max_farming_months))
+    )
+    return sowing[mask], harvest[mask], durations[mask]
+
+
+def create_sowing_and_harvesting_features(
+    forecast_df: pd.DataFrame,
+    sowing: np.ndarray,
+    harvest: np.ndarray,
+    durations: np.ndarray,
+    window_stats: WindowStats | None = None,
+) -> np.ndarray:
+    """Builds the crop yield model input for many (sowing, harvest) pairs at once.
+    Climate stats are computed over the months from sowing to harvest, both included.
+
+    Returns:
+        np.ndarray: shape (len(sowing), len(CROP_YIELD_MODEL_FEATURES))
+    """
+    if window_stats is None:
+        window_stats = WindowStats(
+            df=forecast_df, columns=CLIMATE_GENERATIVE_MODEL_FEATURES
+        )
+    years = forecast_df.index.get_level_values("year").to_numpy()
+    months = forecast_df.index.get_level_values("month").to_numpy()
+    return create_crop_yield_model_features(
+        sowing_and_harvesting=np.stack(
+            [years[sowing], months[sowing], years[harvest], months[harvest], durations],
+            axis=1,
+        ),
+        window_stats=window_stats,
+        starts=sowing,
+        ends=harvest,
+    )
+
+
+def run_exhaustive_search(
+    forecast_df: pd.DataFrame,
+    crop: CropDTO,
+    model: RandomForestRegressor,
+    top_k: int,
+) -> list[tuple[int, int, float]]:
+    """Scores every valid (sowing, harvest) pair of the forecast with a single
+    predict call and returns the exact top k.
+
+    Returns:
+        list[tuple[int, int, float]]: sowing index, harvest index and estimated yield, best first
+    """
+    sowing, harvest, durations = get_valid_sowing_and_harvesting_indexes(
+        forecast_df=forecast_df, crop=crop
+    )
+    if len(sowing) == 0:
+        return []
+    x = create_sowing_and_harvesting_features(
+        forecast_df=forecast_df, sowing=sowing, harvest=harvest, durations=durations
+    )
+    predictions = cast(np.ndarray, model.predict(x))
+    best = np.argsort(-predictions, kind="stable")[:top_k]
+    return [
+        (int(sowing[i]), int(harvest[i]), float(predictions[i])) for i in best
+    ]
+
+
+def run_exhaustive_search_for_crops(
+    forecast_df: pd.DataFrame,
+    crops: list[tuple[CropDTO, RandomForestRegressor]],
+    top_k: int,
+) -> list[list[tuple[int, int, float]]]:
+    """run_exhaustive_search for many crops on the same forecast. The features of
+    every (sowing, harvest) pair are built once, each crop scores the pairs within
+    its farming months.
+
+    Returns:
+        list[list[tuple[int, int, float]]]: the result of run_exhaustive_search for each crop
+    """
+    years = forecast_df.index.get_level_values("year").to_numpy()
+    months = forecast_df.index.get_level_values("month").to_numpy()
+    sowing, harvest = np.triu_indices(len(forecast_df), k=1)
+    durations = (years[harvest] - years[sowing]) * 12 + (
+        months[harvest] - months[sowing]
+    )
+    x = create_sowing_and_harvesting_features(
+        forecast_df=forecast_df, sowing=sowing, harvest=harvest, durations=durations
+    )
+
+    results: list[list[tuple[int, int, float]]] = []
+    for crop, model in crops:
+        # same pairs, in the same order, as get_valid_sowing_and_harvesting_indexes
+        mask = (
+            (durations > 0)
+            & (durations >= cast(int, crop.min_farming_months))
+            & (durations <= cast(int, crop.max_farming_months))
+        )
+        if not np.any(mask):
+            results.append([])
+            continue
+        crop_sowing, crop_harvest = sowing[mask], harvest[mask]
+        predictions = cast(np.ndarray, model.predict(x[mask]))
+        best = np.argsort(-predictions, kind="stable")[:top_k]
+        results.append(
+            [
+                (int(crop_sowing[i]), int(crop_harvest[i]), float(predictions[i]))
+                for i in best
+            ]
+        )
+    return results
 
 
 def run_genetic_algorithm(forecast_df: pd.DataFrame, crop: CropDTO, model: RandomForestRegressor):
     def on_population_created(i: int, population: Population):
-        print(f"\rPopulation {i}/20 processed", end="")
-        if i == 20:
-            print()
+        logging.debug(f"Population {i}/20 of crop {crop.name} processed")
 
     ga = CropGeneticAlgorithm(
         chromosome_length=10,
@@ -62,11 +209,35 @@ def run_genetic_algorithm(forecast_df: pd.DataFrame, crop: CropDTO, model: Rando
         model=model,
         on_population_created=on_population_created,
         parallel_workers=1,
+        elitism=1,
     )
     return ga.run()
 
 
-class CropGeneticAlgorithm:
+def get_genetic_algorithm_candidates(
+    forecast_df: pd.DataFrame, individuals: list[Individual], fitnesses: list[float]
+) -> list[tuple[int, int, float]]:
+    """Turns the best individual of each generation into distinct valid combinations.
+
+    With elitism the same individual is the best of many generations, and the best of
+    an early generation may still be invalid, e.g. an index past the end of the
+    forecast or a harvest before the sowing, which has fitness 0.
+
+    Returns:
+        list[tuple[int, int, float]]: sowing index, harvest index and estimated yield of
+            each (sowing, harvest) pair, once
+    """
+    candidates: dict[tuple[int, int], float] = {}
+    for individual, fitness in zip(individuals, fitnesses):
+        sowing = individual_to_int(individual[:5])
+        harvest = individual_to_int(individual[5:])
+        if harvest >= len(forecast_df) or sowing >= harvest or fitness <= 0:
+            continue
+        candidates[(sowing, harvest)] = max(fitness, candidates.get((sowing, harvest), 0))
+    return [(sowing, harvest, fitness) for (sowing, harvest), fitness in candidates.items()]
+
+
+class CropGeneticAlgorithm(GeneticAlgorithm):
     def __init__(
         self,
         chromosome_length: int,
@@ -79,198 +250,78 @@ class CropGeneticAlgorithm:
         model: RandomForestRegressor,
         on_population_created: Callable[[int, Population], None] | None = None,
         parallel_workers: int | None = None,
+        selection: SelectionStrategy | None = None,
+        elitism: int = 0,
+        seed: int | None = None,
     ) -> None:
-        self.chromosome_length = chromosome_length
-        self.population_size = population_size
-        self.mutation_rate = mutation_rate
-        self.crossover_rate = crossover_rate
-        self.generations = generations
+        super().__init__(
+            fitness=None,
+            batch_fitness=self.batch_fitness_func,
+            chromosome_length=chromosome_length,
+            population_size=population_size,
+            mutation_rate=mutation_rate,
+            crossover_rate=crossover_rate,
+            generations=generations,
+            on_population_created=on_population_created,
+            parallel_workers=parallel_workers,
+            selection=selection,
+            elitism=elitism,
+            seed=seed,
+        )
         self.forecast_df = forecast_df
         self.crop = crop
         self.model = model
-        self.on_population_processed = on_population_created
-        self.parallel_workers = (
-            parallel_workers
-            if parallel_workers is not None
-            else multiprocessing.cpu_count()
+        self.window_stats = WindowStats(
+            df=forecast_df, columns=CLIMATE_GENERATIVE_MODEL_FEATURES
         )
 
-    def fitness_func(self, individual: Individual) -> float:
-        if len(individual) != 10:
-            raise Exception(f"Bro individual must be of size 10...")
-        sowing = individual_to_int(individual[:5])
-        harvesting = individual_to_int(individual[5:])
-
-        if (sowing >= len(self.forecast_df)) | (harvesting >= len(self.forecast_df)):
-            return 0.0
-
-        sowing_year, sowing_month = self.forecast_df.index[sowing]
-        harvest_year, harvest_month = self.forecast_df.index[harvesting]
+    def batch_fitness_func(self, population: np.ndarray) -> np.ndarray:
+        """Scores the whole population with one predict call.
 
-        duration = calc_months_delta(
-            start_year=sowing_year,
-            start_month=sowing_month,
-            end_year=harvest_year,
-            end_month=harvest_month,
-        )
+        Args:
+            population (np.ndarray): bit matrix of shape (individuals, 10), first 5 bits
+                are the sowing month index, last 5 the harvest month index
 
-        if duration <= 0:
-            return 0.0
-        if (duration < cast(int, self.crop.min_farming_months)) | (
-            duration > cast(int, self.crop.max_farming_months)
-        ):
-            return 0.0
-
-        forecast_for_individual = self.forecast_df[
-            (
-                (self.forecast_df.index.get_level_values("year") < harvest_year)
-                | (
-                    (self.forecast_df.index.get_level_values("year") == harvest_year)
-                    & (self.forecast_df.index.get_level_values("year") <= harvest_month)
-                )
-            )
-            | (
-                (self.forecast_df.index.get_level_values("year") > sowing_year)
-                | (
-                    (self.forecast_df.index.get_level_values("year") == sowing_year)
-                    & (self.forecast_df.index.get_level_values("year") >= sowing_month)
-                )
+        Returns:
+            np.ndarray: shape (individuals,), 0 for invalid individuals
+        """
+        if population.shape[1] != 10:
+            raise ValueError(
+                f"Individuals must have 10 bits, 5 for the sowing month and 5 for the harvest month, not {population.shape[1]}"
             )
-        ]
-
-        stats_forecast = create_stats_dataframe(df=forecast_for_individual, ignore=[])
-
-        x_df = pd.DataFrame(
-            {
-                "sowing_year": [sowing_year],
-                "sowing_month": [sowing_month],
-                "harvest_year": [harvest_year],
-                "harvest_month": [harvest_month],
-                "duration_months": calc_months_delta(
-                    start_year=sowing_year,
-                    start_month=sowing_month,
-                    end_year=harvest_year,
-                    end_month=harvest_month,
-                ),
-            }
-        )
-        x_df = pd.concat([x_df, stats_forecast], axis=1)
+        sowing = individuals_to_ints(population[:, :5])
+        harvesting = individuals_to_ints(population[:, 5:])
 
-        pred = self.model.predict(x_df[CROP_YIELD_MODEL_FEATURES].to_numpy())
-        return pred[0]
+        fitnesses = np.zeros(len(population))
+        valid = (sowing < len(self.forecast_df)) & (harvesting < len(self.forecast_df))
+        sowing, harvesting = sowing[valid], harvesting[valid]
 
-    def __generate_individual(self) -> Individual:
-        return [randbool() for _ in range(self.chromosome_length)]
-
-    def __generate_population(
-        self,
-    ) -> Population:
-        return [self.__generate_individual() for _ in range(self.population_size)]
-
-    def process_chunk(self, position: int, chunk: Population):
-        return position, [self.fitness_func(individual) for individual in chunk]
-
-    def __calc_fitnesses_in_pool(self, population: Population) -> list[float]:
-        if self.parallel_workers == 1:
-            fitnesses = [self.fitness_func(individual) for individual in population]
-        else:
-            chunk_size = len(population) // self.parallel_workers
-            chunks: list[list[Individual]] = []
-            remainder = len(population) % self.parallel_workers
-            start = 0
-            end = 0
-            for i in range(self.parallel_workers):
-                end = start + chunk_size + (1 if i < remainder else 0)
-                chunks.append(population[start:end])
-                start = end
-
-            with ProcessPoolExecutor(max_workers=self.parallel_workers) as pool:
-                futures = [
-                    pool.submit(self.process_chunk, position=i, chunk=chunk)
-                    for i, chunk in enumerate(chunks)
-                ]
-                results = [future.result() for future in as_completed(futures)]
-
-            results = sorted(results, key=lambda result: result[0])
-            fitnesses = [
-                fitness
-                for position, chunk_fitnesses in results
-                for fitness in chunk_fitnesses
-            ]
+        years = self.forecast_df.index.get_level_values("year").to_numpy()
+        months = self.forecast_df.index.get_level_values("month").to_numpy()
+        durations = (years[harvesting] - years[sowing]) * 12 + (
+            months[harvesting] - months[sowing]
+        )
+        valid_durations = (
+            (durations > 0)
+            & (durations >= cast(int, self.crop.min_farming_months))
+            & (durations <= cast(int, self.crop.max_farming_months))
+        )
+        valid[valid] = valid_durations
+        if not np.any(valid):
+            return fitnesses
+
+        x = create_sowing_and_harvesting_features(
+            forecast_df=self.forecast_df,
+            sowing=sowing[valid_durations],
+            harvest=harvesting[valid_durations],
+            durations=durations[valid_durations],
+            window_stats=self.window_stats,
+        )
+        fitnesses[valid] = self.model.predict(x)
         return fitnesses
 
-    def __select(self, population: Population):
-        fitnesses: list[float] = self.__calc_fitnesses_in_pool(population)
-        total_fitness = sum(fitnesses)
-        if total_fitness == 0:
-            selection_probs = [1 / len(population) for i in range(len(population))]
-        else:
-            selection_probs = [fitness / total_fitness for fitness in fitnesses]
-        return population[
-            random.choices(range(len(population)), weights=selection_probs, k=1)[0]
-        ]
-
-    def __crossover(self, parent1: Individual, parent2: Individual):
-        if random.random() < self.crossover_rate:
-            point = random.randint(1, len(parent1) - 1)
-            return parent1[:point] + parent2[point:], parent2[:point] + parent1[point:]
-        return parent1, parent2
-
-    def __mutate(self, individual: Individual) -> Individual:
-        return [
-            bit if random.random() > self.mutation_rate else not bit
-            for bit in individual
-        ]
-
-    def run(
-        self,
-    ) -> tuple[list[Individual], list[float]]:
-        best_individuals: list[Individual] = []
-        best_fitnesses: list[float] = []
-        population: Population = self.__generate_population()
-        for i in range(self.generations - 1):
-            new_population: Population = []
-            for _ in range(len(population) // 2):
-                parent1 = self.__select(population)
-                parent2 = self.__select(population)
-                child1, child2 = self.__crossover(parent1, parent2)
-                new_population.append(self.__mutate(child1))
-                new_population.append(self.__mutate(child2))
-            population = new_population
-            if self.on_population_processed is not None:
-                self.on_population_processed(i + 1, population)
-                fitnesses = self.__calc_fitnesses_in_pool(population)
-            best_fitness = max(fitnesses)
-            best_individual_index = fitnesses.index(best_fitness)
-            best_individual = population[best_individual_index]
-
-            best_fitnesses.append(best_fitness)
-            best_individuals.append(best_individual)
-        
-        if self.on_population_processed is not None:
-        
-            self.on_population_processed(self.generations, population)
-
-        
-        return best_individuals, best_fitnesses
-
- 
-def randbool() -> bool:
-    return random.randint(0, 1) == 1
-
-
-def individual_to_str(individual: Individual) -> str:
-    result = ""
-    for bit in individual:
-        result += str(int(bit))
-    return result
-
-
-def individual_to_int(individual: Individual) -> int:
-    result = 0
-    for i in range(len(individual)):
-        result += int(individual[i]) * 2**i
-    return result
+    def fitness_func(self, individual: Individual) -> float:
+        return float(self.batch_fitness_func(np.asarray(individual)[None, :])[0])
 
 
 @dataclass
@@ -286,7 +337,14 @@ class SowingAndHarvestingDTO:
 @dataclass
 class CropOptimizerResultDTO:
     best_combinations: list[SowingAndHarvestingDTO]
-    forecast: list[ClimateDataDTO]
+    forecast: ClimateSeries
+
+
+@dataclass
+class CropsOptimizerResultDTO:
+    # best combinations of each crop, in the order of the crops
+    best_combinations: dict[str, list[SowingAndHarvestingDTO]]
+    forecast: ClimateSeries
 
 
 class CropOptimizerService:
@@ -297,27 +355,63 @@ class CropOptimizerService:
         future_climate_data_repository: FutureClimateDataRepository,
         location_repository: LocationRepository,
         climate_generative_model_repository: ClimateGenerativeModelRepository,
+        optimizer_result_cache: LRUCache[
+            OptimizerResultKey, list[SowingAndHarvestingDTO]
+        ]
+        | None = None,
     ) -> None:
+        """
+
+        Args:
+            optimizer_result_cache (LRUCache[OptimizerResultKey, list[SowingAndHarvestingDTO]] | None, optional):
+                best combinations of the exhaustive search, shared between services.
+                Defaults to a cache used only by this service.
+        """
         self.crop_repository = crop_repository
         self.past_climate_data_repository = past_climate_data_repository
         self.future_climate_data_repository = future_climate_data_repository
         self.location_repository = location_repository
         self.climate_generative_model_repository = climate_generative_model_repository
+        self.optimizer_result_cache: LRUCache[
+            OptimizerResultKey, list[SowingAndHarvestingDTO]
+        ] = (
+            optimizer_result_cache
+            if optimizer_result_cache is not None
+            else LRUCache(max_entries=256)
+        )
 
     async def get_best_crop_sowing_and_harvesting(
-        self, session: AsyncSession, crop_name: str, location_id: UUID
+        self,
+        session: AsyncSession,
+        crop_name: str,
+        location_id: UUID,
+        mode: OptimizerMode = "exhaustive",
+        top_k: int = 3,
     ) -> CropOptimizerResultDTO:
         """_summary_
 
         Args:
-            crop_id (UUID): _description_
-            location_id (UUID): _description_
-            start_year (int): _description_
-            start_month (int): _description_
+            crop_name (str):
+            location_id (UUID):
+            mode (OptimizerMode): "exhaustive" scores every valid sowing and harvest
+                combination and returns the exact top k, "genetic" runs CropGeneticAlgorithm
+            top_k (int): how many combinations to return
 
         Returns:
             CropOptimizerResultDTO:
         """
+        if mode == "exhaustive":
+            result = await self.get_best_sowing_and_harvesting_for_crops(
+                session=session,
+                location_id=location_id,
+                crop_names=[crop_name],
+                top_k=top_k,
+            )
+            return CropOptimizerResultDTO(
+                best_combinations=result.best_combinations[crop_name],
+                forecast=result.forecast,
+            )
+
         location = await self.location_repository.get_location_by_id(
             session=session, location_id=location_id
         )
@@ -336,27 +430,140 @@ class CropOptimizerService:
             raise CropYieldModelNotFoundError(str(crop_name))
 
         forecast = await self.climate_generative_model_repository.generate_climate_data_from_last_past_climate_data(
-            session=session, location_id=location.id, months=24
+            session=session, location_id=location.id, months=FORECAST_MONTHS
         )
-        forecast_df = ClimateDataDTO.from_list_to_dataframe(forecast)
+        forecast_df = forecast.to_dataframe()
         forecast_df = forecast_df.drop(columns=["location_id"])
 
-        best_combinations: list[SowingAndHarvestingDTO] = []
-
         loop = asyncio.get_running_loop()
 
         with ProcessPoolExecutor() as pool:
             results, fitnesses = await loop.run_in_executor(
                 pool, run_genetic_algorithm, forecast_df, crop, model
             )
+        candidates = get_genetic_algorithm_candidates(
+            forecast_df=forecast_df, individuals=results, fitnesses=fitnesses
+        )
+
+        return CropOptimizerResultDTO(
+            best_combinations=self.__to_best_combinations(
+                forecast_df=forecast_df, candidates=candidates, top_k=top_k
+            ),
+            forecast=forecast,
+        )
+
+    async def get_best_sowing_and_harvesting_for_crops(
+        self,
+        session: AsyncSession,
+        location_id: UUID,
+        crop_names: list[str] | None = None,
+        top_k: int = 3,
+    ) -> CropsOptimizerResultDTO:
+        """Exhaustive search of the best sowing and harvest months of many crops on one
+        forecast of the location, see run_exhaustive_search_for_crops.
+
+        The result of each crop is cached by OptimizerResultKey, only the crops whose
+        result isn't cached are scored and only their crop yield models are loaded.
 
-        for i in range(len(results)):
-            result = results[i]
-            fitness = fitnesses[i]
+        Args:
+            crop_names (list[str] | None, optional): None for every crop with a crop yield model
+
+        Raises:
+            LocationNotFoundError:
+            CropNotFoundError:
+            CropYieldModelNotFoundError:
+            ClimateGenerativeModelNotFoundError:
+        """
+        location = await self.location_repository.get_location_by_id(
+            session=session, location_id=location_id
+        )
+        if location is None:
+            raise LocationNotFoundError(str(location_id))
 
-            sowing = individual_to_int(result[:5])
-            harvesting = individual_to_int(result[5:])
+        crops_details: list[CropDetailsDTO] = []
+        if crop_names is None:
+            crops_details = [
+                crop_details
+                for crop_details in await self.crop_repository.get_all_crops_details(
+                    session=session
+                )
+                if crop_details.crop_yield_model_hash is not None
+            ]
+        else:
+            for crop_name in dict.fromkeys(crop_names):
+                crop_details = await self.crop_repository.get_crop_details(
+                    session=session, crop_name=crop_name
+                )
+                if crop_details is None:
+                    raise CropNotFoundError(str(crop_name))
+                if crop_details.crop_yield_model_hash is None:
+                    raise CropYieldModelNotFoundError(str(crop_name))
+                crops_details.append(crop_details)
+
+        forecast = await self.climate_generative_model_repository.get_forecast(
+            session=session, location_id=location.id, months=FORECAST_MONTHS
+        )
+        forecast_df = forecast.forecast.to_dataframe()
+        forecast_df = forecast_df.drop(columns=["location_id"])
 
+        def get_key(crop_name: str, crop_yield_model_hash: str | None):
+            # a forecast that isn't stored has no version to cache the result by
+            if forecast.id is None or crop_yield_model_hash is None:
+                return None
+            return (location.id, forecast.id, crop_name, crop_yield_model_hash, top_k)
+
+        best_combinations: dict[str, list[SowingAndHarvestingDTO]] = {}
+        crops: list[tuple[CropDTO, RandomForestRegressor]] = []
+        for crop_details in crops_details:
+            key = get_key(crop_details.name, crop_details.crop_yield_model_hash)
+            cached = self.optimizer_result_cache.get(key) if key is not None else None
+            if cached is not None:
+                best_combinations[crop_details.name] = cached
+                continue
+            crop = await self.crop_repository.get_crop_by_name(
+                session=session, name=crop_details.name
+            )
+            if crop is None:
+                raise CropNotFoundError(str(crop_details.name))
+            if crop.crop_yield_model is None:
+                raise CropYieldModelNotFoundError(str(crop_details.name))
+            crops.append((crop, crop.crop_yield_model))
+
+        if len(crops) > 0:
+            loop = asyncio.get_running_loop()
+            with ThreadPoolExecutor() as pool:
+                candidates_of_crops = await loop.run_in_executor(
+                    pool, run_exhaustive_search_for_crops, forecast_df, crops, top_k
+                )
+            for (crop, _), candidates in zip(crops, candidates_of_crops):
+                best_combinations[crop.name] = self.__to_best_combinations(
+                    forecast_df=forecast_df, candidates=candidates, top_k=top_k
+                )
+                key = get_key(crop.name, crop.crop_yield_model_hash)
+                if key is not None:
+                    self.optimizer_result_cache.put(key, best_combinations[crop.name])
+
+        return CropsOptimizerResultDTO(
+            best_combinations={
+                crop_details.name: best_combinations[crop_details.name]
+                for crop_details in crops_details
+            },
+            forecast=forecast.forecast,
+        )
+
+    @staticmethod
+    def __to_best_combinations(
+        forecast_df: pd.DataFrame,
+        candidates: list[tuple[int, int, float]],
+        top_k: int,
+    ) -> list[SowingAndHarvestingDTO]:
+        """
+        Args:
+            candidates (list[tuple[int, int, float]]): sowing index, harvest index and
+                estimated yield of each combination
+        """
+        best_combinations: list[SowingAndHarvestingDTO] = []
+        for sowing, harvesting, fitness in candidates:
             sowing_year, sowing_month = forecast_df.index[sowing]
             harvest_year, harvest_month = forecast_df.index[harvesting]
             duration = calc_months_delta(
@@ -378,7 +585,4 @@ class CropOptimizerService:
         best_combinations = sorted(
             best_combinations, key=lambda comb: comb.estimated_yield_per_hectar, reverse=True
         )
-        return CropOptimizerResultDTO(
-            best_combinations=best_combinations[:3],
-            forecast=forecast,
-        )
+        return best_combinations[:top_k]
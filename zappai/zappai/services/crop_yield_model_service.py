@@ -1,14 +1,18 @@
 from typing import cast
+import numpy as np
 import pandas as pd
 from sklearn.ensemble import RandomForestRegressor
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
-from zappai.zappai.exceptions import LocationNotFoundError
+from zappai.zappai.exceptions import (
+    LocationNotFoundError,
+    PastClimateDataNotFoundError,
+)
 from zappai.zappai.repositories.climate_generative_model_repository import (
     FEATURES as CLIMATE_GENERATIVE_MODEL_FEATURES,
 )
 from zappai.zappai.repositories.crop_repository import CropRepository
 from zappai.zappai.repositories.crop_yield_data_repository import CropYieldDataRepository
-from zappai.zappai.dtos import ClimateDataDTO, CropYieldDataDTO, PastClimateDataDTO
+from zappai.zappai.dtos import ClimateDataDTO, CropYieldDataDTO
 from zappai.zappai.repositories.location_repository import LocationRepository
 from zappai.zappai.repositories.past_climate_data_repository import (
     PastClimateDataRepository,
@@ -16,14 +20,17 @@ from zappai.zappai.repositories.past_climate_data_repository import (
 from uuid import UUID
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_squared_error, r2_score
-from zappai.zappai.utils.common import create_stats_dataframe
+from zappai.zappai.utils.window_stats import WindowStats
 
-FEATURES = [
+SOWING_AND_HARVESTING_FEATURES = [
     "sowing_year",
     "sowing_month",
     "harvest_year",
     "harvest_month",
     "duration_months",
+]
+
+CLIMATE_STATS_FEATURES = [
     "surface_solar_radiation_downwards_mean",
     "surface_solar_radiation_downwards_std",
     "surface_solar_radiation_downwards_min",
@@ -65,9 +72,39 @@ FEATURES = [
     "total_precipitation_min",
     "total_precipitation_max",
 ]
+
+FEATURES = [*SOWING_AND_HARVESTING_FEATURES, *CLIMATE_STATS_FEATURES]
 TARGET = ["yield_per_hectar"]
 
 
+def create_features(
+    sowing_and_harvesting: np.ndarray,
+    window_stats: WindowStats,
+    starts: np.ndarray,
+    ends: np.ndarray,
+) -> np.ndarray:
+    """Builds the input of the crop yield model.
+
+    Args:
+        sowing_and_harvesting (np.ndarray): shape (n, len(SOWING_AND_HARVESTING_FEATURES))
+        window_stats (WindowStats): stats engine over the climate data, with CLIMATE_GENERATIVE_MODEL_FEATURES columns
+        starts (np.ndarray): index of the sowing month in the climate data of window_stats
+        ends (np.ndarray): index of the harvest month in the climate data of window_stats
+
+    Returns:
+        np.ndarray: shape (n, len(FEATURES)), in FEATURES order
+    """
+    return np.concatenate(
+        [
+            sowing_and_harvesting.astype(np.float64),
+            window_stats.get_many_stats(
+                starts=starts, ends=ends, stats_columns=CLIMATE_STATS_FEATURES
+            ),
+        ],
+        axis=1,
+    )
+
+
 class CropYieldModelService:
     def __init__(
         self,
@@ -97,44 +134,69 @@ class CropYieldModelService:
         )
         crop_yield_data_df = CropYieldDataDTO.from_list_to_dataframe(crop_yield_data)
 
-        enriched_crop_yield_data_df = pd.DataFrame()
+        enriched_crop_yield_data_dfs: list[pd.DataFrame] = []
 
-        for _, row in crop_yield_data_df.iterrows():
+        # load the climate data of each location once and compute the stats of all its rows at once
+        for location_id, location_rows_df in crop_yield_data_df.groupby(
+            "location_id", sort=False
+        ):
             location = await self.location_repository.get_location_by_id(
-                session=session,
-                location_id=row["location_id"]
+                session=session, location_id=cast(UUID, location_id)
             )
             if location is None:
-                raise LocationNotFoundError(str(row["location_id"]))
-            past_climate_data_df = PastClimateDataDTO.from_list_to_dataframe(
-                await self.past_climate_data_repository.get_past_climate_data(
-                    session=session,
-                    location_id=location.id,
-                    year_from=row["sowing_year"],
-                    month_from=row["sowing_month"],
-                    year_to=row["harvest_year"],
-                    month_to=row["harvest_month"],
+                raise LocationNotFoundError(str(location_id))
+            past_climate_data_df = (
+                await self.past_climate_data_repository.get_all_past_climate_data_df(
+                    session=session, location_id=location.id
                 )
             )
-            past_climate_data_df = past_climate_data_df[
-                CLIMATE_GENERATIVE_MODEL_FEATURES
-            ]
-            result_climate_data_stats_df = create_stats_dataframe(
-                df=past_climate_data_df, ignore=["sin_year", "cos_year"]
+            window_stats = WindowStats(
+                df=past_climate_data_df, columns=CLIMATE_GENERATIVE_MODEL_FEATURES
             )
-            # convert the row to a DataFrame
-            crop_yield_data_row_df = pd.DataFrame([row])
-            # since the row was a Series, remove the useless index column that the DataFrame inherited
-            crop_yield_data_row_df = crop_yield_data_row_df.drop(columns=["index"])
-            crop_yield_data_row_df = crop_yield_data_row_df.reset_index(drop=True)
-            enriched_crop_yield_data_row = pd.concat(
-                [crop_yield_data_row_df, result_climate_data_stats_df], axis=1
+
+            # first month >= sowing and last month <= harvest
+            climate_data_months = (
+                past_climate_data_df.index.get_level_values("year").to_numpy() * 12
+                + past_climate_data_df.index.get_level_values("month").to_numpy()
+            )
+            starts = np.searchsorted(
+                climate_data_months,
+                location_rows_df["sowing_year"].to_numpy() * 12
+                + location_rows_df["sowing_month"].to_numpy(),
+                side="left",
+            )
+            ends = (
+                np.searchsorted(
+                    climate_data_months,
+                    location_rows_df["harvest_year"].to_numpy() * 12
+                    + location_rows_df["harvest_month"].to_numpy(),
+                    side="right",
+                )
+                - 1
+            )
+            if np.any(starts > ends):
+                raise PastClimateDataNotFoundError(
+                    f"Can't find past climate data for some crop yield data of location {location.id}"
+                )
+
+            x = create_features(
+                sowing_and_harvesting=location_rows_df[
+                    SOWING_AND_HARVESTING_FEATURES
+                ].to_numpy(),
+                window_stats=window_stats,
+                starts=starts,
+                ends=ends,
             )
-            enriched_crop_yield_data_df = pd.concat(
-                [enriched_crop_yield_data_df, enriched_crop_yield_data_row],
-                axis=0,
+            enriched_location_rows_df = pd.DataFrame(
+                data=x, columns=FEATURES, index=location_rows_df.index
             )
+            enriched_location_rows_df[TARGET] = location_rows_df[TARGET]
+            enriched_crop_yield_data_dfs.append(enriched_location_rows_df)
 
+        # keep the original order of the rows, train_test_split depends on it
+        enriched_crop_yield_data_df = pd.concat(
+            enriched_crop_yield_data_dfs, axis=0
+        ).sort_index()
         enriched_crop_yield_data_df = enriched_crop_yield_data_df[[*FEATURES, *TARGET]]
         enriched_crop_yield_data_df = enriched_crop_yield_data_df.reset_index(drop=True)
 
@@ -162,7 +224,7 @@ class CropYieldModelService:
     async def train_and_save_crop_yield_model_for_all_crops(
         self, session: AsyncSession
     ):
-        crops = await self.crop_repository.get_all_crops(session)
+        crops = await self.crop_repository.get_all_crops_details(session)
 
         processed = 0
 
@@ -0,0 +1,102 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+@dataclass
+class CacheStatsDTO:
+    hits: int
+    misses: int
+    entries: int
+    size_bytes: int
+
+
+class LRUCache(Generic[K, V]):
+    """In-process least recently used cache, safe to use from multiple threads."""
+
+    def __init__(self, max_entries: int | None, max_bytes: int | None = None) -> None:
+        """
+
+        Args:
+            max_entries (int | None): max number of entries, None for no limit
+            max_bytes (int | None, optional): max sum of the sizes passed to put, None for no limit
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.__entries: OrderedDict[K, tuple[V, int]] = OrderedDict()
+        self.__size_bytes = 0
+        self.__lock = Lock()
+
+    def get(self, key: K) -> V | None:
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.__entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: K, value: V, size_bytes: int = 0):
+        with self.__lock:
+            self.__pop(key)
+            if self.max_bytes is not None and size_bytes > self.max_bytes:
+                return
+            self.__entries[key] = (value, size_bytes)
+            self.__size_bytes += size_bytes
+            while (
+                self.max_entries is not None and len(self.__entries) > self.max_entries
+            ) or (self.max_bytes is not None and self.__size_bytes > self.max_bytes):
+                oldest_key = next(iter(self.__entries))
+                self.__pop(oldest_key)
+
+    def pop(self, key: K) -> V | None:
+        with self.__lock:
+            return self.__pop(key)
+
+    def invalidate(self, predicate: Callable[[K], bool]) -> int:
+        """Removes every entry whose key matches the predicate.
+
+        Returns:
+            int: number of removed entries
+        """
+        with self.__lock:
+            keys = [key for key in self.__entries if predicate(key)]
+            for key in keys:
+                self.__pop(key)
+            return len(keys)
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+            self.__size_bytes = 0
+
+    def stats(self) -> CacheStatsDTO:
+        with self.__lock:
+            return CacheStatsDTO(
+                hits=self.hits,
+                misses=self.misses,
+                entries=len(self.__entries),
+                size_bytes=self.__size_bytes,
+            )
+
+    def __pop(self, key: K) -> V | None:
+        entry = self.__entries.pop(key, None)
+        if entry is None:
+            return None
+        self.__size_bytes -= entry[1]
+        return entry[0]
+
+    def __contains__(self, key: K) -> bool:
+        with self.__lock:
+            return key in self.__entries
+
+    def __len__(self) -> int:
+        with self.__lock:
+            return len(self.__entries)
@@ -0,0 +1,53 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import time
+from typing import Any, Awaitable, Callable
+
+import pandas as pd
+
+
+async def import_csv_in_chunks(
+    csv_path: str,
+    write_chunk: Callable[[pd.DataFrame], Awaitable[None]],
+    chunksize: int = 50_000,
+    **read_csv_kwargs: Any,
+) -> int:
+    """Reads the CSV chunksize rows at a time and awaits write_chunk on each chunk.
+
+    The next chunk is parsed in a thread while write_chunk runs, so at most two chunks
+    are in memory whatever the size of the file. The rows per second are logged
+    after each chunk.
+
+    Args:
+        read_csv_kwargs: passed to pd.read_csv
+
+    Returns:
+        int: rows imported
+    """
+    loop = asyncio.get_running_loop()
+    rows = 0
+    started_at = time.perf_counter()
+    # one thread, the reader isn't thread safe
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        reader = await loop.run_in_executor(
+            pool,
+            lambda: pd.read_csv(csv_path, chunksize=chunksize, **read_csv_kwargs),
+        )
+        with reader:
+            next_chunk = loop.run_in_executor(pool, next, reader, None)
+            try:
+                while True:
+                    chunk: pd.DataFrame | None = await next_chunk
+                    if chunk is None:
+                        break
+                    next_chunk = loop.run_in_executor(pool, next, reader, None)
+                    await write_chunk(chunk)
+                    rows += len(chunk)
+                    logging.info(
+                        f"Imported {rows} rows of {csv_path}, {rows / (time.perf_counter() - started_at):.0f} rows/s"
+                    )
+            finally:
+                # the reader is closed only after the chunk being parsed
+                await asyncio.gather(next_chunk, return_exceptions=True)
+    return rows
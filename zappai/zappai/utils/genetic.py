@@ -1,17 +1,82 @@
-from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor
 import multiprocessing
-import random
-from typing import Callable
+from typing import Callable, Protocol
 
-Individual = list[bool]
-Population = list[Individual]
+import numpy as np
+
+# shape (chromosome_length,), one uint8 0/1 per bit
+Individual = np.ndarray
+# shape (individuals, chromosome_length), one uint8 0/1 per bit
+Population = np.ndarray
 FitnessCallback = Callable[[Individual], float]
+# takes the whole population as a bit matrix of shape (individuals, chromosome_length)
+# and returns the fitness of each individual
+BatchFitnessCallback = Callable[[np.ndarray], np.ndarray]
+
+# fitness function of the current worker process, set once by the pool initializer
+_worker_fitness: FitnessCallback | None = None
+
+
+def _init_worker(fitness: FitnessCallback):
+    global _worker_fitness
+    _worker_fitness = fitness
+
+
+def _calc_chunk_fitnesses(chunk: Population) -> list[float]:
+    if _worker_fitness is None:
+        raise RuntimeError("Worker not initialized")
+    return [_worker_fitness(individual) for individual in chunk]
+
+
+class SelectionStrategy(Protocol):
+    def select(
+        self, fitnesses: np.ndarray, k: int, rng: np.random.Generator
+    ) -> np.ndarray:
+        """Picks k parents.
+
+        Args:
+            fitnesses (np.ndarray): fitness of each individual of the population
+            k (int): number of parents to pick
+            rng (np.random.Generator):
+
+        Returns:
+            np.ndarray: indexes of the parents in the population
+        """
+        ...
+
+
+class RouletteWheelSelection:
+    """Picks parents with probability proportional to their fitness."""
+
+    def select(
+        self, fitnesses: np.ndarray, k: int, rng: np.random.Generator
+    ) -> np.ndarray:
+        weights = np.maximum(fitnesses, 0.0)
+        total_fitness = weights.sum()
+        if total_fitness <= 0:
+            return rng.integers(0, len(fitnesses), size=k)
+        return rng.choice(len(fitnesses), size=k, p=weights / total_fitness)
+
+
+class TournamentSelection:
+    """Picks each parent as the best of tournament_size random individuals."""
+
+    def __init__(self, tournament_size: int = 3) -> None:
+        self.tournament_size = tournament_size
+
+    def select(
+        self, fitnesses: np.ndarray, k: int, rng: np.random.Generator
+    ) -> np.ndarray:
+        # shape (k, tournament_size)
+        contestants = rng.integers(0, len(fitnesses), size=(k, self.tournament_size))
+        winners = np.argmax(fitnesses[contestants], axis=1)
+        return contestants[np.arange(k), winners]
 
 
 class GeneticAlgorithm:
     def __init__(
         self,
-        fitness: FitnessCallback,
+        fitness: FitnessCallback | None,
         chromosome_length: int,
         population_size: int,
         mutation_rate: float,
@@ -19,8 +84,41 @@ class GeneticAlgorithm:
         generations: int,
         on_population_created: Callable[[int, Population], None] | None = None,
         parallel_workers: int | None = None,
+        selection: SelectionStrategy | None = None,
+        elitism: int = 0,
+        batch_fitness: BatchFitnessCallback | None = None,
+        seed: int | None = None,
     ) -> None:
+        """
+
+        Args:
+            fitness (FitnessCallback | None): fitness of one individual, None if batch_fitness is used
+            chromosome_length (int): at most 62 bits
+            population_size (int):
+            mutation_rate (float):
+            crossover_rate (float):
+            generations (int):
+            on_population_created (Callable[[int, Population], None] | None, optional):
+            parallel_workers (int | None, optional): size of the process pool used to
+                compute the fitnesses, 1 computes them in this process. Defaults to the number of CPUs.
+            selection (SelectionStrategy | None, optional): Defaults to RouletteWheelSelection.
+            elitism (int, optional): how many of the best individuals are copied
+                unchanged in the next generation. Defaults to 0.
+            batch_fitness (BatchFitnessCallback | None, optional): fitness of many individuals
+                at once, called once per generation with the chromosomes that are not cached yet.
+                Takes precedence over fitness and parallel_workers.
+            seed (int | None, optional): seed of the random generator, runs with the same seed
+                give the same result. Defaults to None.
+
+        Raises:
+            ValueError: if neither fitness nor batch_fitness are provided
+        """
+        if fitness is None and batch_fitness is None:
+            raise ValueError("Either fitness or batch_fitness must be provided")
+        if chromosome_length > 62:
+            raise ValueError("chromosome_length can't be more than 62")
         self.fitness = fitness
+        self.batch_fitness = batch_fitness
         self.chromosome_length = chromosome_length
         self.population_size = population_size
         self.mutation_rate = mutation_rate
@@ -32,116 +130,144 @@ class GeneticAlgorithm:
             if parallel_workers is not None
             else multiprocessing.cpu_count()
         )
-
-    def __generate_individual(self) -> Individual:
-        return [randbool() for _ in range(self.chromosome_length)]
+        self.selection: SelectionStrategy = (
+            selection if selection is not None else RouletteWheelSelection()
+        )
+        self.elitism = elitism
+        self.rng = np.random.default_rng(seed)
+        # chromosome as int -> fitness, the same chromosomes come up again and again
+        self.fitness_cache: dict[int, float] = {}
 
     def __generate_population(
         self,
     ) -> Population:
-        return [self.__generate_individual() for _ in range(self.population_size)]
-
-    def process_chunk(self, position: int, chunk: Population):
-        return position, [self.fitness(individual) for individual in chunk]
-
-    def __calc_fitnesses_in_pool(self, population: Population) -> list[float]:
-        if self.parallel_workers == 1:
-            fitnesses = [self.fitness(individual) for individual in population]
-        else:
-            chunk_size = len(population) // self.parallel_workers
-            chunks: list[list[Individual]] = []
-            remainder = len(population) % self.parallel_workers
-            start = 0
-            end = 0
-            for i in range(self.parallel_workers):
-                end = start + chunk_size + (1 if i < remainder else 0)
-                chunks.append(population[start:end])
-                start = end
-
-            with ProcessPoolExecutor(max_workers=self.parallel_workers) as pool:
-                futures = [
-                    pool.submit(self.process_chunk, position=i, chunk=chunk)
-                    for i, chunk in enumerate(chunks)
+        return self.rng.integers(
+            0, 2, size=(self.population_size, self.chromosome_length), dtype=np.uint8
+        )
+
+    def __calc_fitnesses(
+        self, population: Population, pool: ProcessPoolExecutor | None
+    ) -> np.ndarray:
+        """Computes the fitnesses of the chromosomes that are not cached yet."""
+        keys = individuals_to_ints(population)
+        unique_keys, unique_indexes = np.unique(keys, return_index=True)
+        is_missing = np.array(
+            [int(key) not in self.fitness_cache for key in unique_keys], dtype=bool
+        )
+        missing_keys = unique_keys[is_missing]
+        if len(missing_keys) > 0:
+            missing = population[unique_indexes[is_missing]]
+            if self.batch_fitness is not None:
+                fitnesses = self.batch_fitness(missing)
+            elif pool is None:
+                fitnesses = [
+                    self.fitness(individual)  # type: ignore
+                    for individual in missing
+                ]
+            else:
+                chunks = np.array_split(
+                    missing, min(self.parallel_workers, len(missing))
+                )
+                fitnesses = [
+                    fitness
+                    for chunk_fitnesses in pool.map(_calc_chunk_fitnesses, chunks)
+                    for fitness in chunk_fitnesses
                 ]
-                results = [future.result() for future in as_completed(futures)]
-
-            results = sorted(results, key=lambda result: result[0])
-            fitnesses = [
-                fitness
-                for position, chunk_fitnesses in results
-                for fitness in chunk_fitnesses
-            ]
-        return fitnesses
-
-    def __select(self, population: Population):
-        fitnesses: list[float] = self.__calc_fitnesses_in_pool(population)
-        total_fitness = sum(fitnesses)
-        if total_fitness == 0:
-            selection_probs = [1 / len(population) for i in range(len(population))]
-        else:
-            selection_probs = [fitness / total_fitness for fitness in fitnesses]
-        return population[
-            random.choices(range(len(population)), weights=selection_probs, k=1)[0]
-        ]
-
-    def __crossover(self, parent1: Individual, parent2: Individual):
-        if random.random() < self.crossover_rate:
-            point = random.randint(1, len(parent1) - 1)
-            return parent1[:point] + parent2[point:], parent2[:point] + parent1[point:]
-        return parent1, parent2
-
-    def __mutate(self, individual: Individual) -> Individual:
-        return [
-            bit if random.random() > self.mutation_rate else not bit
-            for bit in individual
-        ]
+            self.fitness_cache.update(
+                zip(missing_keys.tolist(), (float(fitness) for fitness in fitnesses))
+            )
+        return np.array([self.fitness_cache[key] for key in keys.tolist()])
 
-    def run(
-        self,
+    def __crossover(self, parents1: Population, parents2: Population):
+        """Single point crossover of each pair of parents."""
+        n_pairs = len(parents1)
+        is_crossed = self.rng.random(n_pairs) < self.crossover_rate
+        points = self.rng.integers(1, self.chromosome_length, size=n_pairs)
+        # True where the bit is taken from the first parent
+        from_first = (np.arange(self.chromosome_length)[None, :] < points[:, None]) | (
+            ~is_crossed[:, None]
+        )
+        return (
+            np.where(from_first, parents1, parents2),
+            np.where(from_first, parents2, parents1),
+        )
+
+    def __mutate(self, population: Population) -> Population:
+        flips = self.rng.random(population.shape) < self.mutation_rate
+        return population ^ flips.astype(np.uint8)
+
+    def __next_population(
+        self, population: Population, fitnesses: np.ndarray
+    ) -> Population:
+        elite = np.argsort(-fitnesses, kind="stable")[: self.elitism]
+        n_children = len(population) - len(elite)
+        parents = self.selection.select(
+            fitnesses, k=2 * -(-n_children // 2), rng=self.rng
+        )
+        children1, children2 = self.__crossover(
+            population[parents[0::2]], population[parents[1::2]]
+        )
+        children = self.__mutate(np.concatenate([children1, children2]))
+        return np.concatenate([population[elite], children[:n_children]])
+
+    def __run(
+        self, pool: ProcessPoolExecutor | None
     ) -> tuple[list[Individual], list[float]]:
         best_individuals: list[Individual] = []
         best_fitnesses: list[float] = []
         population: Population = self.__generate_population()
-        for i in range(self.generations - 1):
-            new_population: Population = []
-            for _ in range(len(population) // 2):
-                parent1 = self.__select(population)
-                parent2 = self.__select(population)
-                child1, child2 = self.__crossover(parent1, parent2)
-                new_population.append(self.__mutate(child1))
-                new_population.append(self.__mutate(child2))
-            population = new_population
+        for i in range(self.generations):
+            if i > 0:
+                population = self.__next_population(population, fitnesses)
+            # each generation is scored once, selection works on this vector
+            fitnesses = self.__calc_fitnesses(population, pool=pool)
             if self.on_population_processed is not None:
                 self.on_population_processed(i + 1, population)
-        if self.on_population_processed is not None:
-            self.on_population_processed(self.generations, population)
-
-        fitnesses = self.__calc_fitnesses_in_pool(population)
-        best_fitness = max(fitnesses)
-        best_individual_index = fitnesses.index(best_fitness)
-        best_individual = population[best_individual_index]
 
-        best_fitnesses.append(best_fitness)
-        best_individuals.append(best_individual)
+            best_index = int(np.argmax(fitnesses))
+            best_fitnesses.append(float(fitnesses[best_index]))
+            best_individuals.append(population[best_index].copy())
         return best_individuals, best_fitnesses
 
+    def run(
+        self,
+    ) -> tuple[list[Individual], list[float]]:
+        """
 
-def randbool() -> bool:
-    return random.randint(0, 1) == 1
+        Returns:
+            tuple[list[Individual], list[float]]: best individual and best fitness of each generation
+        """
+        if self.batch_fitness is not None or self.parallel_workers == 1:
+            return self.__run(pool=None)
+        # one pool for the whole run, the fitness function is sent to each worker once
+        with ProcessPoolExecutor(
+            max_workers=self.parallel_workers,
+            initializer=_init_worker,
+            initargs=(self.fitness,),
+        ) as pool:
+            return self.__run(pool=pool)
 
 
 def individual_to_str(individual: Individual) -> str:
-    result = ""
-    for bit in individual:
-        result += str(int(bit))
-    return result
+    return "".join(str(int(bit)) for bit in individual)
 
 
 def individual_to_int(individual: Individual) -> int:
-    result = 0
-    for i in range(len(individual)):
-        result += int(individual[i]) * 2**i
-    return result
+    return int(individuals_to_ints(np.asarray(individual)[None, :])[0])
+
+
+def individuals_to_ints(individuals: np.ndarray) -> np.ndarray:
+    """Vectorized individual_to_int, the first bit is the least significant.
+
+    Args:
+        individuals (np.ndarray): bit matrix of shape (individuals, bits)
+
+    Returns:
+        np.ndarray: shape (individuals,)
+    """
+    return individuals.astype(np.int64) @ (
+        np.int64(1) << np.arange(individuals.shape[1], dtype=np.int64)
+    )
 
 
 if __name__ == "__main__":
@@ -151,7 +277,7 @@ if __name__ == "__main__":
         return x**2
 
     def on_population_created(i: int, population: Population):
-        print([individual_to_int(individual) for individual in population])
+        print(individuals_to_ints(population).tolist())
         print(f"Best fitness: {fitness(max(population, key=fitness))}")
 
     ga = GeneticAlgorithm(
@@ -162,6 +288,10 @@ if __name__ == "__main__":
         crossover_rate=0.7,
         generations=100,
         on_population_created=on_population_created,
+        parallel_workers=1,
+        selection=TournamentSelection(tournament_size=3),
+        elitism=1,
+        seed=42,
     )
 
     results, fitnesses = ga.run()
@@ -0,0 +1,40 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Literal
+
+from zappai.zappai.utils.numpy_lstm import NumpyLSTMModel
+from zappai.zappai.utils.tflite_model import TFLiteModel
+
+if TYPE_CHECKING:
+    from keras.src.models import Sequential
+
+# "eager" runs the Keras model, the others run an export of it made after training
+InferenceBackend = Literal["eager", "tflite", "numpy"]
+
+CompiledModel = TFLiteModel | NumpyLSTMModel
+
+
+def export_model(
+    model: Sequential, backend: InferenceBackend, input_shape: tuple[int, ...]
+) -> CompiledModel | None:
+    """Exports the model for the backend, checking that it gives the same outputs.
+
+    Returns:
+        CompiledModel | None: None for the eager backend
+    """
+    if backend == "tflite":
+        return TFLiteModel.export_and_check(model, input_shape=input_shape)
+    if backend == "numpy":
+        return NumpyLSTMModel.from_keras_and_check(model, input_shape=input_shape)
+    return None
+
+
+def load_compiled_model(backend: InferenceBackend, artifact: bytes) -> CompiledModel:
+    if backend == "tflite":
+        return TFLiteModel(artifact)
+    if backend == "numpy":
+        return NumpyLSTMModel.from_bytes(artifact)
+    raise ValueError(f"Backend {backend} has no compiled model")
+
+
+def get_backend(compiled_model: CompiledModel) -> InferenceBackend:
+    return "tflite" if isinstance(compiled_model, TFLiteModel) else "numpy"
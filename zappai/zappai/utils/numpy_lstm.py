@@ -0,0 +1,269 @@
+from __future__ import annotations
+from dataclasses import dataclass
+import io
+from typing import TYPE_CHECKING, Literal
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from keras.src.models import Sequential
+
+LayerKind = Literal["lstm", "dense"]
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    # exp overflows to inf for very negative x, giving the right limit of 0
+    with np.errstate(over="ignore"):
+        return 1 / (1 + np.exp(-x))
+
+
+def _linear(x: np.ndarray) -> np.ndarray:
+    return x
+
+
+ACTIVATIONS = {
+    "linear": _linear,
+    "relu": lambda x: np.maximum(x, 0),
+    "sigmoid": _sigmoid,
+    "tanh": np.tanh,
+}
+
+
+@dataclass
+class NumpyLayer:
+    """Weights of a layer with a leading models axis, of size 1 for a single model.
+
+    For an LSTM kernel is (models, input, 4 * units), recurrent_kernel is
+    (models, units, 4 * units) and the gates are in the Keras order i, f, c, o.
+    For a Dense kernel is (models, input, units) and recurrent_kernel is None.
+    bias is (models, 1, 4 * units) or (models, 1, units).
+    """
+
+    kind: LayerKind
+    activation: str
+    kernel: np.ndarray
+    recurrent_kernel: np.ndarray | None
+    bias: np.ndarray
+    return_sequences: bool = False
+
+
+class NumpyLSTMModel:
+    """Inference of a Sequential of LSTM, Dropout and Dense layers with NumPy only,
+    so serving forecasts doesn't need TensorFlow.
+
+    A stacked model holds the weights of many models with the same architecture and
+    runs model i on the sample i of the batch, all in the same pass.
+    """
+
+    def __init__(self, layers: list[NumpyLayer]) -> None:
+        self.layers = layers
+        self.models = len(layers[0].kernel) if len(layers) > 0 else 1
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        """
+
+        Args:
+            x (np.ndarray): shape (batch, timesteps, features), batch must be equal to
+                self.models for a stacked model
+
+        Returns:
+            np.ndarray: float32 output of shape (batch, output units)
+        """
+        x = np.asarray(x, dtype=np.float32)
+        if self.models > 1 and len(x) != self.models:
+            raise ValueError(
+                f"A stacked model of {self.models} models needs a batch of {self.models} samples"
+            )
+        # shape (batch, timesteps, features)
+        sequences = x
+        for layer in self.layers:
+            if layer.kind == "lstm":
+                sequences = self.__lstm(layer, sequences)
+            else:
+                sequences = ACTIVATIONS[layer.activation](
+                    sequences @ layer.kernel + layer.bias
+                )
+        # the last layer returns one step, kept as a timesteps axis of size 1
+        return sequences[:, -1, :]
+
+    @staticmethod
+    def __lstm(layer: NumpyLayer, sequences: np.ndarray) -> np.ndarray:
+        activation = ACTIVATIONS[layer.activation]
+        batch, timesteps, _ = sequences.shape
+        units = layer.bias.shape[-1] // 4
+        # input projection of every timestep at once, shape (batch, timesteps, 4 * units)
+        projected = sequences @ layer.kernel + layer.bias
+        # shape (batch, 1, units), the middle axis lets the matmul broadcast over models
+        h = np.zeros((batch, 1, units), dtype=np.float32)
+        c = np.zeros((batch, 1, units), dtype=np.float32)
+        outputs = np.empty((batch, timesteps, units), dtype=np.float32)
+        for t in range(timesteps):
+            z = projected[:, t : t + 1] + h @ layer.recurrent_kernel
+            i = _sigmoid(z[..., :units])
+            f = _sigmoid(z[..., units : 2 * units])
+            g = activation(z[..., 2 * units : 3 * units])
+            o = _sigmoid(z[..., 3 * units :])
+            c = f * c + i * g
+            h = o * activation(c)
+            outputs[:, t : t + 1] = h
+        return outputs if layer.return_sequences else outputs[:, -1:]
+
+    @staticmethod
+    def from_keras(model: Sequential) -> NumpyLSTMModel:
+        """Copies the weights of the model.
+
+        Raises:
+            ValueError: if the model has layers or options that aren't supported
+        """
+        layers: list[NumpyLayer] = []
+        for layer in model.layers:
+            name = type(layer).__name__
+            config = layer.get_config()
+            if name == "Dropout":
+                # dropout does nothing at inference
+                continue
+            if name == "LSTM":
+                if (
+                    config["recurrent_activation"] != "sigmoid"
+                    or not config["use_bias"]
+                    or config["go_backwards"]
+                    or config["stateful"]
+                ):
+                    raise ValueError(f"Unsupported LSTM options: {config}")
+                kernel, recurrent_kernel, bias = layer.get_weights()
+                layers.append(
+                    NumpyLayer(
+                        kind="lstm",
+                        activation=config["activation"],
+                        kernel=kernel[None].astype(np.float32),
+                        recurrent_kernel=recurrent_kernel[None].astype(np.float32),
+                        bias=bias[None, None].astype(np.float32),
+                        return_sequences=config["return_sequences"],
+                    )
+                )
+            elif name == "Dense":
+                if not config["use_bias"]:
+                    raise ValueError(f"Unsupported Dense options: {config}")
+                kernel, bias = layer.get_weights()
+                layers.append(
+                    NumpyLayer(
+                        kind="dense",
+                        activation=config["activation"],
+                        kernel=kernel[None].astype(np.float32),
+                        recurrent_kernel=None,
+                        bias=bias[None, None].astype(np.float32),
+                    )
+                )
+            else:
+                raise ValueError(f"Unsupported layer {name}")
+            if layers[-1].activation not in ACTIVATIONS:
+                raise ValueError(f"Unsupported activation {layers[-1].activation}")
+        return NumpyLSTMModel(layers)
+
+    @staticmethod
+    def from_keras_and_check(
+        model: Sequential,
+        input_shape: tuple[int, ...],
+        atol: float = 1e-4,
+        samples: int = 8,
+    ) -> NumpyLSTMModel:
+        """from_keras, checking that the outputs are the same of the Keras model,
+        up to float32 rounding, on random inputs.
+
+        Raises:
+            ValueError: if the model isn't supported or the outputs differ by more than atol
+        """
+        numpy_model = NumpyLSTMModel.from_keras(model)
+        x = np.random.default_rng(0).normal(size=(samples, *input_shape))
+        x = x.astype(np.float32)
+        expected = np.asarray(model(x, training=False))
+        max_error = float(np.max(np.abs(numpy_model(x) - expected)))
+        if max_error > atol:
+            raise ValueError(f"NumPy model differs from the Keras one by {max_error}")
+        return numpy_model
+
+    @staticmethod
+    def stack(models: list[NumpyLSTMModel]) -> NumpyLSTMModel:
+        """Stacks models with the same architecture, see get_signature."""
+        if len({model.get_signature() for model in models}) != 1:
+            raise ValueError("Only models with the same architecture can be stacked")
+        return NumpyLSTMModel(
+            [
+                NumpyLayer(
+                    kind=layer.kind,
+                    activation=layer.activation,
+                    kernel=np.concatenate(
+                        [model.layers[i].kernel for model in models]
+                    ),
+                    recurrent_kernel=(
+                        np.concatenate(
+                            [
+                                model.layers[i].recurrent_kernel  # type: ignore
+                                for model in models
+                            ]
+                        )
+                        if layer.recurrent_kernel is not None
+                        else None
+                    ),
+                    bias=np.concatenate([model.layers[i].bias for model in models]),
+                    return_sequences=layer.return_sequences,
+                )
+                for i, layer in enumerate(models[0].layers)
+            ]
+        )
+
+    def get_signature(self) -> tuple:
+        """Layer kinds, options and weight shapes, models with the same signature can be stacked."""
+        return tuple(
+            (
+                layer.kind,
+                layer.activation,
+                layer.return_sequences,
+                layer.kernel.shape[1:],
+            )
+            for layer in self.layers
+        )
+
+    def to_bytes(self) -> bytes:
+        arrays: dict[str, np.ndarray] = {
+            "kinds": np.array([layer.kind for layer in self.layers]),
+            "activations": np.array([layer.activation for layer in self.layers]),
+            "return_sequences": np.array(
+                [layer.return_sequences for layer in self.layers]
+            ),
+        }
+        for i, layer in enumerate(self.layers):
+            arrays[f"{i}_kernel"] = layer.kernel
+            arrays[f"{i}_bias"] = layer.bias
+            if layer.recurrent_kernel is not None:
+                arrays[f"{i}_recurrent_kernel"] = layer.recurrent_kernel
+        buffer = io.BytesIO()
+        np.savez(buffer, **arrays)
+        return buffer.getvalue()
+
+    @staticmethod
+    def from_bytes(data: bytes) -> NumpyLSTMModel:
+        with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+            return NumpyLSTMModel(
+                [
+                    NumpyLayer(
+                        kind=str(kind),  # type: ignore
+                        activation=str(activation),
+                        kernel=arrays[f"{i}_kernel"],
+                        recurrent_kernel=(
+                            arrays[f"{i}_recurrent_kernel"]
+                            if f"{i}_recurrent_kernel" in arrays.files
+                            else None
+                        ),
+                        bias=arrays[f"{i}_bias"],
+                        return_sequences=bool(return_sequences),
+                    )
+                    for i, (kind, activation, return_sequences) in enumerate(
+                        zip(
+                            arrays["kinds"],
+                            arrays["activations"],
+                            arrays["return_sequences"],
+                        )
+                    )
+                ]
+            )
@@ -0,0 +1,97 @@
+from __future__ import annotations
+from threading import Lock
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from keras.src.models import Sequential
+
+
+class TFLiteModel:
+    """Sequential model compiled to a TFLite flatbuffer, called like the model itself
+    on a batch of one window."""
+
+    def __init__(self, flatbuffer: bytes, num_threads: int = 1) -> None:
+        import tensorflow as tf
+
+        self.flatbuffer = flatbuffer
+        self.__interpreter = tf.lite.Interpreter(
+            model_content=flatbuffer, num_threads=num_threads
+        )
+        self.__interpreter.allocate_tensors()
+        self.__input_index = self.__interpreter.get_input_details()[0]["index"]
+        self.__output_index = self.__interpreter.get_output_details()[0]["index"]
+        # an interpreter can't be invoked by two threads at the same time
+        self.__lock = Lock()
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        """
+
+        Args:
+            x (np.ndarray): shape (1, *input_shape)
+
+        Returns:
+            np.ndarray: float32 output of shape (1, *output_shape), owned by the caller
+        """
+        with self.__lock:
+            self.__interpreter.set_tensor(
+                self.__input_index, np.asarray(x, dtype=np.float32)
+            )
+            self.__interpreter.invoke()
+            return self.__interpreter.get_tensor(self.__output_index)
+
+    def to_bytes(self) -> bytes:
+        return self.flatbuffer
+
+    @staticmethod
+    def export(model: Sequential, input_shape: tuple[int, ...]) -> bytes:
+        """Traces the model with a fixed input signature of batch size 1 and converts it
+        to a float32 TFLite flatbuffer.
+
+        Args:
+            model (Sequential):
+            input_shape (tuple[int, ...]): shape of one sample, without the batch dimension
+        """
+        import tensorflow as tf
+
+        @tf.function(
+            input_signature=[tf.TensorSpec(shape=(1, *input_shape), dtype=tf.float32)]
+        )
+        def predict(x):
+            return model(x, training=False)
+
+        converter = tf.lite.TFLiteConverter.from_concrete_functions(
+            [predict.get_concrete_function()], model
+        )
+        # LSTM layers that can't be fused fall back to TF ops
+        converter.target_spec.supported_ops = [
+            tf.lite.OpsSet.TFLITE_BUILTINS,
+            tf.lite.OpsSet.SELECT_TF_OPS,
+        ]
+        return converter.convert()
+
+    @staticmethod
+    def export_and_check(
+        model: Sequential,
+        input_shape: tuple[int, ...],
+        atol: float = 1e-4,
+        samples: int = 8,
+    ) -> TFLiteModel:
+        """Exports the model and checks that the compiled one gives the same outputs
+        of the eager one, up to float32 rounding, on random inputs.
+
+        Raises:
+            ValueError: if the outputs differ by more than atol
+        """
+        compiled_model = TFLiteModel(TFLiteModel.export(model, input_shape))
+        rng = np.random.default_rng(0)
+        for _ in range(samples):
+            x = rng.normal(size=(1, *input_shape)).astype(np.float32)
+            expected = np.asarray(model(x, training=False))
+            max_error = float(np.max(np.abs(compiled_model(x) - expected)))
+            if max_error > atol:
+                raise ValueError(
+                    f"TFLite model differs from the eager one by {max_error}"
+                )
+        return compiled_model
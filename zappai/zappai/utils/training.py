@@ -0,0 +1,199 @@
+from __future__ import annotations
+from dataclasses import dataclass
+import hashlib
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Callable
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    from keras.src.models import Sequential
+
+# called after each training epoch with the number of epochs done and the total,
+# an exception raised by it stops the training
+EpochEndCallback = Callable[[int, int], None]
+
+
+@dataclass
+class TrainingConfig:
+    """Budget and hyperparameters of the training of climate generative models."""
+
+    epochs: int = 50
+    batch_size: int = 32
+    # epochs without a better validation loss before stopping, 0 to run every epoch
+    early_stopping_patience: int = 5
+    learning_rate: float = 1e-3
+    fine_tune_epochs: int = 5
+    # lower than learning_rate, so that fine tuning the global model on one location
+    # adapts it without losing what it learnt from the others
+    fine_tune_learning_rate: float = 1e-4
+    # intra and inter op threads of TensorFlow, None to keep the ones of the process
+    threads: int | None = None
+    # epochs of a refresh, that trains the stored model on the last
+    # refresh_window_months when new months arrive, 0 to always retrain from scratch
+    refresh_epochs: int = 5
+    refresh_window_months: int = 120
+    # the scalers are extended with the new months when the mean of the refresh window
+    # moved by more than this many standard deviations
+    scaler_drift_threshold: float = 0.25
+    # a model is retrained from scratch when it's older than this, or when its rmse on
+    # the new months is more than (1 + degradation_threshold) times its test rmse
+    full_retrain_days: int = 365
+    degradation_threshold: float = 0.25
+
+
+@dataclass
+class TrainingCheckpoint:
+    """State of a training after an epoch, enough to resume it."""
+
+    # epochs done
+    epoch: int
+    # compiled, with the state of the optimizer
+    model: Sequential
+    # one entry per epoch done, see fit_model
+    history: list[dict[str, Any]]
+    # state of the early stopping
+    best: float | None = None
+    best_epoch: int = 0
+    best_weights: list[np.ndarray] | None = None
+    wait: int = 0
+    # the early stopping ended the training at this epoch
+    is_stopped: bool = False
+
+
+def get_data_fingerprint(dfs: list[pd.DataFrame], *extra: object) -> str:
+    """Hash of the contents of the dataframes and of extra, a checkpoint is resumed
+    only if the training data has the same fingerprint."""
+    digest = hashlib.sha256()
+    for df in dfs:
+        digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    for value in extra:
+        digest.update(repr(value).encode())
+    return digest.hexdigest()
+
+
+def set_threads(threads: int | None):
+    """Sets the threads of TensorFlow, before it runs anything."""
+    if threads is None:
+        return
+    import tensorflow as tf
+
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(threads)
+        tf.config.threading.set_inter_op_parallelism_threads(threads)
+    except RuntimeError:
+        logging.warning(
+            f"TensorFlow is already initialized, can't set its threads to {threads}"
+        )
+
+
+def fit_model(
+    model: Sequential,
+    x: np.ndarray,
+    y: np.ndarray,
+    validation_data: tuple[np.ndarray, np.ndarray],
+    epochs: int,
+    config: TrainingConfig,
+    on_epoch_end: EpochEndCallback | None = None,
+    checkpoint: TrainingCheckpoint | None = None,
+    on_checkpoint: Callable[[TrainingCheckpoint], None] | None = None,
+) -> list[dict[str, Any]]:
+    """Fits the model with early stopping on the validation loss, the model ends up
+    with the weights of the epoch with the best one.
+
+    Args:
+        model (Sequential): compiled, checkpoint.model when resuming
+        epochs (int): maximum epochs, including the ones of the checkpoint
+        checkpoint (TrainingCheckpoint | None, optional): resumes the training after its epoch
+        on_checkpoint (Callable[[TrainingCheckpoint], None] | None, optional): called after each
+            epoch from the training thread, e.g. to persist the checkpoint
+
+    Returns:
+        list[dict[str, Any]]: for each epoch, its number, seconds and Keras logs,
+            e.g. loss and val_loss
+    """
+    from keras.src.callbacks import Callback, EarlyStopping
+
+    history = list(checkpoint.history) if checkpoint is not None else []
+    initial_epoch = checkpoint.epoch if checkpoint is not None else 0
+
+    class ResumableEarlyStopping(EarlyStopping):
+        def on_train_begin(self, logs=None):
+            super().on_train_begin(logs)
+            if checkpoint is not None and checkpoint.best is not None:
+                self.best = checkpoint.best
+                self.best_epoch = checkpoint.best_epoch
+                self.best_weights = checkpoint.best_weights
+                self.wait = checkpoint.wait
+
+    early_stopping = (
+        ResumableEarlyStopping(
+            monitor="val_loss",
+            patience=config.early_stopping_patience,
+            restore_best_weights=True,
+        )
+        if config.early_stopping_patience > 0
+        else None
+    )
+
+    class EpochRecorder(Callback):
+        def on_epoch_begin(self, epoch, logs=None):
+            self.started_at = time.perf_counter()
+
+        def on_epoch_end(self, epoch, logs=None):
+            history.append(
+                {
+                    "epoch": epoch + 1,
+                    "seconds": time.perf_counter() - self.started_at,
+                    **{key: float(value) for key, value in (logs or {}).items()},
+                }
+            )
+            if on_checkpoint is not None:
+                on_checkpoint(
+                    TrainingCheckpoint(
+                        epoch=epoch + 1,
+                        model=model,
+                        history=list(history),
+                        best=(
+                            float(early_stopping.best)
+                            if early_stopping is not None
+                            and early_stopping.best is not None
+                            else None
+                        ),
+                        best_epoch=(
+                            early_stopping.best_epoch if early_stopping is not None else 0
+                        ),
+                        best_weights=(
+                            early_stopping.best_weights
+                            if early_stopping is not None
+                            else None
+                        ),
+                        wait=early_stopping.wait if early_stopping is not None else 0,
+                        is_stopped=bool(model.stop_training),
+                    )
+                )
+            if on_epoch_end is not None:
+                on_epoch_end(epoch + 1, epochs)
+
+    # the early stopping updates its state before the checkpoint records it
+    callbacks: list = [EpochRecorder()]
+    if early_stopping is not None:
+        callbacks.insert(0, early_stopping)
+
+    if checkpoint is not None and (checkpoint.is_stopped or initial_epoch >= epochs):
+        # the training ended before the checkpoint was used
+        if checkpoint.best_weights is not None:
+            model.set_weights(checkpoint.best_weights)
+    else:
+        model.fit(
+            x=x,
+            y=y,
+            validation_data=validation_data,
+            epochs=epochs,
+            initial_epoch=initial_epoch,
+            batch_size=config.batch_size,
+            callbacks=callbacks,
+        )
+    return history
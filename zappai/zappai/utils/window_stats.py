@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+
+STATS = ["mean", "std", "min", "max"]
+
+
+class WindowStats:
+    """Mean, std, min and max of any window of consecutive months in O(1).
+
+    Cumulative sums and cumulative sums of squares give mean and std, sparse tables
+    give min and max. Std uses ddof=1 like pandas, so a window of one month has a NaN std.
+    """
+
+    def __init__(self, df: pd.DataFrame, columns: list[str]) -> None:
+        """
+
+        Args:
+            df (pd.DataFrame): monthly data, sorted by (year, month)
+            columns (list[str]): columns of df to compute the stats of
+        """
+        values = df[columns].to_numpy(dtype=np.float64)
+        self.columns = columns
+        self.stats_columns = [f"{column}_{stat}" for column in columns for stat in STATS]
+        self.__stats_column_indexes = {
+            column: i for i, column in enumerate(self.stats_columns)
+        }
+        self.length, n_columns = values.shape
+
+        # shift the values so that the sums of squares don't lose precision
+        self.__shift = (
+            values.mean(axis=0) if self.length > 0 else np.zeros(n_columns)
+        )
+        centered = values - self.__shift
+        zeros = np.zeros((1, n_columns))
+        self.__cumsum = np.concatenate([zeros, np.cumsum(centered, axis=0)])
+        self.__cumsum_squares = np.concatenate(
+            [zeros, np.cumsum(centered**2, axis=0)]
+        )
+
+        # table[k, i] is the min (max) of the months in [i, i + 2**k)
+        levels = max(1, self.length).bit_length()
+        self.__min_table = np.full((levels, self.length, n_columns), np.inf)
+        self.__max_table = np.full((levels, self.length, n_columns), -np.inf)
+        self.__min_table[0] = values
+        self.__max_table[0] = values
+        for k in range(1, levels):
+            half = 1 << (k - 1)
+            size = self.length - (1 << k) + 1
+            self.__min_table[k, :size] = np.minimum(
+                self.__min_table[k - 1, :size],
+                self.__min_table[k - 1, half : half + size],
+            )
+            self.__max_table[k, :size] = np.maximum(
+                self.__max_table[k - 1, :size],
+                self.__max_table[k - 1, half : half + size],
+            )
+
+    def get_stats(self, start: int, end: int) -> np.ndarray:
+        """Stats of the months in [start, end].
+
+        Returns:
+            np.ndarray: shape (len(self.stats_columns),)
+        """
+        return self.get_many_stats(starts=np.array([start]), ends=np.array([end]))[0]
+
+    def get_many_stats(
+        self,
+        starts: np.ndarray,
+        ends: np.ndarray,
+        stats_columns: list[str] | None = None,
+    ) -> np.ndarray:
+        """Stats of the months in [starts[i], ends[i]] for every i.
+
+        Args:
+            starts (np.ndarray): first month of each window
+            ends (np.ndarray): last month of each window, included
+            stats_columns (list[str] | None): order of the returned columns, for example
+                ["2m_temperature_mean", ...]. Defaults to self.stats_columns.
+
+        Raises:
+            IndexError: if a window is empty or out of bounds
+
+        Returns:
+            np.ndarray: shape (len(starts), len(stats_columns))
+        """
+        starts = np.asarray(starts, dtype=np.int64)
+        ends = np.asarray(ends, dtype=np.int64)
+        if np.any(starts < 0) or np.any(ends >= self.length) or np.any(starts > ends):
+            raise IndexError(
+                f"Windows must satisfy 0 <= start <= end < {self.length}"
+            )
+
+        counts = (ends - starts + 1)[:, None]
+        sums = self.__cumsum[ends + 1] - self.__cumsum[starts]
+        sums_squares = self.__cumsum_squares[ends + 1] - self.__cumsum_squares[starts]
+
+        means = sums / counts
+        with np.errstate(divide="ignore", invalid="ignore"):
+            variances = np.where(
+                counts > 1, (sums_squares - sums * means) / (counts - 1), np.nan
+            )
+        stds = np.sqrt(np.maximum(variances, 0.0))
+
+        levels = np.floor(np.log2(counts[:, 0])).astype(np.int64)
+        other_starts = ends - (1 << levels) + 1
+        mins = np.minimum(
+            self.__min_table[levels, starts], self.__min_table[levels, other_starts]
+        )
+        maxs = np.maximum(
+            self.__max_table[levels, starts], self.__max_table[levels, other_starts]
+        )
+
+        # shape (windows, columns, len(STATS)) flattened as self.stats_columns
+        result = np.stack([means + self.__shift, stds, mins, maxs], axis=2).reshape(
+            len(starts), -1
+        )
+        if stats_columns is None:
+            return result
+        return result[
+            :, [self.__stats_column_indexes[column] for column in stats_columns]
+        ]
@@ -0,0 +1,79 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def create_windows(
+    x: np.ndarray, y: np.ndarray, seq_length: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Windows of seq_length consecutive rows of x, each with the row of y that follows it.
+    Both are views on x and y, no data is copied.
+
+    Args:
+        x (np.ndarray): shape (rows, features)
+        y (np.ndarray): shape (rows, targets)
+        seq_length (int):
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: windows of shape (rows - seq_length, seq_length, features)
+            and targets of shape (rows - seq_length, targets)
+    """
+    n = max(len(x) - seq_length, 0)
+    if n == 0:
+        return (
+            np.empty((0, seq_length, *x.shape[1:]), dtype=x.dtype),
+            y[:0],
+        )
+    # shape (rows - seq_length + 1, features, seq_length)
+    windows = sliding_window_view(x, window_shape=seq_length, axis=0)
+    return np.moveaxis(windows, -1, 1)[:n], y[seq_length:]
+
+
+def stack_windows(
+    xs: list[np.ndarray], ys: list[np.ndarray], seq_length: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Windows of many series, e.g. one per location, that never cross two series.
+
+    The series are concatenated once and the windows are a view on the concatenation,
+    so assembling the training set of many locations copies each row once.
+
+    Args:
+        xs (list[np.ndarray]): shape (rows_i, features) for each series
+        ys (list[np.ndarray]): shape (rows_i, targets) for each series
+        seq_length (int):
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: view on every window of the
+            concatenation, shape (sum(rows_i) - seq_length + 1, seq_length, features),
+            starts of the windows that belong to a single series, targets of those windows
+            of shape (len(starts), targets). gather_windows(windows, starts) materializes them.
+    """
+    x = np.concatenate(xs)
+    y = np.concatenate(ys)
+    lengths = np.array([len(series) for series in xs])
+    offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    starts = np.concatenate(
+        [
+            np.arange(offset, offset + max(length - seq_length, 0))
+            for offset, length in zip(offsets, lengths)
+        ]
+        + [np.empty(0, dtype=np.int64)]
+    ).astype(np.int64)
+    if len(x) < seq_length:
+        windows = np.empty((0, seq_length, *x.shape[1:]), dtype=x.dtype)
+    else:
+        windows = np.moveaxis(
+            sliding_window_view(x, window_shape=seq_length, axis=0), -1, 1
+        )
+    return windows, starts, y[starts + seq_length]
+
+
+def gather_windows(windows: np.ndarray, starts: np.ndarray | None = None) -> np.ndarray:
+    """Copies the windows, or the ones beginning at starts, in contiguous memory,
+    for consumers that can't work on strided views.
+
+    Returns:
+        np.ndarray: shape (len(starts), seq_length, features)
+    """
+    if starts is None:
+        return np.ascontiguousarray(windows)
+    return windows[starts]